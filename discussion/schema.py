@@ -2,6 +2,7 @@ import graphene
 from graphene_django_extras.fields import DjangoFilterPaginateListField
 
 from discussion.types import CommentType, LikeCommentType
+from lukimgather.dataloaders import DataLoaderFilterPaginateListField
 
 from .filters import CommentFilter, LikeCommentFilter
 from .mutations import (
@@ -14,7 +15,7 @@ from .mutations import (
 
 
 class DiscussionQueries(graphene.ObjectType):
-    comments = DjangoFilterPaginateListField(
+    comments = DataLoaderFilterPaginateListField(
         CommentType,
         description="Return comments",
         filterset_class=CommentFilter,
@@ -2,6 +2,7 @@ import graphene
 from graphene_django.types import DjangoObjectType
 
 from discussion.models import Comment, LikeComment
+from lukimgather.dataloaders import load_foreign_key, prime_foreign_keys
 
 
 class CommentType(DjangoObjectType):
@@ -13,6 +14,12 @@ class CommentType(DjangoObjectType):
         model = Comment
         fields = "__all__"
 
+    foreign_key_fields = ("user", "parent")
+
+    @classmethod
+    def prime_loaders(cls, info, objs):
+        prime_foreign_keys(info, objs, cls.foreign_key_fields)
+
     def resolve_description(self, info):
         return self.description if not self.is_deleted else "[deleted]"
 
@@ -29,7 +36,10 @@ class CommentType(DjangoObjectType):
         return self.get_descendants().count()
 
     def resolve_user(self, info):
-        return self.user if not self.is_deleted else None
+        return load_foreign_key(info, self, "user") if not self.is_deleted else None
+
+    def resolve_parent(self, info):
+        return load_foreign_key(info, self, "parent")
 
 
 class LikeCommentType(DjangoObjectType):
@@ -8,6 +8,7 @@ then
         poetry run celery -A lukimgather worker -l info -Q "$CELERY_QUEUES"
     fi
 else
+    poetry run ./manage.py check --deploy --fail-level ERROR || exit 1
     poetry run ./manage.py migrate --no-input
     poetry run ./manage.py import_default_email_template
     poetry run ./manage.py createinitialrevisions
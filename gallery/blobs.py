@@ -0,0 +1,94 @@
+import hashlib
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from gallery.models import Gallery, MediaBlob
+
+
+def get_checksum(file):
+    checksum = hashlib.sha256()
+    for chunk in file.chunks():
+        checksum.update(chunk)
+    file.seek(0)
+    return checksum.hexdigest()
+
+
+def attach_blob(gallery):
+    """
+    Point a new gallery at the blob storing its media. The media is written
+    only when no blob with the same bytes is stored yet, and the gallery then
+    reuses the renditions of galleries sharing the blob. Return the name of the
+    file written for a new blob.
+    """
+    media = gallery.media
+    if not media or media._committed:
+        return None
+    stored_name = None
+    checksum = get_checksum(media.file)
+    blob = MediaBlob.objects.filter(checksum=checksum).first()
+    if blob is None:
+        new_blob = MediaBlob(checksum=checksum)
+        new_blob.file.save(media.name, media.file, save=False)
+        blob, created = MediaBlob.objects.get_or_create(
+            checksum=checksum, defaults={"file": new_blob.file.name}
+        )
+        if created:
+            stored_name = blob.file.name
+        else:
+            # Stored meanwhile by a concurrent upload of the same bytes
+            new_blob.file.delete(save=False)
+    else:
+        gallery.renditions = (
+            blob.galleries.exclude(renditions={})
+            .values_list("renditions", flat=True)
+            .first()
+            or {}
+        )
+    gallery.blob = blob
+    gallery.media = blob.file.name
+    return stored_name
+
+
+@contextmanager
+def attached_blobs(galleries):
+    """
+    Attach blobs to new galleries stored by the enclosed block, which runs in
+    a transaction. When the block fails, the files stored for new blobs are
+    deleted, since their rows are rolled back, and the galleries are reset so
+    they can be attached again.
+    """
+    galleries = list(galleries)
+    originals = [
+        (gallery, gallery.media, gallery.blob, gallery.renditions)
+        for gallery in galleries
+    ]
+    stored_names = []
+    try:
+        for gallery in galleries:
+            stored_name = attach_blob(gallery)
+            if stored_name:
+                stored_names.append(stored_name)
+        yield
+    except Exception:
+        storage = MediaBlob._meta.get_field("file").storage
+        for name in stored_names:
+            storage.delete(name)
+        for gallery, media, blob, renditions in originals:
+            gallery.media = media
+            gallery.blob = blob
+            gallery.renditions = renditions
+        raise
+
+
+def release_blob(blob_id):
+    """Delete the blob and its file once no gallery references it."""
+    blob = MediaBlob.objects.filter(pk=blob_id).first()
+    if not blob or blob.galleries.exists():
+        return
+    name = blob.file.name
+    storage = blob.file.storage
+    blob.delete()
+    # Galleries stored before deduplication may still reference the file
+    if not Gallery.objects.filter(media=name).exists():
+        transaction.on_commit(lambda: storage.delete(name))
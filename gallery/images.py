@@ -0,0 +1,124 @@
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from gallery.models import Gallery, MediaBlob, MediaType
+from gallery.renditions import generate_renditions
+
+logger = logging.getLogger(__name__)
+
+# Format images are stored in, by format of the upload
+STORED_FORMATS = {"JPEG": "JPEG", "MPO": "JPEG", "PNG": "PNG", "WEBP": "WEBP"}
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+def get_stored_format(image_format):
+    if settings.IMAGE_WEBP:
+        return "WEBP"
+    return STORED_FORMATS.get(image_format, "PNG")
+
+
+def swap_file(storage, name, target_name):
+    """Move the stored file to the name of the file it replaces."""
+    with storage.open(name, "rb") as file:
+        target_name = storage.save(target_name, file)
+    storage.delete(name)
+    return target_name
+
+
+def normalize_image(gallery):
+    """
+    Rotate the gallery image upright, downscale it to `IMAGE_MAX_EDGE` and
+    store it without metadata, e.g. the EXIF location of the camera. Images
+    which are already normalized are kept.
+    """
+    max_edge = settings.IMAGE_MAX_EDGE
+    try:
+        with gallery.media.open("rb") as media:
+            image = Image.open(media)
+            source_format = image.format
+            stored_format = get_stored_format(source_format)
+            if (
+                max(image.size) <= max_edge
+                and STORED_FORMATS.get(source_format) == stored_format
+                and not image.getexif()
+            ):
+                return
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_edge, max_edge))
+    except (OSError, UnidentifiedImageError):
+        logger.warning(
+            "Failed to normalize image of gallery %s", gallery.pk, exc_info=True
+        )
+        return
+    if stored_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        image = image.convert("RGB")
+    content = io.BytesIO()
+    # Metadata isn't copied unless passed to `save`
+    image.save(content, stored_format, quality=settings.IMAGE_QUALITY)
+
+    name = gallery.media.name
+    if STORED_FORMATS.get(source_format) != stored_format:
+        new_name = f"{os.path.splitext(name)[0]}{EXTENSIONS[stored_format]}"
+    else:
+        # Keep the URL of the image when its format doesn't change
+        new_name = name
+    storage = gallery.media.storage
+    # Storages which don't overwrite files store it next to the upload, which
+    # is only deleted once the normalized image is stored
+    stored_name = storage.save(new_name, ContentFile(content.getvalue()))
+    if stored_name != name:
+        storage.delete(name)
+    if new_name == name and stored_name != name:
+        try:
+            stored_name = swap_file(storage, stored_name, name)
+        except OSError:
+            logger.warning(
+                "Failed to store normalized image of gallery %s as %s",
+                gallery.pk,
+                name,
+                exc_info=True,
+            )
+    gallery.media.name = stored_name
+    # The file is shared by the galleries of identical uploads. Their blob is
+    # still keyed by the digest of the upload, so uploading the same bytes
+    # again reuses the normalized file.
+    Gallery.objects.filter(media=name).update(media=gallery.media.name)
+    MediaBlob.objects.filter(file=name).update(file=gallery.media.name)
+
+
+def process_image(gallery):
+    if gallery.type != MediaType.IMAGE or not gallery.media:
+        return
+    normalize_image(gallery)
+    generate_renditions(gallery)
+
+
+def schedule_image_processing(galleries):
+    """
+    Normalize the gallery images and generate their renditions once the
+    transaction storing them commits, by the celery workers when enabled.
+    """
+    gallery_ids = [
+        gallery.pk
+        for gallery in galleries
+        if gallery.type == MediaType.IMAGE and gallery.media and not gallery.renditions
+    ]
+    if not gallery_ids:
+        return
+
+    def process():
+        from gallery.tasks import process_gallery_image
+
+        for gallery_id in gallery_ids:
+            if settings.ENABLE_CELERY:
+                process_gallery_image.delay(str(gallery_id))
+            else:
+                process_image(Gallery.objects.get(pk=gallery_id))
+
+    transaction.on_commit(process)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from gallery.uploads import clear_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads which weren't modified within UPLOAD_EXPIRATION"
+
+    def handle(self, *args, **options):
+        count = clear_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired uploads"))
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from gallery.blobs import get_checksum, release_blob
+from gallery.models import Gallery, MediaBlob
+
+
+class Command(BaseCommand):
+    help = (
+        "Store media of galleries uploaded before deduplication once, delete "
+        "duplicate files and blobs no gallery references"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the files to delete without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        galleries = (
+            Gallery.objects.filter(blob__isnull=True)
+            .exclude(Q(media="") | Q(media__isnull=True))
+            .order_by("created_at")
+        )
+        # File name by checksum of blobs which a dry run would have created
+        pending_blobs = {}
+        deleted = 0
+        freed = 0
+        for gallery in galleries.iterator():
+            name = gallery.media.name
+            storage = gallery.media.storage
+            if not storage.exists(name):
+                self.stderr.write(
+                    f"Media of gallery {gallery.pk} doesn't exist: {name}"
+                )
+                continue
+            with gallery.media.open("rb") as media:
+                checksum = get_checksum(media)
+            blob = MediaBlob.objects.filter(checksum=checksum).first()
+            blob_name = blob.file.name if blob else pending_blobs.get(checksum, name)
+            if dry_run:
+                pending_blobs.setdefault(checksum, blob_name)
+            else:
+                with transaction.atomic():
+                    blob, _created = MediaBlob.objects.get_or_create(
+                        checksum=checksum, defaults={"file": name}
+                    )
+                    Gallery.objects.filter(pk=gallery.pk).update(
+                        blob=blob, media=blob_name
+                    )
+            if blob_name == name:
+                continue
+            referenced = (
+                Gallery.objects.filter(media=name).exclude(pk=gallery.pk).exists()
+                if dry_run
+                else Gallery.objects.filter(media=name).exists()
+            )
+            if referenced:
+                continue
+            deleted += 1
+            freed += storage.size(name)
+            if not dry_run:
+                storage.delete(name)
+        if not dry_run:
+            for blob_id in MediaBlob.objects.filter(galleries__isnull=True).values_list(
+                "pk", flat=True
+            ):
+                release_blob(blob_id)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would delete' if dry_run else 'Deleted'} {deleted} duplicate "
+                f"files of {freed} bytes"
+            )
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from gallery.images import process_image
+from gallery.models import Gallery, MediaType
+
+
+class Command(BaseCommand):
+    help = "Normalize gallery images and generate their renditions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Process images which already have renditions too",
+        )
+
+    def handle(self, *args, **options):
+        galleries = Gallery.objects.filter(type=MediaType.IMAGE).exclude(
+            Q(media="") | Q(media__isnull=True)
+        )
+        if not options["all"]:
+            galleries = galleries.filter(renditions={})
+        count = 0
+        for gallery in galleries.iterator():
+            try:
+                process_image(gallery)
+            except Exception as e:
+                self.stderr.write(f"Failed to process image of {gallery.pk}: {e}")
+                continue
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} images"))
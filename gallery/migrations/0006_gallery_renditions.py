@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0005_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gallery',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='URLs of the resized images, by rendition name.', verbose_name='Renditions'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.13 on 2026-10-18 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0006_gallery_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('checksum', models.CharField(help_text='SHA-256 of the uploaded bytes.', max_length=64, primary_key=True, serialize=False, verbose_name='Checksum')),
+                ('file', models.FileField(upload_to='attachments/%Y/%m/%d/', verbose_name='File')),
+            ],
+            options={
+                'verbose_name': 'Media blob',
+                'verbose_name_plural': 'Media blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='blob',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='galleries', to='gallery.mediablob'),
+        ),
+    ]
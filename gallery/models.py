@@ -1,5 +1,6 @@
 import uuid
 
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -12,6 +13,29 @@ class MediaType(models.TextChoices):
     OTHER = "other", _("Other")
 
 
+class MediaBlob(TimeStampedModel):
+    """
+    Stored media file, shared by the galleries of identical uploads. The
+    checksum is the digest of the upload, images are normalized afterwards so
+    the stored bytes may differ.
+    """
+
+    checksum = models.CharField(
+        _("Checksum"),
+        max_length=64,
+        primary_key=True,
+        help_text=_("SHA-256 of the uploaded bytes."),
+    )
+    file = models.FileField(_("File"), upload_to="attachments/%Y/%m/%d/")
+
+    def __str__(self):
+        return self.checksum
+
+    class Meta:
+        verbose_name = _("Media blob")
+        verbose_name_plural = _("Media blobs")
+
+
 class Gallery(TimeStampedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(_("Title"), max_length=255)
@@ -27,10 +51,60 @@ class Gallery(TimeStampedModel):
         null=True,
         blank=True,
     )
+    blob = models.ForeignKey(
+        MediaBlob,
+        related_name="galleries",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    renditions = models.JSONField(
+        _("Renditions"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("URLs of the resized images, by rendition name."),
+    )
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        from gallery.blobs import attach_blob
+
+        if self._state.adding:
+            attach_blob(self)
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = _("Gallery")
         verbose_name_plural = _("Galleries")
+
+
+class Upload(TimeStampedModel):
+    """
+    Resumable upload of a media file. Chunks are stored in `UPLOAD_DIR` until
+    the upload is complete and referenced by a mutation through its token.
+    """
+
+    token = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(_("File name"), max_length=255)
+    length = models.PositiveBigIntegerField(_("Length"))
+    offset = models.PositiveBigIntegerField(_("Offset"), default=0)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="uploads",
+        on_delete=models.CASCADE,
+    )
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def is_complete(self):
+        return self.offset == self.length
+
+    class Meta:
+        verbose_name = _("Upload")
+        verbose_name_plural = _("Uploads")
@@ -0,0 +1,20 @@
+from sorl.thumbnail import get_thumbnail
+
+from gallery.models import Gallery, MediaType
+
+# Renditions of gallery images, generated once after the image is stored
+RENDITIONS = {
+    "sm": ("400x400", {"crop": "center", "quality": 60}),
+    "lg": ("700x700", {"crop": "center", "quality": 99}),
+}
+
+
+def generate_renditions(gallery):
+    if gallery.type != MediaType.IMAGE or not gallery.media:
+        return
+    gallery.renditions = {
+        name: get_thumbnail(gallery.media, geometry, **options).url
+        for name, (geometry, options) in RENDITIONS.items()
+    }
+    # Update the row only, so the image isn't scheduled for processing again
+    Gallery.objects.filter(pk=gallery.pk).update(renditions=gallery.renditions)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from gallery.blobs import release_blob
+from gallery.images import schedule_image_processing
+from gallery.models import Gallery
+
+
+@receiver(post_save, sender=Gallery)
+def schedule_gallery_image_processing(sender, instance, created, **kwargs):
+    if created:
+        schedule_image_processing([instance])
+
+
+@receiver(post_delete, sender=Gallery)
+def release_gallery_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_blob(instance.blob_id)
@@ -0,0 +1,18 @@
+from celery import shared_task
+
+from gallery.images import process_image
+from gallery.models import Gallery
+from lukimgather.celery import no_simultaneous_execution
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_kwargs={"max_retries": 3},
+)
+@no_simultaneous_execution
+def process_gallery_image(self, gallery_id):
+    gallery = Gallery.objects.filter(pk=gallery_id).first()
+    if gallery:
+        process_image(gallery)
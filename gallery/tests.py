@@ -1,3 +1,151 @@
-from django.test import TestCase
+import base64
+import os
+import tempfile
+import uuid
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, transaction
+from django.urls import reverse
+from graphql_jwt.shortcuts import get_token
+
+from gallery.blobs import attached_blobs
+from gallery.models import Gallery, MediaBlob, Upload
+from gallery.uploads import get_upload_dir, get_upload_path
+from lukimgather.tests import TestBase
+
+
+class UploadViewTest(TestBase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = cls.baker.make(settings.AUTH_USER_MODEL, is_active=True)
+        cls.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {get_token(cls.user)}",
+            "HTTP_TUS_RESUMABLE": "1.0.0",
+        }
+
+    def setUp(self):
+        super().setUp()
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        settings_override = self.settings(UPLOAD_DIR=upload_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_upload(self, content, filename="test.png"):
+        response = self.client.post(
+            reverse("uploads"),
+            HTTP_UPLOAD_LENGTH=str(len(content)),
+            HTTP_UPLOAD_METADATA=f"filename {base64.b64encode(filename.encode()).decode()}",
+            **self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        return response["Upload-Token"], response["Location"]
+
+    def patch_chunk(self, location, offset, chunk):
+        return self.client.patch(
+            location,
+            chunk,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+            **self.headers,
+        )
+
+    def test_options(self):
+        response = self.client.options(reverse("uploads"))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Tus-Version"], "1.0.0")
+        self.assertEqual(response["Tus-Extension"], "creation,termination")
+
+    def test_requires_tus_version_and_authentication(self):
+        response = self.client.post(reverse("uploads"), HTTP_UPLOAD_LENGTH="1")
+        self.assertEqual(response.status_code, 412)
+        response = self.client.post(
+            reverse("uploads"), HTTP_UPLOAD_LENGTH="1", HTTP_TUS_RESUMABLE="1.0.0"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_create_rejects_invalid_uploads(self):
+        response = self.client.post(reverse("uploads"), **self.headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse("uploads"),
+            HTTP_UPLOAD_LENGTH=str(settings.UPLOAD_MAX_SIZE + 1),
+            HTTP_UPLOAD_METADATA=f"filename {base64.b64encode(b'test.png').decode()}",
+            **self.headers,
+        )
+        self.assertEqual(response.status_code, 413)
+
+    def test_resumable_upload(self):
+        content = b"resumable upload"
+        token, location = self.create_upload(content)
+        upload = Upload.objects.get(token=token)
+        self.assertEqual(upload.filename, "test.png")
+        self.assertEqual(upload.created_by, self.user)
+
+        response = self.patch_chunk(location, 0, content[:9])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Upload-Offset"], "9")
+
+        # A chunk sent again after a lost response conflicts with the offset
+        response = self.patch_chunk(location, 0, content[:9])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Upload-Offset"], "9")
+
+        response = self.client.head(location, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Upload-Offset"], "9")
+        self.assertEqual(response["Upload-Length"], str(len(content)))
+
+        response = self.patch_chunk(location, 9, content[9:])
+        self.assertEqual(response.status_code, 204)
+        upload.refresh_from_db()
+        self.assertTrue(upload.is_complete)
+        with open(get_upload_path(upload), "rb") as data:
+            self.assertEqual(data.read(), content)
+
+    def test_chunk_beyond_length(self):
+        _token, location = self.create_upload(b"test")
+        response = self.patch_chunk(location, 0, b"test chunk")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response["Upload-Offset"], "0")
+
+    def test_upload_of_other_user(self):
+        _token, location = self.create_upload(b"test")
+        other_user = self.baker.make(settings.AUTH_USER_MODEL, is_active=True)
+        headers = {
+            **self.headers,
+            "HTTP_AUTHORIZATION": f"Bearer {get_token(other_user)}",
+        }
+        self.assertEqual(self.client.head(location, **headers).status_code, 404)
+        self.assertEqual(self.client.delete(location, **headers).status_code, 404)
+
+    def test_terminate_upload(self):
+        token, location = self.create_upload(b"test")
+        self.patch_chunk(location, 0, b"te")
+        upload = Upload.objects.get(token=token)
+        response = self.client.delete(location, **self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Upload.objects.filter(token=token).exists())
+        self.assertFalse(os.path.exists(get_upload_dir(upload)))
+        self.assertEqual(self.client.head(location, **self.headers).status_code, 404)
+
+
+class AttachedBlobsTest(TestBase):
+    def test_failed_transaction_deletes_new_blob_files(self):
+        gallery = Gallery(
+            media=SimpleUploadedFile("blob.txt", uuid.uuid4().bytes),
+            title="blob.txt",
+            type="other",
+        )
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic(), attached_blobs([gallery]):
+                blob = gallery.blob
+                storage = blob.file.storage
+                self.assertTrue(storage.exists(blob.file.name))
+                raise DatabaseError
+        self.assertFalse(storage.exists(blob.file.name))
+        self.assertFalse(MediaBlob.objects.filter(pk=blob.pk).exists())
+        self.assertIsNone(gallery.blob)
+        self.assertFalse(gallery.media._committed)
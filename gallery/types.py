@@ -1,6 +1,5 @@
 import graphene
 from graphene_django.types import DjangoObjectType
-from sorl.thumbnail import get_thumbnail
 
 from gallery.models import Gallery
 
@@ -16,7 +15,7 @@ class GalleryType(DjangoObjectType):
 
     class Meta:
         model = Gallery
-        exclude = ("type",)
+        exclude = ("type", "renditions")
 
     def resolve_media(self, info):
         if self.media and self.media.url:
@@ -28,17 +27,18 @@ class GalleryType(DjangoObjectType):
         if not self.media or not self.media.url:
             return None
 
+        og = info.context.build_absolute_uri(self.media.url)
         if self.type == "image":
-            img_quality_sm = get_thumbnail(
-                self.media, "400x400", crop="center", quality=60
-            )
-            img_quality_lg = get_thumbnail(
-                self.media, "700x700", crop="center", quality=99
-            )
+            # Renditions are generated after the image is stored, the original
+            # is served until they're ready
             return GalleryMediaType(
-                og=info.context.build_absolute_uri(self.media.url),
-                sm=info.context.build_absolute_uri(img_quality_sm.url),
-                lg=info.context.build_absolute_uri(img_quality_lg.url),
+                og=og,
+                sm=info.context.build_absolute_uri(self.renditions["sm"])
+                if "sm" in self.renditions
+                else og,
+                lg=info.context.build_absolute_uri(self.renditions["lg"])
+                if "lg" in self.renditions
+                else og,
             )
 
-        return GalleryMediaType(og=info.context.build_absolute_uri(self.media.url))
+        return GalleryMediaType(og=og)
@@ -0,0 +1,96 @@
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from graphql import GraphQLError
+
+from gallery.models import Upload
+
+# Name of the file chunks are appended to, inside the directory of an upload
+DATA_FILENAME = "data"
+READ_SIZE = 64 * 1024
+
+
+def get_upload_dir(upload):
+    return os.path.join(settings.UPLOAD_DIR, str(upload.token))
+
+
+def get_upload_path(upload):
+    return os.path.join(get_upload_dir(upload), DATA_FILENAME)
+
+
+def write_chunk(upload, stream, max_size):
+    """
+    Copy the request stream to a part file next to the upload data. At most
+    `max_size` bytes are read, one byte more marks the chunk as too large.
+    Return the path and size of the part.
+    """
+    upload_dir = get_upload_dir(upload)
+    os.makedirs(upload_dir, exist_ok=True)
+    part_path = os.path.join(upload_dir, f"{uuid.uuid4()}.part")
+    size = 0
+    with open(part_path, "wb") as part:
+        while size <= max_size:
+            data = stream.read(min(READ_SIZE, max_size + 1 - size))
+            if not data:
+                break
+            part.write(data)
+            size += len(data)
+    return part_path, size
+
+
+def append_chunk(upload, part_path):
+    with open(get_upload_path(upload), "ab") as data, open(part_path, "rb") as part:
+        # Drop bytes of an earlier append which wasn't recorded
+        data.truncate(upload.offset)
+        shutil.copyfileobj(part, data, READ_SIZE)
+    os.remove(part_path)
+
+
+def delete_upload(upload):
+    shutil.rmtree(get_upload_dir(upload), ignore_errors=True)
+    upload.delete()
+
+
+def open_upload(token, user):
+    """
+    File of a completed upload of the user, to be saved like a file sent
+    inline with the mutation.
+    """
+    upload = Upload.objects.filter(token=token, created_by=user).first()
+    if not upload or not upload.is_complete:
+        raise GraphQLError(f"Upload {token} doesn't exist or isn't complete.")
+    if not upload.length:
+        # Empty uploads never receive a chunk, so their file doesn't exist
+        os.makedirs(get_upload_dir(upload), exist_ok=True)
+        open(get_upload_path(upload), "ab").close()
+    file = File(open(get_upload_path(upload), "rb"), name=upload.filename)
+    file.upload = upload
+    return file
+
+
+def delete_uploads_on_commit(files):
+    """Delete the uploads of files opened by `open_upload` once they're stored."""
+
+    def delete_uploads():
+        for file in files:
+            file.close()
+            delete_upload(file.upload)
+
+    transaction.on_commit(delete_uploads)
+
+
+def clear_expired_uploads():
+    expired = Upload.objects.filter(
+        modified_at__lt=timezone.now() - timedelta(seconds=settings.UPLOAD_EXPIRATION)
+    )
+    count = 0
+    for upload in expired.iterator():
+        delete_upload(upload)
+        count += 1
+    return count
@@ -1,3 +1,138 @@
-from django.shortcuts import render
+import base64
+import binascii
+import os
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from graphql_jwt.exceptions import JSONWebTokenError
+
+from gallery.models import Upload
+from gallery.uploads import append_chunk, delete_upload, write_chunk
+
+TUS_VERSION = "1.0.0"
+
+
+def parse_metadata(value):
+    """Decode `Upload-Metadata`, comma separated keys with base64 values."""
+    metadata = {}
+    for pair in filter(None, (pair.strip() for pair in value.split(","))):
+        key, _separator, encoded = pair.partition(" ")
+        metadata[key] = base64.b64decode(encoded, validate=True).decode()
+    return metadata
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class UploadView(View):
+    """
+    Resumable uploads following the core, creation and termination parts of
+    the tus protocol. Completed uploads are referenced by their token in
+    happening survey mutations instead of sending the file inline.
+    """
+
+    http_method_names = ["options", "post", "head", "patch", "delete"]
+
+    def response(self, status, **headers):
+        response = HttpResponse(status=status)
+        response["Tus-Resumable"] = TUS_VERSION
+        response["Cache-Control"] = "no-store"
+        for header, value in headers.items():
+            response[header.replace("_", "-")] = value
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == "OPTIONS":
+            return self.response(
+                204,
+                Tus_Version=TUS_VERSION,
+                Tus_Max_Size=settings.UPLOAD_MAX_SIZE,
+                Tus_Extension="creation,termination",
+            )
+        if request.headers.get("Tus-Resumable") != TUS_VERSION:
+            return self.response(412, Tus_Version=TUS_VERSION)
+        try:
+            user = authenticate(request=request) or request.user
+        except JSONWebTokenError:
+            return self.response(401)
+        if not user.is_authenticated:
+            return self.response(401)
+        request.user = user
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_upload(self, queryset, token):
+        return queryset.filter(token=token, created_by=self.request.user).first()
+
+    def post(self, request, token=None):
+        if token:
+            return self.response(405)
+        try:
+            length = int(request.headers["Upload-Length"])
+            metadata = parse_metadata(request.headers.get("Upload-Metadata", ""))
+        except (KeyError, ValueError, binascii.Error):
+            return self.response(400)
+        if length < 0:
+            return self.response(400)
+        if length > settings.UPLOAD_MAX_SIZE:
+            return self.response(413)
+        filename = os.path.basename(metadata.get("filename", ""))
+        if not filename:
+            return self.response(400)
+        upload = Upload.objects.create(
+            filename=filename[:255], length=length, created_by=request.user
+        )
+        location = request.build_absolute_uri(
+            reverse("upload", kwargs={"token": upload.token})
+        )
+        return self.response(201, Location=location, Upload_Token=upload.token)
+
+    def head(self, request, token=None):
+        upload = self.get_upload(Upload.objects.all(), token)
+        if not upload:
+            return self.response(404)
+        return self.response(
+            200, Upload_Offset=upload.offset, Upload_Length=upload.length
+        )
+
+    def patch(self, request, token=None):
+        upload = self.get_upload(Upload.objects.all(), token)
+        if not upload:
+            return self.response(404)
+        if request.content_type != "application/offset+octet-stream":
+            return self.response(415)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            return self.response(400)
+        if offset != upload.offset:
+            return self.response(409, Upload_Offset=upload.offset)
+        # The body is streamed to disk without holding a lock, so a stalled
+        # client doesn't block others. The offset is checked again afterwards.
+        part_path, size = write_chunk(
+            upload,
+            request,
+            min(settings.UPLOAD_MAX_CHUNK_SIZE, upload.length - upload.offset),
+        )
+        with transaction.atomic():
+            upload = self.get_upload(Upload.objects.select_for_update(), token)
+            if not upload or upload.offset != offset:
+                os.remove(part_path)
+                return self.response(409, Upload_Offset=upload.offset if upload else 0)
+            if offset + size > upload.length or size > settings.UPLOAD_MAX_CHUNK_SIZE:
+                os.remove(part_path)
+                return self.response(413, Upload_Offset=upload.offset)
+            append_chunk(upload, part_path)
+            upload.offset += size
+            upload.save(update_fields=["offset", "modified_at"])
+        return self.response(204, Upload_Offset=upload.offset)
+
+    def delete(self, request, token=None):
+        upload = self.get_upload(Upload.objects.all(), token)
+        if not upload:
+            return self.response(404)
+        delete_upload(upload)
+        return self.response(204)
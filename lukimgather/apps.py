@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class LukimGatherConfig(AppConfig):
+    name = "lukimgather"
+
+    def ready(self):
+        from reversion.signals import pre_revision_commit
+
+        from lukimgather import checks  # noqa: F401
+        from lukimgather.lookups import register_lookups
+        from lukimgather.revisions import compact_revision_versions
+
+        register_lookups()
+        if settings.REVERSION_COMPACT_VERSIONS:
+            pre_revision_commit.connect(compact_revision_versions)
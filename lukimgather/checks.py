@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Cache backends keeping their entries in the memory of each process
+PER_PROCESS_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared_cache(alias="default"):
+    return settings.CACHES[alias]["BACKEND"] not in PER_PROCESS_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if is_shared_cache():
+        return []
+    return [
+        Error(
+            "The default cache isn't shared between processes.",
+            hint=(
+                "Set CACHE_URL to a shared cache such as redis. Responses of "
+                "requests with an Idempotency-Key are stored in it and would "
+                "be replayed only by the worker which stored them."
+            ),
+            id="lukimgather.E001",
+        )
+    ]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_tile_storage(app_configs, **kwargs):
+    from lukimgather.tiles import CacheTileStorage, get_tile_storage
+
+    storage = get_tile_storage()
+    if not isinstance(storage, CacheTileStorage) or is_shared_cache(storage.alias):
+        return []
+    return [
+        Error(
+            "The tile storage isn't shared between processes.",
+            hint=(
+                "Use lukimgather.tiles.FileSystemTileStorage as "
+                "TILE_CACHE_STORAGE or a shared cache. The protected area tile "
+                "pyramid is rendered by a single process and tiles are "
+                "invalidated only in the process saving the data."
+            ),
+            id="lukimgather.E002",
+        )
+    ]
@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+from django.db import models
+from graphene_django_extras import DjangoFilterPaginateListField
+
+from lukimgather.revisions import deserialize_versions
+
+
+class ModelDataLoader:
+    """
+    Request scoped loader which batches lookups of model instances by primary key.
+    Keys are queued with `prime` and fetched with a single `IN (...)` query the
+    first time any of them is loaded.
+    """
+
+    default = None
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.cache = {}
+        self.pending = set()
+
+    def prime(self, keys):
+        self.pending.update(
+            key for key in keys if key is not None and key not in self.cache
+        )
+
+    def load(self, key):
+        if key is None:
+            return self.default
+        if key not in self.cache:
+            self.pending.add(key)
+            self.dispatch()
+        return self.cache[key]
+
+    def dispatch(self):
+        keys, self.pending = self.pending, set()
+        if not keys:
+            return
+        values = self.batch_load(keys)
+        for key in keys:
+            self.cache[key] = values.get(key, self.default)
+
+    def batch_load(self, keys):
+        return {obj.pk: obj for obj in self.queryset.filter(pk__in=keys)}
+
+
+class ManyToManyDataLoader(ModelDataLoader):
+    """
+    Request scoped loader which batches many to many relations of a model, keyed
+    by primary key of the source instance.
+    """
+
+    default = ()
+
+    def __init__(self, model, field_name):
+        field = model._meta.get_field(field_name)
+        self.through = field.remote_field.through
+        self.source_name = field.m2m_field_name()
+        self.target_name = field.m2m_reverse_field_name()
+        super().__init__(self.through._default_manager.all())
+
+    def batch_load(self, keys):
+        values = defaultdict(list)
+        rows = self.queryset.filter(**{f"{self.source_name}__in": keys}).select_related(
+            self.target_name
+        )
+        for row in rows:
+            values[getattr(row, f"{self.source_name}_id")].append(
+                getattr(row, self.target_name)
+            )
+        return values
+
+
+def get_loader(info, name, factory):
+    loaders = getattr(info.context, "dataloaders", None)
+    if loaders is None:
+        loaders = {}
+        info.context.dataloaders = loaders
+    if name not in loaders:
+        loaders[name] = factory()
+    return loaders[name]
+
+
+def get_model_loader(info, model):
+    return get_loader(
+        info,
+        model._meta.label,
+        lambda: ModelDataLoader(model._default_manager.all()),
+    )
+
+
+def get_many_to_many_loader(info, model, field_name):
+    return get_loader(
+        info,
+        f"{model._meta.label}.{field_name}",
+        lambda: ManyToManyDataLoader(model, field_name),
+    )
+
+
+def prime_foreign_keys(info, objs, field_names):
+    groups = _group_by_model(objs)
+    for field_name in field_names:
+        for model, instances in groups.items():
+            field = model._meta.get_field(field_name)
+            get_model_loader(info, field.related_model).prime(
+                getattr(obj, field.attname)
+                for obj in instances
+                if not field.is_cached(obj)
+            )
+
+
+def prime_many_to_many(info, objs, field_names):
+    groups = _group_by_model(objs)
+    for field_name in field_names:
+        for model, instances in groups.items():
+            get_many_to_many_loader(info, model, field_name).prime(
+                obj.pk for obj in instances if _get_prefetched(obj, field_name) is None
+            )
+
+
+def load_foreign_key(info, root, field_name):
+    # Non model roots (e.g. deserialized history snapshots) already carry the value
+    if not isinstance(root, models.Model):
+        return getattr(root, field_name, None)
+    field = root._meta.get_field(field_name)
+    # Already joined by `select_related` of the list field
+    if field.is_cached(root):
+        return field.get_cached_value(root)
+    return get_model_loader(info, field.related_model).load(
+        getattr(root, field.attname)
+    )
+
+
+def load_many_to_many(info, root, field_name):
+    if not isinstance(root, models.Model):
+        return getattr(root, field_name, None)
+    if root.pk is None:
+        return []
+    # Already fetched by `prefetch_related` of the list field
+    prefetched = _get_prefetched(root, field_name)
+    if prefetched is not None:
+        return list(prefetched)
+    return list(get_many_to_many_loader(info, type(root), field_name).load(root.pk))
+
+
+def load_deserialized_versions(info, versions):
+    """Deserialized objects of the versions by pk, kept for the request."""
+    loaded = get_loader(info, "reversion.Version.object", dict)
+    missing = [version for version in versions if version.pk not in loaded]
+    if missing:
+        loaded.update(deserialize_versions(missing))
+    return {version.pk: loaded[version.pk] for version in versions}
+
+
+def _get_prefetched(obj, field_name):
+    return getattr(obj, "_prefetched_objects_cache", {}).get(field_name)
+
+
+def _group_by_model(objs):
+    groups = defaultdict(list)
+    for obj in objs:
+        groups[type(obj)].append(obj)
+    return groups
+
+
+class DataLoaderFilterPaginateListField(DjangoFilterPaginateListField):
+    """
+    DjangoFilterPaginateListField which evaluates the paginated page and lets the
+    node type prime its request scoped loaders with every row of the page.
+    """
+
+    def list_resolver(
+        self, manager, filterset_class, filtering_args, root, info, **kwargs
+    ):
+        results = list(
+            super().list_resolver(
+                manager, filterset_class, filtering_args, root, info, **kwargs
+            )
+        )
+        prime_loaders = getattr(self.type.of_type.of_type, "prime_loaders", None)
+        if prime_loaders:
+            prime_loaders(info, results)
+        return results
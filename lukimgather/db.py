@@ -0,0 +1,70 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.migrations.operations.base import Operation
+from django.db.models import Q, Value
+from django.db.models.functions import Greatest
+
+
+def is_postgresql(using="default"):
+    return connections[using].vendor == "postgresql"
+
+
+class PostgreSQLOnly(Operation):
+    """
+    Apply the wrapped migration operation only on PostgreSQL, so database
+    specific indexes don't break migrating the SpatiaLite development database.
+    The migration state is changed on every database.
+    """
+
+    reduces_to_sql = False
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.operation], {}
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            self.operation.database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            self.operation.database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def describe(self):
+        return f"{self.operation.describe()} on PostgreSQL"
+
+
+def fuzzy_search(queryset, fields, value):
+    """
+    Filter rows with a field similar to the value, most similar first. The
+    trigram `%` operator is answered by the pg_trgm indexes of the fields,
+    other databases fall back to containment.
+    """
+    if not is_postgresql(queryset.db):
+        return queryset.filter(
+            reduce(or_, (Q(**{f"{field}__icontains": value}) for field in fields))
+        )
+    return (
+        queryset.filter(
+            reduce(or_, (Q(**{f"{field}__trigram_similar": value}) for field in fields))
+        )
+        .annotate(
+            similarity=Greatest(
+                *(TrigramSimilarity(field, value) for field in fields),
+                Value(0.0),
+            )
+        )
+        .order_by("-similarity")
+    )
@@ -0,0 +1,27 @@
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+
+class ILikeContains(IContains):
+    """
+    Case insensitive containment as ILIKE on PostgreSQL. Unlike the default
+    `UPPER(column) LIKE UPPER(value)` it can be answered by pg_trgm indexes on
+    the column.
+    """
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        if (
+            hasattr(self.rhs, "as_sql")
+            or self.bilateral_transforms
+            or not lhs_sql.startswith("UPPER(")
+        ):
+            return self.as_sql(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        # Keep the ::text cast, drop the UPPER() the index can't be used with
+        return f"{lhs_sql[len('UPPER('):-1]} ILIKE {rhs_sql}", [*params, *rhs_params]
+
+
+def register_lookups():
+    CharField.register_lookup(ILikeContains)
+    TextField.register_lookup(ILikeContains)
@@ -1,5 +1,10 @@
+import copy
+
 from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.files import File
 from django.db import models
+from django.db.models.fields.files import FieldFile
 from django.utils.translation import gettext_lazy as _
 
 
@@ -40,3 +45,94 @@ class CodeModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class DirtyFieldsMixin(models.Model):
+    """
+    Snapshot concrete field values when the instance is loaded, so that saving
+    an existing instance only writes the changed fields without refetching it.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    @staticmethod
+    def _get_snapshot_value(field, value):
+        if isinstance(value, File):
+            # Assigned files hold open handles which can't be copied, a stored
+            # file is identified by its name and a new one by the instance
+            if isinstance(value, FieldFile) and value._committed:
+                return value.name
+            return value
+        if (
+            value
+            and hasattr(field, "is_custom_lower_field")
+            and field.is_custom_lower_field()
+        ):
+            return value.lower()
+        # Only mutable values, e.g. JSON or geometries, can change in place
+        if isinstance(value, (dict, list, GEOSGeometry)):
+            return copy.deepcopy(value)
+        return value
+
+    def _snapshot_fields(self, field_names=None):
+        if not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field_names is not None and not {field.name, field.attname} & set(
+                field_names
+            ):
+                continue
+            # Deferred fields aren't loaded yet, so there is nothing to compare
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = self._get_snapshot_value(
+                    field, self.__dict__[field.attname]
+                )
+
+    def get_dirty_fields(self):
+        loaded_values = getattr(self, "_loaded_values", {})
+        dirty_fields = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            value = self._get_snapshot_value(field, self.__dict__[field.attname])
+            if field.attname not in loaded_values or (
+                loaded_values[field.attname] != value
+            ):
+                dirty_fields.append(field.name)
+        return dirty_fields
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._snapshot_fields(fields)
+
+    def _save_table(
+        self,
+        raw=False,
+        cls=None,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        updated = super()._save_table(
+            raw, cls, force_insert, force_update, using, update_fields
+        )
+        # Snapshot before post_save, since receivers may save the instance again
+        self._snapshot_fields(update_fields)
+        return updated
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # An unchanged instance is saved in full, as Django skips the save
+            # and its signals for empty update fields
+            dirty_fields = self.get_dirty_fields()
+            if dirty_fields:
+                kwargs["update_fields"] = dirty_fields
+        super().save(*args, **kwargs)
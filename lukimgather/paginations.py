@@ -0,0 +1,189 @@
+import base64
+import json
+from functools import partial
+
+import graphene
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from graphene_django.filter.utils import get_filtering_args_from_filterset
+from graphene_django_extras.filters.filter import get_filterset_class
+from graphene_django_extras.paginations.pagination import BaseDjangoGraphqlPagination
+from graphene_django_extras.settings import graphql_api_settings
+from graphene_django_extras.utils import queryset_factory
+from graphql import GraphQLError
+
+
+def _cursor_value(value):
+    # isoformat keeps microseconds which DjangoJSONEncoder would truncate
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+def encode_cursor(values):
+    data = json.dumps([_cursor_value(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise GraphQLError("Invalid cursor.")
+    if not isinstance(values, list):
+        raise GraphQLError("Invalid cursor.")
+    return values
+
+
+class KeysetGraphqlPagination(BaseDjangoGraphqlPagination):
+    """
+    Cursor pagination which seeks on the ordering columns instead of using OFFSET,
+    so deep pages stay cheap and rows are neither skipped nor repeated while new
+    rows are being inserted. Last ordering field must be unique.
+    """
+
+    __name__ = "KeysetPaginator"
+
+    def __init__(
+        self,
+        default_limit=graphql_api_settings.DEFAULT_PAGE_SIZE,
+        max_limit=graphql_api_settings.MAX_PAGE_SIZE,
+        ordering=("-created_at", "-id"),
+        limit_query_param="limit",
+        cursor_query_param="after",
+    ):
+        descending = {field.startswith("-") for field in ordering}
+        assert len(descending) == 1, "Keyset ordering must use a single direction."
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip("-") for field in ordering)
+        self.lookup = "lt" if descending.pop() else "gt"
+        self.limit_query_param = limit_query_param
+        self.cursor_query_param = cursor_query_param
+
+    def to_dict(self):
+        return {
+            "limit_query_param": self.limit_query_param,
+            "default_limit": self.default_limit,
+            "max_limit": self.max_limit,
+            "cursor_query_param": self.cursor_query_param,
+            "ordering": self.ordering,
+        }
+
+    def to_graphql_fields(self):
+        return {
+            self.limit_query_param: graphene.Int(
+                default_value=self.default_limit,
+                description="Number of results to return per page. Default "
+                "'default_limit': {}, and 'max_limit': {}".format(
+                    self.default_limit, self.max_limit
+                ),
+            ),
+            self.cursor_query_param: graphene.String(
+                description="Opaque cursor returned as `nextCursor` by the previous page."
+            ),
+        }
+
+    def get_cursor(self, obj):
+        return encode_cursor([getattr(obj, field) for field in self.fields])
+
+    def get_seek_filter(self, model, cursor):
+        values = decode_cursor(cursor)
+        if len(values) != len(self.fields):
+            raise GraphQLError("Invalid cursor.")
+        try:
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except ValidationError:
+            raise GraphQLError("Invalid cursor.")
+        seek = Q()
+        for index, field in enumerate(self.fields):
+            condition = Q(**{f"{field}__{self.lookup}": values[index]})
+            for previous_field, previous_value in zip(
+                self.fields[:index], values[:index]
+            ):
+                condition &= Q(**{previous_field: previous_value})
+            seek |= condition
+        return seek
+
+    def paginate_queryset(self, qs, **kwargs):
+        limit = kwargs.get(self.limit_query_param) or self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        qs = qs.order_by(*self.ordering)
+        cursor = kwargs.get(self.cursor_query_param)
+        if cursor:
+            qs = qs.filter(self.get_seek_filter(qs.model, cursor))
+        results = list(qs[: limit + 1])
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = self.get_cursor(results[-1])
+        return results, next_cursor
+
+
+_keyset_page_types = {}
+
+
+def get_keyset_page_type(_type):
+    name = f"{_type.__name__}KeysetPage"
+    if name not in _keyset_page_types:
+        _keyset_page_types[name] = type(
+            name,
+            (graphene.ObjectType,),
+            {
+                "results": graphene.List(graphene.NonNull(_type)),
+                "next_cursor": graphene.String(
+                    description="Cursor of the next page. Null on the last page."
+                ),
+                "Meta": type(
+                    "Meta",
+                    (),
+                    {"description": f"Cursor paginated list of {_type.__name__}"},
+                ),
+            },
+        )
+    return _keyset_page_types[name]
+
+
+class DjangoFilterKeysetListField(graphene.Field):
+    """
+    Cursor paginated alternative of DjangoFilterPaginateListField. Accepts the same
+    filters and custom `resolve_<field>` queryset resolver and returns the page
+    with an opaque `nextCursor`.
+    """
+
+    def __init__(self, _type, pagination=None, filterset_class=None, *args, **kwargs):
+        self.node_type = _type
+        self.filterset_class = get_filterset_class(
+            filterset_class or _type._meta.filterset_class,
+            model=_type._meta.model,
+            fields=_type._meta.filter_fields,
+        )
+        self.filtering_args = get_filtering_args_from_filterset(
+            self.filterset_class, _type
+        )
+        kwargs.setdefault("args", {})
+        kwargs["args"].update(self.filtering_args)
+        self.pagination = pagination or KeysetGraphqlPagination()
+        kwargs.update(self.pagination.to_graphql_fields())
+        super().__init__(get_keyset_page_type(_type), *args, **kwargs)
+
+    def list_resolver(self, manager, root, info, **kwargs):
+        filter_kwargs = {k: v for k, v in kwargs.items() if k in self.filtering_args}
+        qs = queryset_factory(manager, root, info, **kwargs)
+        qs = self.filterset_class(
+            data=filter_kwargs, queryset=qs, request=info.context
+        ).qs
+        results, next_cursor = self.pagination.paginate_queryset(qs, **kwargs)
+        prime_loaders = getattr(self.node_type, "prime_loaders", None)
+        if prime_loaders:
+            prime_loaders(info, results)
+        return self.type(results=results, next_cursor=next_cursor)
+
+    def wrap_resolve(self, parent_resolver):
+        return partial(self.list_resolver, self.node_type._meta.model._default_manager)
@@ -0,0 +1,288 @@
+import json
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.encoding import force_str
+from reversion.models import Revision, Version
+from reversion.revisions import _get_options
+
+
+def bulk_create_revision(objs, comment="", user=None):
+    """
+    Store one revision holding a version of every object with a single insert,
+    instead of saving each version separately as `reversion.create_revision` does.
+    """
+    if not objs:
+        return None
+    model = type(objs[0])
+    version_options = _get_options(model)
+    db = router.db_for_write(model)
+    content_type = ContentType.objects.db_manager(db).get_for_model(model)
+    revision = Revision.objects.using(db).create(
+        date_created=timezone.now(), comment=comment, user=user
+    )
+    Version.objects.using(db).bulk_create(
+        [
+            Version(
+                revision=revision,
+                content_type=content_type,
+                object_id=force_str(obj.pk),
+                db=db,
+                format=version_options.format,
+                serialized_data=serializers.serialize(
+                    version_options.format,
+                    (obj,),
+                    fields=version_options.fields,
+                    use_natural_foreign_keys=version_options.use_natural_foreign_keys,
+                ),
+                object_repr=force_str(obj),
+            )
+            for obj in objs
+        ]
+    )
+    return revision
+
+
+# Large fields of registered models, which compact versions store only when
+# they differ from the previous version of the object
+_compact_fields = {}
+
+
+def register_compact_fields(model, fields):
+    _compact_fields[model._meta.label_lower] = tuple(fields)
+
+
+def get_compact_fields(content_type_id):
+    content_type = ContentType.objects.get_for_id(content_type_id)
+    return _compact_fields.get(f"{content_type.app_label}.{content_type.model}", ())
+
+
+def expand_fields(history, compact_fields):
+    """
+    Fill compact fields omitted from the field dicts of an object history,
+    ordered oldest first, with the value they had in the previous version.
+    """
+    expanded = []
+    previous = {}
+    for fields in history:
+        fields = {
+            **{
+                field: previous[field]
+                for field in compact_fields
+                if field in previous and field not in fields
+            },
+            **fields,
+        }
+        expanded.append(fields)
+        previous = fields
+    return expanded
+
+
+def compact_version_fields(fields, previous_fields, compact_fields):
+    """Drop compact fields equal to the expanded previous version from fields."""
+    return {
+        field: value
+        for field, value in fields.items()
+        if not (
+            field in compact_fields
+            and field in previous_fields
+            and previous_fields[field] == value
+        )
+    }
+
+
+def get_versions_data(versions):
+    """
+    Return decoded serialized data of JSON versions by version pk, with the
+    fields omitted by compaction filled in from earlier versions.
+    """
+    versions_data = {
+        version.pk: json.loads(version.serialized_data) for version in versions
+    }
+    incomplete = defaultdict(list)
+    for version in versions:
+        fields = get_compact_fields(version.content_type_id)
+        if set(fields) - versions_data[version.pk][0]["fields"].keys():
+            incomplete[version.content_type_id, version.db].append(version)
+    for (content_type_id, db), incomplete_versions in incomplete.items():
+        histories = defaultdict(list)
+        for pk, object_id, serialized_data in (
+            Version.objects.using(db)
+            .filter(
+                content_type_id=content_type_id,
+                object_id__in={version.object_id for version in incomplete_versions},
+                pk__lte=max(version.pk for version in incomplete_versions),
+            )
+            .order_by("pk")
+            .values_list("pk", "object_id", "serialized_data")
+        ):
+            histories[object_id].append((pk, json.loads(serialized_data)))
+        fields = get_compact_fields(content_type_id)
+        for object_id, history in histories.items():
+            expanded = expand_fields([data[0]["fields"] for _, data in history], fields)
+            for (pk, data), expanded_fields in zip(history, expanded):
+                if pk in versions_data:
+                    versions_data[pk] = [{**data[0], "fields": expanded_fields}]
+    return versions_data
+
+
+def compact_revision_versions(sender, revision, versions, **kwargs):
+    """
+    Store compact fields of new versions only when they changed. Connected to
+    `pre_revision_commit` when `REVERSION_COMPACT_VERSIONS` is enabled.
+
+    A version is stored in full when none of the previous
+    `REVERSION_SNAPSHOT_INTERVAL - 1` versions of the object is, so the
+    previous values are expanded from a bounded number of versions.
+    """
+    for version in versions:
+        fields = get_compact_fields(version.content_type_id)
+        if not fields or version.format != "json":
+            continue
+        history = []
+        for format, serialized_data in (
+            Version.objects.using(version.db)
+            .filter(
+                content_type_id=version.content_type_id, object_id=version.object_id
+            )
+            .order_by("-pk")
+            .values_list("format", "serialized_data")[
+                : max(settings.REVERSION_SNAPSHOT_INTERVAL - 1, 0)
+            ]
+        ):
+            if format != "json":
+                break
+            history.append(json.loads(serialized_data)[0]["fields"])
+            if set(fields) <= history[-1].keys():
+                break
+        # Without a full version close enough this one is stored in full
+        if not history or not set(fields) <= history[-1].keys():
+            continue
+        previous_fields = expand_fields(history[::-1], fields)[-1]
+        data = json.loads(version.serialized_data)
+        data[0]["fields"] = compact_version_fields(
+            data[0]["fields"], previous_fields, fields
+        )
+        version.serialized_data = json.dumps(data)
+
+
+def get_retained_versions(versions, keep_last):
+    """
+    Return pks of the versions kept by the retention policy: the first one, the
+    last `keep_last` ones and the latest one of each day before them. Versions
+    of an object are given oldest first with their revision.
+    """
+    older_versions = versions[: max(len(versions) - keep_last, 0)]
+    latest_of_day = {
+        timezone.localdate(version.revision.date_created): version.pk
+        for version in older_versions
+    }
+    return {
+        versions[0].pk,
+        *(version.pk for version in versions[len(older_versions) :]),
+        *latest_of_day.values(),
+    }
+
+
+def prune_versions(versions, keep_last, dry_run=False):
+    """
+    Delete versions of an object outside the retention policy, along with
+    revisions left empty. Compact fields whose value was only stored in a
+    deleted version are written to the next retained version, so retained
+    versions expand to the same data. Return the deleted versions.
+    """
+    retained = get_retained_versions(versions, keep_last)
+    deleted_versions = [version for version in versions if version.pk not in retained]
+    if dry_run or not deleted_versions:
+        return deleted_versions
+    fields = get_compact_fields(versions[0].content_type_id)
+    json_versions = [version for version in versions if version.format == "json"]
+    updated_versions = []
+    if fields:
+        history = [json.loads(version.serialized_data) for version in json_versions]
+        previous_fields = {}
+        for version, data, expanded_fields in zip(
+            json_versions,
+            history,
+            expand_fields([data[0]["fields"] for data in history], fields),
+        ):
+            if version.pk not in retained:
+                continue
+            stored_fields = data[0]["fields"]
+            missing_fields = {
+                field: expanded_fields[field]
+                for field in fields
+                if field in expanded_fields
+                and field not in stored_fields
+                and (
+                    field not in previous_fields
+                    or previous_fields[field] != expanded_fields[field]
+                )
+            }
+            if missing_fields:
+                data[0]["fields"] = {**stored_fields, **missing_fields}
+                version.serialized_data = json.dumps(data)
+                updated_versions.append(version)
+            previous_fields = expanded_fields
+    with transaction.atomic(using=versions[0].db):
+        Version.objects.using(versions[0].db).bulk_update(
+            updated_versions, ["serialized_data"]
+        )
+        Version.objects.using(versions[0].db).filter(
+            pk__in=[version.pk for version in deleted_versions]
+        ).delete()
+        Revision.objects.using(versions[0].db).filter(
+            pk__in={version.revision_id for version in deleted_versions},
+            version=None,
+        ).delete()
+    return deleted_versions
+
+
+# Versions are never changed, so their deserialized objects are kept per process
+DESERIALIZED_VERSIONS_CACHE_SIZE = 2048
+_deserialized_versions = OrderedDict()
+_deserialized_versions_lock = threading.Lock()
+
+
+def deserialize_versions(versions):
+    """
+    Return deserialized objects of the versions by version pk. JSON versions
+    missing from the cache are decoded and deserialized in one pass. The
+    returned objects are shared, they must not be modified.
+    """
+    deserialized = {}
+    missing = []
+    with _deserialized_versions_lock:
+        for version in versions:
+            if version.pk in _deserialized_versions:
+                _deserialized_versions.move_to_end(version.pk)
+                deserialized[version.pk] = _deserialized_versions[version.pk]
+            else:
+                missing.append(version)
+    json_versions = [version for version in missing if version.format == "json"]
+    versions_data = get_versions_data(json_versions)
+    # Each version stores a list holding its single object
+    objects = serializers.deserialize(
+        "python",
+        [data for version in json_versions for data in versions_data[version.pk]],
+        ignorenonexistent=True,
+    )
+    deserialized.update(zip((version.pk for version in json_versions), objects))
+    for version in missing:
+        if version.format != "json":
+            deserialized[version.pk] = next(
+                serializers.deserialize(
+                    version.format, version.serialized_data, ignorenonexistent=True
+                )
+            )
+    with _deserialized_versions_lock:
+        for version in missing:
+            _deserialized_versions[version.pk] = deserialized[version.pk]
+        while len(_deserialized_versions) > DESERIALIZED_VERSIONS_CACHE_SIZE:
+            _deserialized_versions.popitem(last=False)
+    return deserialized
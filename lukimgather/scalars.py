@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import graphene
+from django.conf import settings
 from graphql import GraphQLError
 from PIL import Image
 
@@ -8,13 +9,21 @@ from PIL import Image
 class UploadImage(graphene.Scalar):
     @staticmethod
     def validate_image(upload):
+        # Only the header is read, the image is decoded when it's normalized
+        # after being stored
         try:
             image = Image.open(upload)
-            image.verify()
-        except:
+            valid = (
+                image.format in settings.IMAGE_FORMATS
+                and image.width * image.height <= settings.IMAGE_MAX_PIXELS
+            )
+        except Exception:
+            valid = False
+        if not valid:
             raise GraphQLError(
                 "Upload a valid image. The file you uploaded was either not an image or a corrupted image."
             )
+        upload.seek(0)
         return upload
 
     @staticmethod
@@ -74,6 +74,7 @@ DJANGO_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.gis",
+    "django.contrib.postgres",
     "django.contrib.sites",
 ]
 
@@ -81,6 +82,7 @@ DJANGO_APPS = [
 INTERNAL_APPS = [
     "discussion",
     "gallery",
+    "lukimgather",
     "notification",
     "organization",
     "project",
@@ -163,6 +165,43 @@ GRAPHQL_JWT = {
     "JWT_ALGORITHM": "HS512",
 }
 
+# Seconds the response of a GraphQL request sent with an Idempotency-Key header
+# is stored, retries with the same key within it get the stored response
+IDEMPOTENCY_KEY_TTL = env.int("IDEMPOTENCY_KEY_TTL", default=24 * 60 * 60)
+
+# Delta sync of happening surveys. Watermark returned to clients lags behind
+# server time so rows written by transactions still in flight are not missed
+HAPPENING_SURVEY_SYNC_LAG = timedelta(
+    seconds=env.int("HAPPENING_SURVEY_SYNC_LAG", default=60)
+)
+
+# Store large fields of new versions, e.g. happening survey boundaries, only
+# when they changed since the previous version
+REVERSION_COMPACT_VERSIONS = env.bool("REVERSION_COMPACT_VERSIONS", default=False)
+# Every this many versions of an object one stores all fields, so compacting a
+# new version reads a bounded number of previous ones
+REVERSION_SNAPSHOT_INTERVAL = env.int("REVERSION_SNAPSHOT_INTERVAL", default=10)
+
+# Vector tile cache. Tiles above the max zoom are rendered on every request
+TILE_CACHE_STORAGE = env.str(
+    "TILE_CACHE_STORAGE", default="lukimgather.tiles.CacheTileStorage"
+)
+TILE_CACHE_DIR = env.str("TILE_CACHE_DIR", default=os.path.join(BASE_DIR, "tiles"))
+TILE_CACHE_MAX_ZOOM = env.int("TILE_CACHE_MAX_ZOOM", default=16)
+# Seconds tiles stay in a cache backend, bounding how long a tile rendered
+# while its data changed is served
+TILE_CACHE_TIMEOUT = env.int("TILE_CACHE_TIMEOUT", default=86400)
+# Changes covering more cached tiles move the layer to a new generation
+# instead of deleting each tile
+TILE_INVALIDATION_MAX_TILES = env.int("TILE_INVALIDATION_MAX_TILES", default=1000)
+# Zoom range of the pre-rendered protected area tile pyramid
+PROTECTED_AREA_TILE_MIN_ZOOM = env.int("PROTECTED_AREA_TILE_MIN_ZOOM", default=0)
+PROTECTED_AREA_TILE_MAX_ZOOM = env.int("PROTECTED_AREA_TILE_MAX_ZOOM", default=12)
+
+# Seconds a process trusts its region and protected area index before checking
+# whether another process changed the boundaries
+BOUNDARY_INDEX_CHECK_INTERVAL = env.int("BOUNDARY_INDEX_CHECK_INTERVAL", default=30)
+
 if DEBUG:
     GRAPHENE["MIDDLEWARE"] += [
         "graphene_django.debug.DjangoDebugMiddleware",
@@ -215,7 +254,7 @@ DATABASES = {
 }
 
 # CACHES
-CACHE = {"default": env.dj_cache_url("CACHE_URL", default="dummy://")}
+CACHES = {"default": env.dj_cache_url("CACHE_URL", default="locmem://")}
 
 # AUTH User model
 AUTH_USER_MODEL = "user.User"
@@ -360,6 +399,20 @@ MEDIA_LOCATION = "media"
 STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Uploaded images. Only the header is validated on upload, images are then
+# rotated, downscaled to the max edge and stripped of metadata in the background
+IMAGE_FORMATS = env.list("IMAGE_FORMATS", default=["JPEG", "MPO", "PNG", "WEBP"])
+IMAGE_MAX_PIXELS = env.int("IMAGE_MAX_PIXELS", default=50_000_000)
+IMAGE_MAX_EDGE = env.int("IMAGE_MAX_EDGE", default=2048)
+IMAGE_QUALITY = env.int("IMAGE_QUALITY", default=85)
+IMAGE_WEBP = env.bool("IMAGE_WEBP", default=False)
+
+# Resumable uploads. Chunks are stored on local disk until the upload is
+# complete and referenced by a mutation, incomplete uploads expire
+UPLOAD_DIR = env.str("UPLOAD_DIR", default=os.path.join(BASE_DIR, "uploads"))
+UPLOAD_MAX_SIZE = env.int("UPLOAD_MAX_SIZE", default=200 * 1024 * 1024)
+UPLOAD_MAX_CHUNK_SIZE = env.int("UPLOAD_MAX_CHUNK_SIZE", default=5 * 1024 * 1024)
+UPLOAD_EXPIRATION = env.int("UPLOAD_EXPIRATION", default=24 * 60 * 60)
 if DEBUG:
     STATICFILES_DIRS = [os.path.join(BASE_DIR, "static/")]
 else:
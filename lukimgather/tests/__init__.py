@@ -3,6 +3,8 @@ from django.urls import reverse
 from graphene_django.utils.testing import GraphQLTestCase
 from model_bakery import baker, random_gen
 
+from region.spatial import protected_area_index, region_index
+
 
 class TestBase(GraphQLTestCase):
     baker = baker
@@ -12,3 +14,9 @@ class TestBase(GraphQLTestCase):
     factory = RequestFactory()
     fixtures = ["support/content/email.yaml"]
     GRAPHQL_URL = reverse("api")
+
+    def setUp(self):
+        super().setUp()
+        # Boundaries of previous tests were rolled back without sending signals
+        region_index.invalidate()
+        protected_area_index.invalidate()
@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase, override_settings
+
+from lukimgather.checks import check_shared_cache
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_per_process_cache(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ["lukimgather.E001"]
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+                "LOCATION": "127.0.0.1:11211",
+            }
+        }
+    )
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,64 @@
+import tempfile
+
+import reversion
+from django.contrib.gis import geos
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from reversion.models import Version
+
+from lukimgather.tests import TestBase
+from survey.models import HappeningSurvey
+
+
+class DirtyFieldsMixinTest(TestBase):
+    def get_survey(self):
+        survey = self.baker.make(
+            "survey.HappeningSurvey",
+            title="test",
+            data_dump={"answers": []},
+            boundary=geos.MultiPolygon(geos.Polygon.from_bbox((0, 0, 1, 1))),
+        )
+        return HappeningSurvey.objects.get(pk=survey.pk)
+
+    def test_loaded_instance_is_clean(self):
+        self.assertEqual(self.get_survey().get_dirty_fields(), [])
+
+    def test_changed_fields_are_dirty(self):
+        survey = self.get_survey()
+        survey.title = "changed"
+        survey.data_dump["answers"].append(1)
+        survey.boundary.transform(3857)
+        self.assertEqual(
+            set(survey.get_dirty_fields()), {"title", "data_dump", "boundary"}
+        )
+
+    def test_assigned_file_is_dirty(self):
+        survey = self.get_survey()
+        with tempfile.NamedTemporaryFile(suffix=".mp3") as audio:
+            audio.write(b"audio")
+            audio.seek(0)
+            survey.audio_file = File(audio, name="audio.mp3")
+            self.assertEqual(survey.get_dirty_fields(), ["audio_file"])
+            survey.save()
+        self.assertEqual(survey.get_dirty_fields(), [])
+        self.assertEqual(
+            HappeningSurvey.objects.get(pk=survey.pk).audio_file.name,
+            survey.audio_file.name,
+        )
+
+    def test_assigned_temporary_upload_is_dirty(self):
+        survey = self.get_survey()
+        upload = TemporaryUploadedFile("audio.mp3", "audio/mpeg", 5, None)
+        upload.write(b"audio")
+        upload.seek(0)
+        survey.audio_file = upload
+        self.assertEqual(survey.get_dirty_fields(), ["audio_file"])
+        survey.save()
+        upload.close()
+        self.assertEqual(survey.get_dirty_fields(), [])
+
+    def test_unchanged_save_records_version(self):
+        survey = self.get_survey()
+        with reversion.create_revision():
+            survey.save()
+        self.assertEqual(Version.objects.get_for_object(survey).count(), 1)
@@ -0,0 +1,144 @@
+import json
+
+import reversion
+from django.conf import settings
+from django.contrib.gis import geos
+from reversion.models import Version
+from reversion.signals import pre_revision_commit
+
+from lukimgather.revisions import (
+    compact_revision_versions,
+    get_versions_data,
+    prune_versions,
+)
+from lukimgather.tests import TestBase
+from survey.history import compute_version_diff
+
+
+def get_boundary(xmax):
+    return geos.MultiPolygon(geos.Polygon.from_bbox((0, 0, xmax, 1)), srid=4326)
+
+
+class CompactVersionsTest(TestBase):
+    def setUp(self):
+        super().setUp()
+        # Connected on startup when REVERSION_COMPACT_VERSIONS is enabled
+        if not settings.REVERSION_COMPACT_VERSIONS:
+            pre_revision_commit.connect(compact_revision_versions)
+            self.addCleanup(pre_revision_commit.disconnect, compact_revision_versions)
+        self.survey = self.baker.make(
+            "survey.HappeningSurvey",
+            title="Title 0",
+            data_dump={"answers": [0]},
+            boundary=get_boundary(1),
+        )
+
+    def save_version(self, **values):
+        for field, value in values.items():
+            setattr(self.survey, field, value)
+        with reversion.create_revision():
+            self.survey.save()
+
+    def get_versions(self):
+        return list(
+            Version.objects.get_for_object(self.survey)
+            .select_related("revision")
+            .order_by("pk")
+        )
+
+    def get_stored_fields(self, version):
+        return json.loads(Version.objects.get(pk=version.pk).serialized_data)[0][
+            "fields"
+        ]
+
+    def test_history_after_compaction(self):
+        self.save_version()
+        self.save_version(title="Title 1")
+        self.save_version(data_dump={"answers": [2]})
+        versions = self.get_versions()
+        self.assertIn("data_dump", self.get_stored_fields(versions[0]))
+        self.assertNotIn("data_dump", self.get_stored_fields(versions[1]))
+        self.assertNotIn("boundary", self.get_stored_fields(versions[2]))
+        self.assertIn("data_dump", self.get_stored_fields(versions[2]))
+        versions_data = get_versions_data(versions)
+        self.assertEqual(
+            [
+                versions_data[version.pk][0]["fields"]["data_dump"]
+                for version in versions
+            ],
+            [{"answers": [0]}, {"answers": [0]}, {"answers": [2]}],
+        )
+        self.assertEqual(
+            len(
+                {
+                    versions_data[version.pk][0]["fields"]["boundary"]
+                    for version in versions
+                }
+            ),
+            1,
+        )
+
+    def test_diff_across_compacted_versions(self):
+        self.save_version()
+        self.save_version(title="Title 1")
+        self.save_version(title="Title 2")
+        versions = self.get_versions()
+        # modified_at changes on every save
+        changes = compute_version_diff(versions[1], versions[2])
+        self.assertEqual(
+            {change["field"] for change in changes} - {"modified_at"}, {"title"}
+        )
+        self.save_version(boundary=get_boundary(2))
+        versions = self.get_versions()
+        changes = {
+            change["field"]: change
+            for change in compute_version_diff(versions[1], versions[3])
+        }
+        self.assertEqual(set(changes) - {"modified_at"}, {"boundary", "title"})
+        self.assertGreater(changes["boundary"]["area_delta"], 0)
+
+    def test_prune_copies_compact_fields_forward(self):
+        self.save_version()
+        self.save_version(title="Title 1")
+        self.save_version(boundary=get_boundary(2))
+        self.save_version(title="Title 3")
+        self.save_version(title="Title 4")
+        versions = self.get_versions()
+        expected = get_versions_data(versions)
+        self.assertNotIn("boundary", self.get_stored_fields(versions[3]))
+        # The first, the latest of the day and the last one are kept, the
+        # boundary only stored in the third version is lost without a copy
+        deleted = prune_versions(versions, keep_last=1)
+        self.assertEqual(
+            [version.pk for version in deleted], [versions[1].pk, versions[2].pk]
+        )
+        retained = self.get_versions()
+        self.assertEqual(
+            [version.pk for version in retained],
+            [versions[0].pk, versions[3].pk, versions[4].pk],
+        )
+        self.assertIn("boundary", self.get_stored_fields(versions[3]))
+        self.assertNotIn("boundary", self.get_stored_fields(versions[4]))
+        retained_data = get_versions_data(retained)
+        for version in retained:
+            self.assertEqual(retained_data[version.pk], expected[version.pk])
+
+    def test_full_version_every_snapshot_interval(self):
+        with self.settings(REVERSION_SNAPSHOT_INTERVAL=3):
+            for index in range(6):
+                self.save_version(title=f"Title {index}")
+        versions = self.get_versions()
+        self.assertEqual(
+            ["boundary" in self.get_stored_fields(version) for version in versions],
+            [True, False, False, True, False, False],
+        )
+        versions_data = get_versions_data(versions)
+        self.assertEqual(
+            len(
+                {
+                    versions_data[version.pk][0]["fields"]["boundary"]
+                    for version in versions
+                }
+            ),
+            1,
+        )
@@ -0,0 +1,249 @@
+import hashlib
+import os
+import shutil
+import time
+import uuid
+
+import mercantile
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+
+# Latitude bounds of web mercator tiles
+MAX_LATITUDE = 85.051129
+
+
+class CacheTileStorage:
+    """
+    Store tiles in a Django cache backend. Tiles expire after
+    `TILE_CACHE_TIMEOUT`, which bounds how long a tile rendered before a change
+    but stored after its invalidation is served, and lets the cache evict
+    tiles of previous generations when it can't delete them by prefix.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(f"tile:{key}")
+
+    def set(self, key, content, expires=True):
+        entry = (content, time.time())
+        self.cache.set(
+            f"tile:{key}", entry, settings.TILE_CACHE_TIMEOUT if expires else None
+        )
+        return entry
+
+    def delete_many(self, keys):
+        self.cache.delete_many([f"tile:{key}" for key in keys])
+
+    def delete_prefix(self, prefix):
+        # Only some backends can delete by pattern, tiles of others are left
+        # to the eviction of the cache
+        delete_pattern = getattr(self.cache, "delete_pattern", None)
+        if delete_pattern:
+            delete_pattern(f"tile:{prefix}/*")
+
+
+class FileSystemTileStorage:
+    """Store tiles as `<layer>/<z>/<x>/<y>.mvt` files below a directory."""
+
+    def __init__(self, location=None):
+        self.location = location or settings.TILE_CACHE_DIR
+
+    def path(self, key):
+        return os.path.join(self.location, f"{key}.mvt")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as tile_file:
+                return tile_file.read(), os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, content, expires=True):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see partial tiles
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as tile_file:
+            tile_file.write(content)
+        os.replace(temporary_path, path)
+        return content, os.path.getmtime(path)
+
+    def delete_many(self, keys):
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def delete_prefix(self, prefix):
+        shutil.rmtree(os.path.join(self.location, prefix), ignore_errors=True)
+
+
+def get_tile_storage():
+    return import_string(settings.TILE_CACHE_STORAGE)()
+
+
+def get_tile_key(layer_name, z, x, y):
+    return f"{layer_name}/{z}/{x}/{y}"
+
+
+def get_generation_key(layer_name):
+    return f"{layer_name}/generation"
+
+
+def get_layer_generation(storage, layer_name):
+    entry = storage.get(get_generation_key(layer_name))
+    return entry[0].decode() if entry and entry[0] else None
+
+
+def get_layer_tile_key(storage, layer_name, z, x, y):
+    """Storage key of the tile in the current generation of the layer."""
+    generation = get_layer_generation(storage, layer_name)
+    if generation:
+        layer_name = f"{layer_name}/{generation}"
+    return get_tile_key(layer_name, z, x, y)
+
+
+def get_covering_bounds(geometry, min_zoom=0, max_zoom=None, buffer_ratio=256 / 4096):
+    """
+    Yield the zoom level and bounds of the tiles whose content may include the
+    geometry, taking the buffer rendered around each tile into account.
+    """
+    if max_zoom is None:
+        max_zoom = settings.TILE_CACHE_MAX_ZOOM
+    if geometry.srid and geometry.srid != 4326:
+        geometry = geometry.transform(4326, clone=True)
+    west, south, east, north = geometry.extent
+    left, bottom = mercantile.xy(west, south, truncate=True)
+    right, top = mercantile.xy(east, north, truncate=True)
+    for zoom in range(min_zoom, max_zoom + 1):
+        padding = mercantile.CE / 2**zoom * buffer_ratio
+        west, south = mercantile.lnglat(left - padding, bottom - padding)
+        east, north = mercantile.lnglat(right + padding, top + padding)
+        yield zoom, (west, south, east, north)
+
+
+def get_covering_tiles(geometry, min_zoom=0, max_zoom=None):
+    """Yield every tile whose content may include the geometry."""
+    for zoom, bounds in get_covering_bounds(geometry, min_zoom, max_zoom):
+        yield from mercantile.tiles(*bounds, zooms=zoom)
+
+
+def count_covering_tiles(geometry, min_zoom=0, max_zoom=None):
+    """Number of tiles `get_covering_tiles` yields, without listing them."""
+    count = 0
+    for zoom, (west, south, east, north) in get_covering_bounds(
+        geometry, min_zoom, max_zoom
+    ):
+        # Clamped like `mercantile.tiles` does
+        upper_left = mercantile.tile(max(west, -180), min(north, MAX_LATITUDE), zoom)
+        lower_right = mercantile.tile(
+            min(east, 180) - mercantile.LL_EPSILON,
+            max(south, -MAX_LATITUDE) + mercantile.LL_EPSILON,
+            zoom,
+        )
+        count += (lower_right.x - upper_left.x + 1) * (lower_right.y - upper_left.y + 1)
+    return count
+
+
+def get_geometries_tiles(geometries, min_zoom=0, max_zoom=None):
+    return {
+        tile
+        for geometry in geometries
+        if geometry
+        for tile in get_covering_tiles(geometry, min_zoom, max_zoom)
+    }
+
+
+def invalidate_tiles(layer_name, geometries):
+    """
+    Delete the cached tiles of the layer covering the geometries. When too
+    many tiles are covered to list them, the layer moves to a new generation
+    instead and the tiles of the previous one are deleted by prefix.
+    """
+    geometries = [geometry for geometry in geometries if geometry]
+    if not geometries:
+        return
+    storage = get_tile_storage()
+    if (
+        sum(count_covering_tiles(geometry) for geometry in geometries)
+        > settings.TILE_INVALIDATION_MAX_TILES
+    ):
+        previous_generation = get_layer_generation(storage, layer_name)
+        storage.set(
+            get_generation_key(layer_name),
+            uuid.uuid4().hex[:12].encode(),
+            expires=False,
+        )
+        if previous_generation:
+            storage.delete_prefix(f"{layer_name}/{previous_generation}")
+        return
+    generation = get_layer_generation(storage, layer_name)
+    if generation:
+        layer_name = f"{layer_name}/{generation}"
+    storage.delete_many(
+        {
+            get_tile_key(layer_name, tile.z, tile.x, tile.y)
+            for tile in get_geometries_tiles(geometries)
+        }
+    )
+
+
+class CachedTileMixin:
+    """
+    Serve vector tiles from the configured tile storage, rendering and storing
+    them on a miss. Tiles above `TILE_CACHE_MAX_ZOOM` aren't cached since they
+    can't be invalidated cheaply.
+    """
+
+    def get_tile_cache_key(self, storage, z, x, y):
+        """Return storage key of the tile, or None when it isn't cached."""
+        if z > settings.TILE_CACHE_MAX_ZOOM:
+            return None
+        return get_layer_tile_key(storage, self.get_vector_tile_layer_name(), z, x, y)
+
+    def get_cached_tile(self, z, x, y):
+        storage = get_tile_storage()
+        key = self.get_tile_cache_key(storage, z, x, y)
+        if key is None:
+            return self.render_tile(z, x, y), None
+        entry = storage.get(key)
+        if entry is None:
+            entry = storage.set(key, self.render_tile(z, x, y))
+        return entry
+
+    def render_tile(self, z, x, y):
+        return (
+            self.get_tile(
+                x,
+                y,
+                z,
+                extent=self.vector_tile_extent,
+                buffer=self.vector_tile_buffer,
+                clip_geom=True,
+            )
+            or b""
+        )
+
+    def get(self, request, z, x, y):
+        content, modified_at = self.get_cached_tile(z, x, y)
+        response = HttpResponse(
+            content, content_type=self.content_type, status=200 if content else 204
+        )
+        if modified_at is None:
+            return response
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        last_modified = int(modified_at)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified, response=response
+        )
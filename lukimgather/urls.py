@@ -4,14 +4,14 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_file_upload.django import FileUploadGraphQLView
 
+from gallery.views import UploadView
 from region.views import ProtectedAreaTileView
-from survey.views import TileView
+from survey.views import ClusterTileView, HappeningSurveyExportView, TileView
 from user.views import ProfileView, UserInfoView
 
 from .schema import schema
-from .views import generate_204
+from .views import IdempotentGraphQLView, generate_204
 
 urlpatterns = i18n_patterns(
     path("admin/", admin.site.urls), prefix_default_language=False
@@ -21,7 +21,7 @@ urlpatterns += [
     path(
         "graphql",
         csrf_exempt(
-            FileUploadGraphQLView.as_view(
+            IdempotentGraphQLView.as_view(
                 graphiql=not settings.IS_SERVER_SECURE, schema=schema
             )
         ),
@@ -37,11 +37,23 @@ urlpatterns += [
         TileView.as_view(),
         name="happening-surveys-tile",
     ),
+    path(
+        "cluster_tiles/<int:z>/<int:x>/<int:y>",
+        ClusterTileView.as_view(),
+        name="happening-survey-clusters-tile",
+    ),
     path(
         "protected_area_tiles/<int:z>/<int:x>/<int:y>",
         ProtectedAreaTileView.as_view(),
         name="protected-area-tile",
     ),
+    path("uploads/", UploadView.as_view(), name="uploads"),
+    path("uploads/<uuid:token>", UploadView.as_view(), name="upload"),
+    path(
+        "exports/happening_surveys",
+        HappeningSurveyExportView.as_view(),
+        name="happening-surveys-export",
+    ),
     path("accounts/profile/", ProfileView.as_view()),
 ]
 
@@ -1,10 +1,116 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from graphene_file_upload.django import FileUploadGraphQLView
+from graphql_jwt.exceptions import JSONWebTokenError
 from rest_framework import status
 from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+# Seconds after which the lock of a request with an idempotency key expires,
+# in case the request never finished
+IDEMPOTENCY_LOCK_TIMEOUT = 5 * 60
+
 
 @api_view(["GET"])
 @renderer_classes([JSONRenderer])
 def generate_204(response, format=None):
     return Response(None, status=status.HTTP_204_NO_CONTENT)
+
+
+def error_response(message, status):
+    return JsonResponse({"errors": [{"message": message}]}, status=status)
+
+
+class IdempotentGraphQLView(FileUploadGraphQLView):
+    """
+    GraphQL view storing the successful response of requests sent with an
+    `Idempotency-Key` header for `IDEMPOTENCY_KEY_TTL` seconds. A retry of the
+    request by the same user with the same key gets the stored response
+    without the operation being executed again.
+    """
+
+    def get_user(self, request):
+        try:
+            user = authenticate(request=request)
+        except JSONWebTokenError:
+            return None
+        return user or request.user
+
+    def get_fingerprint(self, request):
+        checksum = hashlib.sha256()
+        if request.content_type == "multipart/form-data":
+            # The multipart boundary differs between retries of the same request
+            checksum.update(request.POST.get("operations", "").encode())
+            checksum.update(request.POST.get("map", "").encode())
+        else:
+            checksum.update(request.body)
+        return checksum.hexdigest()
+
+    def is_replayable(self, response):
+        """
+        Only successful responses are stored. Errors may be transient and
+        GraphQL reports them with a 200 status, so the request can be retried.
+        """
+        if response.status_code != 200:
+            return False
+        try:
+            content = json.loads(response.content)
+        except ValueError:
+            return False
+        return isinstance(content, dict) and not content.get("errors")
+
+    def dispatch(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if request.method != "POST" or not idempotency_key:
+            return super().dispatch(request, *args, **kwargs)
+        if len(idempotency_key) > 255:
+            return error_response("Idempotency-Key is too long.", 400)
+        user = self.get_user(request)
+        if not user or not user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        # Authenticated once here, so the JWT middleware doesn't decode again
+        request.user = user
+
+        key_hash = hashlib.sha256(idempotency_key.encode()).hexdigest()
+        cache_key = f"idempotency:{user.pk}:{key_hash}"
+        fingerprint = self.get_fingerprint(request)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                return error_response(
+                    "Idempotency-Key was used for a different request.", 422
+                )
+            response = HttpResponse(
+                stored["content"],
+                status=stored["status"],
+                content_type=stored["content_type"],
+            )
+            response["Idempotent-Replayed"] = "true"
+            return response
+        if not cache.add(f"{cache_key}:lock", True, IDEMPOTENCY_LOCK_TIMEOUT):
+            return error_response(
+                "A request with this Idempotency-Key is still being processed.", 409
+            )
+
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if self.is_replayable(response):
+                cache.set(
+                    cache_key,
+                    {
+                        "fingerprint": fingerprint,
+                        "content": response.content,
+                        "status": response.status_code,
+                        "content_type": response["Content-Type"],
+                    },
+                    settings.IDEMPOTENCY_KEY_TTL,
+                )
+        finally:
+            cache.delete(f"{cache_key}:lock")
+        return response
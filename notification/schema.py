@@ -4,6 +4,8 @@ from django.utils.translation import gettext as _
 from graphene_django_extras import DjangoFilterPaginateListField
 from graphql_jwt.decorators import login_required
 
+from lukimgather.paginations import DjangoFilterKeysetListField
+
 from .filters import NoticeFilter, NotificationFilter
 from .models import Notification
 from .mutations import APNSDeviceMutation, GCMDeviceMutation, MarkNotification
@@ -16,6 +18,11 @@ class NotificationQueries(graphene.ObjectType):
         description="Return notifications",
         filterset_class=NotificationFilter,
     )
+    notifications_cursor = DjangoFilterKeysetListField(
+        NotificationType,
+        description="Return notifications paginated by cursor",
+        filterset_class=NotificationFilter,
+    )
     notification_unread_count = graphene.Int()
 
     @login_required
@@ -1,3 +1,5 @@
+import json
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from graphql_jwt.shortcuts import get_token
@@ -73,3 +75,30 @@ class APITest(TestBase):
             headers=self.headers,
         )
         self.assertResponseNoErrors(response)
+
+    def test_get_notifications_cursor(self):
+        query = """
+            query NotificationsCursor($after: String) {
+                notificationsCursor(limit: 3, after: $after) {
+                    results {
+                        id
+                    }
+                    nextCursor
+                }
+            }
+        """
+        response = self.query(query, variables={"after": None}, headers=self.headers)
+        self.assertResponseNoErrors(response)
+        first_page = json.loads(response.content)["data"]["notificationsCursor"]
+        self.assertEqual(len(first_page["results"]), 3)
+        self.assertIsNotNone(first_page["nextCursor"])
+        response = self.query(
+            query, variables={"after": first_page["nextCursor"]}, headers=self.headers
+        )
+        self.assertResponseNoErrors(response)
+        second_page = json.loads(response.content)["data"]["notificationsCursor"]
+        self.assertEqual(len(second_page["results"]), 2)
+        self.assertIsNone(second_page["nextCursor"])
+        first_ids = {result["id"] for result in first_page["results"]}
+        second_ids = {result["id"] for result in second_page["results"]}
+        self.assertFalse(first_ids & second_ids)
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.23 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import lukimgather.db
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0004_remove_organization_members'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='organization',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='organization_title_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='organization',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['acronym'], name='organization_acronym_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='organization',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['description'], name='organization_description_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='organization',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='organization_email_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='organization',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['website'], name='organization_website_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='organization',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='organization_address_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+    ]
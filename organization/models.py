@@ -1,4 +1,5 @@
 from ckeditor.fields import RichTextField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
@@ -34,3 +35,20 @@ class Organization(UserStampedModel, TimeStampedModel):
 
     def __str__(self):
         return self.title
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=[field],
+                name=f"organization_{field}_trgm",
+                opclasses=["gin_trgm_ops"],
+            )
+            for field in (
+                "title",
+                "acronym",
+                "description",
+                "email",
+                "website",
+                "address",
+            )
+        ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from ordered_model.models import OrderedModel
@@ -34,7 +35,11 @@ class Project(TimeStampedModel, UserStampedModel, OrderedModel):
     )
 
     class Meta(OrderedModel.Meta):
-        pass
+        indexes = [
+            GinIndex(
+                fields=["title"], name="project_title_trgm", opclasses=["gin_trgm_ops"]
+            )
+        ]
 
     def __str__(self):
         return self.title
@@ -1,13 +1,13 @@
 import graphene
-from graphene_django_extras import DjangoFilterPaginateListField
 
+from lukimgather.dataloaders import DataLoaderFilterPaginateListField
 from project.filters import ProjectFilter
 from project.mutations import AddProjectUserMutation, ProjectUserDeleteMutation
 from project.types import ProjectType
 
 
 class ProjectQueries(graphene.ObjectType):
-    projects = DjangoFilterPaginateListField(
+    projects = DataLoaderFilterPaginateListField(
         ProjectType, description="Returns projects", filterset_class=ProjectFilter
     )
 
@@ -2,6 +2,7 @@ import graphene
 from graphene_django.types import DjangoObjectType
 from graphene_django_extras.paginations import LimitOffsetGraphqlPagination
 
+from lukimgather.dataloaders import load_foreign_key, prime_foreign_keys
 from project.models import Project, ProjectUser
 from survey.models import HappeningSurvey
 
@@ -18,6 +19,21 @@ class ProjectType(DjangoObjectType):
         fields = "__all__"
         pagination = LimitOffsetGraphqlPagination(default_limit=100, ordering="-order")
 
+    foreign_key_fields = ("organization", "created_by", "updated_by")
+
+    @classmethod
+    def prime_loaders(cls, info, objs):
+        prime_foreign_keys(info, objs, cls.foreign_key_fields)
+
+    def resolve_organization(self, info):
+        return load_foreign_key(info, self, "organization")
+
+    def resolve_created_by(self, info):
+        return load_foreign_key(info, self, "created_by")
+
+    def resolve_updated_by(self, info):
+        return load_foreign_key(info, self, "updated_by")
+
     def resolve_total_users(self, info):
         return self.users.count()
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RegionConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "region"
+
+    def ready(self):
+        from region import signals
@@ -1,9 +1,20 @@
 import django_filters
 
+from lukimgather.db import fuzzy_search
+
 from .models import ProtectedArea, Region
 
 
-class RegionFilter(django_filters.FilterSet):
+class FuzzyNameFilterSet(django_filters.FilterSet):
+    fuzzy_name = django_filters.CharFilter(
+        method="get_fuzzy_name", label="Name, ordered by similarity"
+    )
+
+    def get_fuzzy_name(self, queryset, name, value):
+        return fuzzy_search(queryset, ("name",), value)
+
+
+class RegionFilter(FuzzyNameFilterSet):
     class Meta:
         model = Region
         fields = {
@@ -13,7 +24,7 @@ class RegionFilter(django_filters.FilterSet):
         }
 
 
-class ProtectedAreaFilter(django_filters.FilterSet):
+class ProtectedAreaFilter(FuzzyNameFilterSet):
     class Meta:
         model = ProtectedArea
         fields = {
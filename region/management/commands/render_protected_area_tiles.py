@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from region.tiles import render_protected_area_tiles
+
+
+class Command(BaseCommand):
+    help = "Pre-render protected area vector tiles into the tile storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-zoom", type=int, default=settings.PROTECTED_AREA_TILE_MIN_ZOOM
+        )
+        parser.add_argument(
+            "--max-zoom", type=int, default=settings.PROTECTED_AREA_TILE_MAX_ZOOM
+        )
+
+    def handle(self, *args, **options):
+        min_zoom, max_zoom = options["min_zoom"], options["max_zoom"]
+        if min_zoom > max_zoom:
+            raise CommandError("--min-zoom can't be greater than --max-zoom")
+
+        def progress(count, total):
+            if count % 1000 == 0 or count == total:
+                self.stdout.write(f"Rendered {count}/{total} tiles")
+
+        total = render_protected_area_tiles(min_zoom, max_zoom, progress=progress)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {total} protected area tiles for zoom {min_zoom} to {max_zoom}"
+            )
+        )
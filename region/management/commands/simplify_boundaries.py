@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from region.models import SIMPLIFIED_BOUNDARY_FIELDS, ProtectedArea, Region
+
+
+class Command(BaseCommand):
+    help = "Rebuild simplified boundaries of regions and protected areas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        for model in (Region, ProtectedArea):
+            total = model.objects.count()
+            processed = 0
+            chunk = []
+            # bulk_update skips save and signals, boundaries themselves don't change
+            for obj in model.objects.only("id", "boundary").iterator(chunk_size):
+                obj.simplify_boundary()
+                chunk.append(obj)
+                if len(chunk) == chunk_size:
+                    model.objects.bulk_update(chunk, SIMPLIFIED_BOUNDARY_FIELDS)
+                    processed += len(chunk)
+                    chunk = []
+                    self.stdout.write(
+                        f"Simplified {processed}/{total} {model._meta.verbose_name_plural}"
+                    )
+            model.objects.bulk_update(chunk, SIMPLIFIED_BOUNDARY_FIELDS)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Simplified {total} {model._meta.verbose_name_plural}"
+                )
+            )
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.13 on 2026-10-18 09:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('region', '0003_protectedarea'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='protectedarea',
+            name='boundary_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, editable=False, null=True, srid=4326, verbose_name='high detail boundary'),
+        ),
+        migrations.AddField(
+            model_name='protectedarea',
+            name='boundary_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, editable=False, null=True, srid=4326, verbose_name='low detail boundary'),
+        ),
+        migrations.AddField(
+            model_name='protectedarea',
+            name='boundary_medium',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, editable=False, null=True, srid=4326, verbose_name='medium detail boundary'),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='boundary_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, editable=False, null=True, srid=4326, verbose_name='high detail boundary'),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='boundary_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, editable=False, null=True, srid=4326, verbose_name='low detail boundary'),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='boundary_medium',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, editable=False, null=True, srid=4326, verbose_name='medium detail boundary'),
+        ),
+    ]
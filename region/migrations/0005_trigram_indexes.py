@@ -0,0 +1,30 @@
+# Generated by Django 3.2.23 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import lukimgather.db
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('region', '0004_simplified_boundaries'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='region',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='region_name_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='protectedarea',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='region_pa_name_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+    ]
@@ -1,9 +1,92 @@
 from django.contrib.gis.db import models
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
 
+# Simplified copies of boundaries as (field name, tolerance in degrees, highest
+# zoom level it's used for), from coarsest to finest. Tolerances are close to
+# the size of a 256px tile pixel at the highest zoom level.
+SIMPLIFIED_BOUNDARIES = (
+    ("boundary_low", 0.01, 7),
+    ("boundary_medium", 0.001, 10),
+    ("boundary_high", 0.0001, 13),
+)
+SIMPLIFIED_BOUNDARY_FIELDS = tuple(
+    name for name, _tolerance, _zoom in SIMPLIFIED_BOUNDARIES
+)
 
-class Region(MPTTModel):
+
+def get_simplified_boundary_field(zoom=None, tolerance=None):
+    """
+    Return the coarsest boundary field precise enough for the zoom level or
+    tolerance, `boundary` itself when none of the simplified ones is.
+    """
+    for name, field_tolerance, max_zoom in SIMPLIFIED_BOUNDARIES:
+        if tolerance is not None:
+            if field_tolerance <= tolerance:
+                return name
+        elif zoom is not None and zoom <= max_zoom:
+            return name
+    return "boundary"
+
+
+def get_simplified_boundary_expression(zoom=None, tolerance=None):
+    name = get_simplified_boundary_field(zoom, tolerance)
+    if name == "boundary":
+        return F("boundary")
+    # Rows saved before the simplified fields were populated fall back
+    return Coalesce(name, "boundary", output_field=models.MultiPolygonField(srid=4326))
+
+
+def simplify_boundary(boundary, tolerance):
+    if not boundary:
+        return None
+    simplified = boundary.simplify(tolerance, preserve_topology=True)
+    if simplified.empty:
+        return None
+    if isinstance(simplified, Polygon):
+        simplified = MultiPolygon(simplified, srid=boundary.srid)
+    return simplified
+
+
+class SimplifiedBoundaryModel(models.Model):
+    boundary_low = models.MultiPolygonField(
+        _("low detail boundary"), null=True, blank=True, default=None, editable=False
+    )
+    boundary_medium = models.MultiPolygonField(
+        _("medium detail boundary"),
+        null=True,
+        blank=True,
+        default=None,
+        editable=False,
+    )
+    boundary_high = models.MultiPolygonField(
+        _("high detail boundary"), null=True, blank=True, default=None, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def simplify_boundary(self):
+        for name, tolerance, _zoom in SIMPLIFIED_BOUNDARIES:
+            setattr(self, name, simplify_boundary(self.boundary, tolerance))
+
+    def get_boundary(self, zoom=None, tolerance=None):
+        name = get_simplified_boundary_field(zoom, tolerance)
+        return getattr(self, name) or self.boundary
+
+    def save(self, *args, **kwargs):
+        self.simplify_boundary()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "boundary" in update_fields:
+            kwargs["update_fields"] = {*update_fields, *SIMPLIFIED_BOUNDARY_FIELDS}
+        super().save(*args, **kwargs)
+
+
+class Region(SimplifiedBoundaryModel, MPTTModel):
     name = models.TextField(_("name"))
     code = models.CharField(max_length=25, null=True, blank=True, default=None)
     boundary = models.MultiPolygonField(
@@ -18,12 +101,21 @@ class Region(MPTTModel):
         blank=True,
         default=None,
     )
+    # Lets every process notice boundary changes, see `BoundaryIndex`
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"], name="region_name_trgm", opclasses=["gin_trgm_ops"]
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
-class ProtectedArea(MPTTModel):
+class ProtectedArea(SimplifiedBoundaryModel, MPTTModel):
     name = models.TextField(_("name"))
     code = models.CharField(max_length=25, null=True, blank=True, default=None)
     boundary = models.MultiPolygonField(
@@ -38,6 +130,17 @@ class ProtectedArea(MPTTModel):
         blank=True,
         default=None,
     )
+    # Lets every process notice boundary changes, see `BoundaryIndex`
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"],
+                name="region_pa_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            )
+        ]
 
     def __str__(self):
         return self.name
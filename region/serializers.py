@@ -1,17 +1,51 @@
 from rest_framework import serializers
+from rest_framework_gis.fields import GeometrySerializerMethodField
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
-from .models import Region
+from .models import SIMPLIFIED_BOUNDARY_FIELDS, ProtectedArea, Region
 
 
 class RegionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Region
-        exclude = ("boundary",)
+        exclude = ("boundary", *SIMPLIFIED_BOUNDARY_FIELDS)
 
 
-class RegionGeoJsonSerializer(GeoFeatureModelSerializer):
+class SimplifiedBoundaryGeoJsonSerializer(GeoFeatureModelSerializer):
+    """
+    Serialize the boundary simplified for the `zoom` or `tolerance` given in
+    the serializer context or request query parameters.
+    """
+
+    boundary = GeometrySerializerMethodField()
+
+    def get_simplification(self):
+        params = {}
+        request = self.context.get("request")
+        for name, cast in (("zoom", int), ("tolerance", float)):
+            value = self.context.get(name)
+            if value is None and request is not None:
+                value = request.query_params.get(name)
+            if value is not None:
+                try:
+                    params[name] = cast(value)
+                except ValueError:
+                    raise serializers.ValidationError({name: "Invalid value."})
+        return params
+
+    def get_boundary(self, obj):
+        return obj.get_boundary(**self.get_simplification())
+
+
+class RegionGeoJsonSerializer(SimplifiedBoundaryGeoJsonSerializer):
     class Meta:
         model = Region
         geo_field = "boundary"
-        fields = "__all__"
+        exclude = SIMPLIFIED_BOUNDARY_FIELDS
+
+
+class ProtectedAreaGeoJsonSerializer(SimplifiedBoundaryGeoJsonSerializer):
+    class Meta:
+        model = ProtectedArea
+        geo_field = "boundary"
+        exclude = SIMPLIFIED_BOUNDARY_FIELDS
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from .models import ProtectedArea, Region
+from .spatial import protected_area_index, region_index
+from .tiles import expire_protected_area_tiles
+
+# Delay before rebuilding the tile pyramid, so a boundary import saving many
+# protected areas triggers a single rebuild
+TILE_PYRAMID_REBUILD_DELAY = 60
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def invalidate_region_index(sender, **kwargs):
+    region_index.invalidate()
+
+
+@receiver(post_save, sender=ProtectedArea)
+@receiver(post_delete, sender=ProtectedArea)
+def invalidate_protected_area_index(sender, **kwargs):
+    protected_area_index.invalidate()
+
+
+def rebuild_protected_area_tiles():
+    """
+    Stop serving the pre-rendered pyramid, its tiles are rendered live until
+    the celery task or the `render_protected_area_tiles` command rebuilds it.
+    """
+    from .tasks import render_protected_area_tile_pyramid
+
+    expire_protected_area_tiles()
+    if settings.ENABLE_CELERY and cache.add(
+        "protected-area-tile-pyramid-rebuild", True, TILE_PYRAMID_REBUILD_DELAY
+    ):
+        render_protected_area_tile_pyramid.apply_async(
+            countdown=TILE_PYRAMID_REBUILD_DELAY
+        )
+
+
+@receiver(post_save, sender=ProtectedArea)
+@receiver(post_delete, sender=ProtectedArea)
+def schedule_protected_area_tiles_rebuild(sender, **kwargs):
+    # Cheap once the pyramid is expired, so a transaction saving many
+    # protected areas only expires it and schedules the rebuild once
+    transaction.on_commit(rebuild_protected_area_tiles)
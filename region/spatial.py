@@ -0,0 +1,150 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from region.models import ProtectedArea, Region
+
+
+def _extents_intersect(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _union_extent(extents):
+    xmins, ymins, xmaxs, ymaxs = zip(*extents)
+    return min(xmins), min(ymins), max(xmaxs), max(ymaxs)
+
+
+class STRtree:
+    """
+    Read only R-tree bulk loaded with the Sort-Tile-Recursive algorithm.
+
+    Every node is a tuple of `(extent, item, children)` where only leaves carry
+    an item and only branches carry children.
+    """
+
+    def __init__(self, entries, node_capacity=10):
+        self.node_capacity = node_capacity
+        nodes = [(extent, item, None) for extent, item in entries]
+        while len(nodes) > node_capacity:
+            nodes = self._pack(nodes)
+        self.root = nodes
+
+    def _pack(self, nodes):
+        capacity = self.node_capacity
+        slice_count = math.ceil(math.sqrt(math.ceil(len(nodes) / capacity)))
+        slice_size = slice_count * capacity
+
+        def center(node, axis):
+            return node[0][axis] + node[0][axis + 2]
+
+        nodes = sorted(nodes, key=lambda node: center(node, 0))
+        parents = []
+        for i in range(0, len(nodes), slice_size):
+            vertical_slice = sorted(
+                nodes[i : i + slice_size], key=lambda node: center(node, 1)
+            )
+            for j in range(0, len(vertical_slice), capacity):
+                children = vertical_slice[j : j + capacity]
+                extent = _union_extent([child[0] for child in children])
+                parents.append((extent, None, children))
+        return parents
+
+    def query(self, extent):
+        """Return items whose extent intersects the given extent."""
+        items = []
+        stack = list(self.root)
+        while stack:
+            node_extent, item, children = stack.pop()
+            if not _extents_intersect(node_extent, extent):
+                continue
+            if children is None:
+                items.append(item)
+            else:
+                stack.extend(children)
+        return items
+
+
+class BoundaryIndex:
+    """
+    In memory index of the boundaries of an MPTT model for point in polygon
+    lookups. The row count and latest modification of the table form a token
+    which lets every process notice when another one has changed boundaries.
+    It's compared at most once per `BOUNDARY_INDEX_CHECK_INTERVAL`, changes
+    made in the process invalidate the index right away.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._tree = None
+        self._token = None
+        self._srid = None
+        self._checked_at = None
+
+    def _get_token(self):
+        return tuple(
+            self.model.objects.aggregate(
+                count=Count("id"), modified_at=Max("modified_at")
+            ).values()
+        )
+
+    def _build(self):
+        entries = []
+        srid = None
+        for obj in (
+            self.model.objects.exclude(boundary=None)
+            .only("id", "level", "boundary")
+            .iterator()
+        ):
+            srid = srid or obj.boundary.srid
+            entries.append(
+                (obj.boundary.extent, (obj.level, obj.id, obj.boundary.prepared))
+            )
+        return STRtree(entries), srid
+
+    def _get_tree(self):
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._tree is not None
+                and now - self._checked_at < settings.BOUNDARY_INDEX_CHECK_INTERVAL
+            ):
+                return self._tree, self._srid
+        # Read before building, so a change committed meanwhile is noticed by
+        # the next check instead of being hidden by the stored token
+        token = self._get_token()
+        with self._lock:
+            if self._tree is None or token != self._token:
+                self._tree, self._srid = self._build()
+                self._token = token
+            self._checked_at = now
+            return self._tree, self._srid
+
+    def invalidate(self):
+        with self._lock:
+            self._tree = None
+            self._token = None
+            self._checked_at = None
+
+    def find(self, geometry):
+        """Return id of the deepest node whose boundary contains the geometry."""
+        if not geometry:
+            return None
+        tree, srid = self._get_tree()
+        if srid and geometry.srid and geometry.srid != srid:
+            geometry = geometry.transform(srid, clone=True)
+        matches = [
+            (level, pk)
+            for level, pk, boundary in tree.query(geometry.extent)
+            if boundary.contains(geometry)
+        ]
+        if not matches:
+            return None
+        return max(matches)[1]
+
+
+region_index = BoundaryIndex(Region)
+protected_area_index = BoundaryIndex(ProtectedArea)
@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from lukimgather.celery import no_simultaneous_execution
+from region.tiles import render_protected_area_tiles
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_kwargs={"max_retries": 3},
+)
+@no_simultaneous_execution
+def render_protected_area_tile_pyramid(self):
+    render_protected_area_tiles()
@@ -0,0 +1,76 @@
+import uuid
+
+from django.conf import settings
+
+from lukimgather.tiles import get_geometries_tiles, get_tile_key, get_tile_storage
+from region.models import ProtectedArea
+
+LAYER_NAME = "protected-areas"
+# Storage keys holding the generation of the pre-rendered pyramid being
+# served and the one expired by a boundary change which still needs cleanup
+GENERATION_KEY = f"{LAYER_NAME}/generation"
+EXPIRED_GENERATION_KEY = f"{LAYER_NAME}/expired"
+
+
+def get_generation(storage, key=GENERATION_KEY):
+    entry = storage.get(key)
+    return entry[0].decode() if entry and entry[0] else None
+
+
+def get_pyramid_tile_key(generation, z, x, y):
+    return get_tile_key(f"{LAYER_NAME}/{generation}", z, x, y)
+
+
+def get_protected_area_tiles(min_zoom, max_zoom):
+    return sorted(
+        get_geometries_tiles(
+            ProtectedArea.objects.exclude(boundary=None).values_list(
+                "boundary", flat=True
+            ),
+            min_zoom,
+            max_zoom,
+        )
+    )
+
+
+def expire_protected_area_tiles():
+    """Stop serving the pre-rendered pyramid until it's rebuilt."""
+    storage = get_tile_storage()
+    generation = get_generation(storage)
+    if generation:
+        storage.set(EXPIRED_GENERATION_KEY, generation.encode(), expires=False)
+        storage.delete_many([GENERATION_KEY])
+
+
+def render_protected_area_tiles(min_zoom=None, max_zoom=None, progress=None):
+    """
+    Render every tile covering a protected area into a new generation of the
+    pyramid, switch the view over to it and delete the previous generation.
+    """
+    from region.views import ProtectedAreaTileView
+
+    if min_zoom is None:
+        min_zoom = settings.PROTECTED_AREA_TILE_MIN_ZOOM
+    if max_zoom is None:
+        max_zoom = settings.PROTECTED_AREA_TILE_MAX_ZOOM
+    storage = get_tile_storage()
+    view = ProtectedAreaTileView()
+    tiles = get_protected_area_tiles(min_zoom, max_zoom)
+    generation = uuid.uuid4().hex[:12]
+    for count, tile in enumerate(tiles, start=1):
+        storage.set(
+            get_pyramid_tile_key(generation, tile.z, tile.x, tile.y),
+            view.render_tile(tile.z, tile.x, tile.y),
+        )
+        if progress:
+            progress(count, len(tiles))
+    previous_generations = {
+        get_generation(storage),
+        get_generation(storage, EXPIRED_GENERATION_KEY),
+    } - {None}
+    storage.set(GENERATION_KEY, generation.encode(), expires=False)
+    storage.delete_many([EXPIRED_GENERATION_KEY])
+    # By prefix, as previous generations may hold tiles of removed boundaries
+    for previous_generation in previous_generations:
+        storage.delete_prefix(f"{LAYER_NAME}/{previous_generation}")
+    return len(tiles)
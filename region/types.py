@@ -1,13 +1,13 @@
 from graphene_django.types import DjangoObjectType
 from graphene_django_extras.paginations import LimitOffsetGraphqlPagination
 
-from .models import ProtectedArea, Region
+from .models import SIMPLIFIED_BOUNDARY_FIELDS, ProtectedArea, Region
 
 
 class RegionType(DjangoObjectType):
     class Meta:
         model = Region
-        exclude = ("boundary",)
+        exclude = ("boundary", *SIMPLIFIED_BOUNDARY_FIELDS)
         description = "Type definition for a region"
         pagination = LimitOffsetGraphqlPagination(default_limit=200, ordering="-name")
 
@@ -15,6 +15,6 @@ class RegionType(DjangoObjectType):
 class ProtectedAreaType(DjangoObjectType):
     class Meta:
         model = ProtectedArea
-        exclude = ("boundary",)
+        exclude = ("boundary", *SIMPLIFIED_BOUNDARY_FIELDS)
         description = "Type definition for a protected area"
         pagination = LimitOffsetGraphqlPagination(default_limit=200, ordering="-name")
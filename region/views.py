@@ -1,16 +1,42 @@
+from django.conf import settings
 from django.contrib.gis.db.models import GeometryField
 from django.db.models.functions import Coalesce
 from django.views.generic import ListView
+from vectortiles.postgis.functions import MakeEnvelope
 from vectortiles.postgis.views import MVTView
 
-from region.models import ProtectedArea
+from lukimgather.tiles import CachedTileMixin
+from region.models import ProtectedArea, get_simplified_boundary_expression
+from region.tiles import LAYER_NAME, get_generation, get_pyramid_tile_key
 
 
-class ProtectedAreaTileView(MVTView, ListView):
+class ProtectedAreaTileView(CachedTileMixin, MVTView, ListView):
     model = ProtectedArea
-    vector_tile_layer_name = "protected-areas"
+    vector_tile_layer_name = LAYER_NAME
     vector_tile_fields = (
         "id",
         "name",
     )
-    vector_tile_geom_name = "boundary"
+    vector_tile_geom_name = "geom"
+
+    def get_tile(self, x, y, z, *args, **kwargs):
+        # Simplified boundaries keep low zoom tiles small and cheap to build.
+        # Filtering on the boundary too lets its spatial index be used.
+        xmin, ymin, xmax, ymax = self.get_bounds(x, y, z)
+        self.vector_tile_queryset = ProtectedArea.objects.filter(
+            boundary__intersects=MakeEnvelope(xmin, ymin, xmax, ymax, 3857)
+        ).annotate(geom=get_simplified_boundary_expression(zoom=z))
+        return super().get_tile(x, y, z, *args, **kwargs)
+
+    def get_tile_cache_key(self, storage, z, x, y):
+        # Tiles of the pre-rendered pyramid, rendered live outside of it
+        if not (
+            settings.PROTECTED_AREA_TILE_MIN_ZOOM
+            <= z
+            <= settings.PROTECTED_AREA_TILE_MAX_ZOOM
+        ):
+            return None
+        generation = get_generation(storage)
+        if not generation:
+            return None
+        return get_pyramid_tile_key(generation, z, x, y)
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.23 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import lukimgather.db
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0008_contactus'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='resource',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='support_resource_title_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+    ]
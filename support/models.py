@@ -1,5 +1,6 @@
 from ckeditor.fields import RichTextField
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.template import Context, Template
 from django.utils.translation import gettext_lazy as _
@@ -7,7 +8,7 @@ from mptt.fields import TreeForeignKey
 from mptt.models import MPTTModel
 from ordered_model.models import OrderedModel
 
-from lukimgather.models import TimeStampedModel, UserStampedModel
+from lukimgather.models import DirtyFieldsMixin, TimeStampedModel, UserStampedModel
 
 
 class LegalDocumentTypeChoice(models.TextChoices):
@@ -17,7 +18,7 @@ class LegalDocumentTypeChoice(models.TextChoices):
     COOKIE_POLICY = "cookie-policy", _("Cookie Policy")
 
 
-class LegalDocument(UserStampedModel, TimeStampedModel):
+class LegalDocument(DirtyFieldsMixin, UserStampedModel, TimeStampedModel):
     document_type = models.CharField(
         _("document type"),
         max_length=20,
@@ -29,26 +30,6 @@ class LegalDocument(UserStampedModel, TimeStampedModel):
     def __str__(self):
         return self.document_type
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            cls = self.__class__
-            old = cls.objects.get(pk=self.pk)
-            changed_fields = []
-            for field in cls._meta.get_fields():
-                field_name = field.name
-                try:
-                    old_val = getattr(old, field_name)
-                    new_val = getattr(self, field_name)
-                    if hasattr(field, "is_custom_lower_field"):
-                        if field.is_custom_lower_field():
-                            new_val = new_val.lower()
-                    if old_val != new_val:
-                        changed_fields.append(field_name)
-                except Exception:
-                    pass
-            kwargs["update_fields"] = changed_fields
-        super().save(*args, **kwargs)
-
 
 class Feedback(UserStampedModel, TimeStampedModel):
     title = models.CharField(_("title"), max_length=255)
@@ -133,7 +114,13 @@ class Resource(UserStampedModel, TimeStampedModel, OrderedModel):
         return self.title
 
     class Meta(OrderedModel.Meta):
-        pass
+        indexes = [
+            GinIndex(
+                fields=["title"],
+                name="support_resource_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            )
+        ]
 
 
 class EmailTemplate(models.Model):
@@ -3,8 +3,10 @@ from django.contrib.admin.utils import NestedObjects, model_ngettext, quote
 from django.contrib.auth import get_permission_codename
 from django.core.exceptions import PermissionDenied
 from django.db import models, router
+from django.db.models import F
 from django.shortcuts import render
 from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.text import capfirst
 from django.utils.translation import gettext_lazy as _
@@ -13,7 +15,11 @@ from mptt.admin import DraggableMPTTAdmin
 from ordered_model.admin import OrderedModelAdmin
 
 from lukimgather.admin import UserStampedModelAdmin
+from survey.exports import export_happening_surveys
 from survey.models import Form, HappeningSurvey, ProtectedAreaCategory, Survey
+from survey.search import search_happening_surveys
+from survey.signals import invalidate_happening_survey_tiles
+from survey.statistics import track_statistics
 
 
 @admin.register(Form)
@@ -65,6 +71,9 @@ class HappeningSurveyAdmin(UserStampedModelAdmin):
     autocomplete_fields = ("attachment",)
     actions = [
         "approve_reject_happening_survey",
+        "export_geojson",
+        "export_csv",
+        "export_gpkg",
     ]
     list_display = (
         "title",
@@ -94,11 +103,14 @@ class HappeningSurveyAdmin(UserStampedModelAdmin):
         "title",
         "category__title",
         "description",
-        "location",
-        "boundary",
         "region__name",
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_happening_surveys(queryset, search_term), False
+
     @admin.action(
         permissions=["project_accept_reject"],
         description=_("Approve/Reject selected %(verbose_name_plural)s"),
@@ -168,10 +180,26 @@ class HappeningSurveyAdmin(UserStampedModelAdmin):
         if "_approved" in request.POST or "_rejected" in request.POST:
             if perms_needed:
                 return PermissionDenied
-            if request.POST.get("_approved"):
-                queryset.update(status="approved")
-            elif request.POST.get("_rejected"):
-                queryset.update(status="rejected")
+            geometries = [
+                geometry
+                for geometries in queryset.values_list("location", "boundary")
+                for geometry in geometries
+            ]
+            with track_statistics(queryset):
+                if request.POST.get("_approved"):
+                    queryset.update(
+                        status="approved",
+                        server_modified_at=timezone.now(),
+                        revision_number=F("revision_number") + 1,
+                    )
+                elif request.POST.get("_rejected"):
+                    queryset.update(
+                        status="rejected",
+                        server_modified_at=timezone.now(),
+                        revision_number=F("revision_number") + 1,
+                    )
+            # Outside of a transaction this runs at once, so only after the update
+            invalidate_happening_survey_tiles(geometries)
             n = queryset.count()
             if n:
                 modeladmin.message_user(
@@ -197,6 +225,20 @@ class HappeningSurveyAdmin(UserStampedModelAdmin):
                 },
             )
 
+    @admin.action(description=_("Export selected %(verbose_name_plural)s as GeoJSON"))
+    def export_geojson(modeladmin, request, queryset):
+        return export_happening_surveys(queryset, "geojson")
+
+    @admin.action(description=_("Export selected %(verbose_name_plural)s as CSV"))
+    def export_csv(modeladmin, request, queryset):
+        return export_happening_surveys(queryset, "csv")
+
+    @admin.action(
+        description=_("Export selected %(verbose_name_plural)s as GeoPackage")
+    )
+    def export_gpkg(modeladmin, request, queryset):
+        return export_happening_surveys(queryset, "gpkg")
+
     def has_project_accept_reject_permission(self, request):
         opts = self.opts
         codename = get_permission_codename("can_accept_reject_project", opts)
@@ -0,0 +1,116 @@
+import mercantile
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.db.models.functions import Centroid, Transform
+from django.db.models import Avg, Count, F, FloatField, Func, Q
+from django.db.models.functions import Coalesce, Floor
+
+from survey.models import Improvement, Status
+
+# Number of cluster cells along each side of a tile
+CLUSTER_CELLS_PER_TILE = 4
+
+
+class X(Func):
+    function = "ST_X"
+    output_field = FloatField()
+
+
+class Y(Func):
+    function = "ST_Y"
+    output_field = FloatField()
+
+
+def get_cell_size(zoom):
+    """Size of a cluster cell in web mercator meters, aligned to the tile grid."""
+    return mercantile.CE / 2**zoom / CLUSTER_CELLS_PER_TILE
+
+
+def get_breakdown_aggregates():
+    aggregates = {
+        f"status_{status}": Count("id", filter=Q(status=status))
+        for status in Status.values
+    }
+    aggregates.update(
+        {
+            f"improvement_{improvement}": Count("id", filter=Q(improvement=improvement))
+            for improvement in Improvement.values
+        }
+    )
+    return aggregates
+
+
+def annotate_cells(queryset, zoom):
+    cell_size = get_cell_size(zoom)
+    point = Coalesce(
+        "location", Centroid("boundary"), output_field=PointField(srid=4326)
+    )
+    return (
+        queryset.exclude(location=None, boundary=None)
+        .order_by()
+        .annotate(
+            longitude=X(point),
+            latitude=Y(point),
+            mercator_x=X(Transform(point, 3857)),
+            mercator_y=Y(Transform(point, 3857)),
+        )
+        .annotate(
+            cell_x=Floor(F("mercator_x") / cell_size),
+            cell_y=Floor(F("mercator_y") / cell_size),
+        )
+    )
+
+
+def get_cluster_queryset(queryset, zoom, bounds=None):
+    """
+    Aggregate surveys by grid cell, one row per non empty cell. Passing web
+    mercator bounds limits it to the cells inside them.
+    """
+    queryset = annotate_cells(queryset, zoom)
+    if bounds:
+        xmin, ymin, xmax, ymax = bounds
+        queryset = queryset.filter(
+            mercator_x__gte=xmin,
+            mercator_x__lt=xmax,
+            mercator_y__gte=ymin,
+            mercator_y__lt=ymax,
+        )
+    return queryset.values("cell_x", "cell_y").annotate(
+        count=Count("id"),
+        centroid_longitude=Avg("longitude"),
+        centroid_latitude=Avg("latitude"),
+        centroid_x=Avg("mercator_x"),
+        centroid_y=Avg("mercator_y"),
+        **get_breakdown_aggregates(),
+    )
+
+
+def cluster_happening_surveys(queryset, zoom):
+    clusters = {}
+    for row in get_cluster_queryset(queryset, zoom):
+        clusters[(row["cell_x"], row["cell_y"])] = {
+            "count": row["count"],
+            "longitude": row["centroid_longitude"],
+            "latitude": row["centroid_latitude"],
+            "status": [
+                {"value": status, "count": row[f"status_{status}"]}
+                for status in Status.values
+                if row[f"status_{status}"]
+            ],
+            "improvement": [
+                {"value": improvement, "count": row[f"improvement_{improvement}"]}
+                for improvement in Improvement.values
+                if row[f"improvement_{improvement}"]
+            ],
+            "category": [],
+        }
+    category_rows = (
+        annotate_cells(queryset, zoom)
+        .exclude(category=None)
+        .values("cell_x", "cell_y", "category_id")
+        .annotate(count=Count("id"))
+    )
+    for row in category_rows:
+        clusters[(row["cell_x"], row["cell_y"])]["category"].append(
+            {"value": str(row["category_id"]), "count": row["count"]}
+        )
+    return list(clusters.values())
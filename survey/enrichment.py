@@ -0,0 +1,21 @@
+from region.spatial import protected_area_index, region_index
+
+
+def get_survey_geometry(survey):
+    return survey.location if survey.location else survey.boundary
+
+
+def find_region_and_protected_area(geometry):
+    """
+    Return ids of the deepest region and protected area which contain the
+    geometry, looked up in the in memory boundary indexes.
+    """
+    if not geometry:
+        return None, None
+    return region_index.find(geometry), protected_area_index.find(geometry)
+
+
+def set_region_and_protected_area(survey):
+    survey.region_id, survey.protected_area_id = find_region_and_protected_area(
+        get_survey_geometry(survey)
+    )
@@ -0,0 +1,219 @@
+import csv
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+
+from django.contrib.gis.geos import GeometryCollection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse
+from django.utils import timezone
+
+# Exported columns, by lookup of the value on the happening survey
+EXPORT_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "sentiment": "sentiment",
+    "status": "status",
+    "improvement": "improvement",
+    "category": "category__title",
+    "project": "project__title",
+    "region": "region__name",
+    "protected_area": "protected_area__name",
+    "is_public": "is_public",
+    "is_test": "is_test",
+    "created_by": "created_by__username",
+    "created_at": "created_at",
+    "modified_at": "modified_at",
+}
+
+# Rows fetched from the server side cursor at a time
+CHUNK_SIZE = 2000
+
+# GeoPackage `application_id` ("GPKG") and `user_version` of version 1.2
+GPKG_APPLICATION_ID = 0x47504B47
+GPKG_USER_VERSION = 10200
+GPKG_TABLE = "happening_surveys"
+
+
+def get_geometry(row):
+    """Location and boundary of the survey, collected when it has both."""
+    geometries = [row[field] for field in ("location", "boundary") if row[field]]
+    if len(geometries) > 1:
+        return GeometryCollection(*geometries, srid=4326)
+    return geometries[0] if geometries else None
+
+
+def iterate_rows(queryset):
+    for row in (
+        queryset.order_by()
+        .values(*EXPORT_FIELDS.values(), "location", "boundary")
+        .iterator(chunk_size=CHUNK_SIZE)
+    ):
+        yield {
+            column: row[lookup] for column, lookup in EXPORT_FIELDS.items()
+        }, get_geometry(row)
+
+
+def write_geojson(queryset, path):
+    with open(path, "w") as file:
+        file.write('{"type": "FeatureCollection", "features": [')
+        separator = ""
+        for properties, geometry in iterate_rows(queryset):
+            file.write(
+                f'{separator}{{"type": "Feature", "id": "{properties["id"]}", '
+                f'"geometry": {geometry.json if geometry else "null"}, '
+                f'"properties": {json.dumps(properties, cls=DjangoJSONEncoder)}}}'
+            )
+            separator = ", "
+        file.write("]}")
+
+
+def write_csv(queryset, path):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([*EXPORT_FIELDS, "geometry"])
+        for properties, geometry in iterate_rows(queryset):
+            writer.writerow(
+                [
+                    *(
+                        value.isoformat() if hasattr(value, "isoformat") else value
+                        for value in properties.values()
+                    ),
+                    geometry.wkt if geometry else "",
+                ]
+            )
+
+
+def get_gpkg_geometry(geometry):
+    """Standard GeoPackage binary, little endian header without envelope."""
+    if not geometry:
+        return None
+    return b"GP" + bytes([0, 1]) + struct.pack("<i", 4326) + bytes(geometry.wkb)
+
+
+def write_gpkg(queryset, path):
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        f"""
+        PRAGMA application_id = {GPKG_APPLICATION_ID};
+        PRAGMA user_version = {GPKG_USER_VERSION};
+        CREATE TABLE gpkg_spatial_ref_sys (
+            srs_name TEXT NOT NULL,
+            srs_id INTEGER NOT NULL PRIMARY KEY,
+            organization TEXT NOT NULL,
+            organization_coordsys_id INTEGER NOT NULL,
+            definition TEXT NOT NULL,
+            description TEXT
+        );
+        CREATE TABLE gpkg_contents (
+            table_name TEXT NOT NULL PRIMARY KEY,
+            data_type TEXT NOT NULL,
+            identifier TEXT UNIQUE,
+            description TEXT DEFAULT '',
+            last_change DATETIME NOT NULL,
+            min_x DOUBLE,
+            min_y DOUBLE,
+            max_x DOUBLE,
+            max_y DOUBLE,
+            srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id)
+        );
+        CREATE TABLE gpkg_geometry_columns (
+            table_name TEXT NOT NULL REFERENCES gpkg_contents(table_name),
+            column_name TEXT NOT NULL,
+            geometry_type_name TEXT NOT NULL,
+            srs_id INTEGER NOT NULL REFERENCES gpkg_spatial_ref_sys(srs_id),
+            z TINYINT NOT NULL,
+            m TINYINT NOT NULL,
+            CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name)
+        );
+        CREATE TABLE {GPKG_TABLE} (
+            fid INTEGER PRIMARY KEY AUTOINCREMENT,
+            geom GEOMETRY,
+            {", ".join(f"{column} TEXT" for column in EXPORT_FIELDS)}
+        );
+        """
+    )
+    connection.executemany(
+        "INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", None),
+            ("Undefined geographic SRS", 0, "NONE", 0, "undefined", None),
+            (
+                "WGS 84 geodetic",
+                4326,
+                "EPSG",
+                4326,
+                'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,'
+                '298.257223563]],PRIMEM["Greenwich",0],UNIT["degree",'
+                "0.0174532925199433]]",
+                None,
+            ),
+        ],
+    )
+    connection.execute(
+        "INSERT INTO gpkg_contents (table_name, data_type, identifier, "
+        "last_change, srs_id) VALUES (?, 'features', ?, ?, 4326)",
+        (
+            GPKG_TABLE,
+            GPKG_TABLE,
+            timezone.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        ),
+    )
+    connection.execute(
+        "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'GEOMETRY', 4326, 0, 0)",
+        (GPKG_TABLE,),
+    )
+    insert = (
+        f"INSERT INTO {GPKG_TABLE} (geom, {', '.join(EXPORT_FIELDS)}) "
+        f"VALUES ({', '.join('?' * (len(EXPORT_FIELDS) + 1))})"
+    )
+    for properties, geometry in iterate_rows(queryset):
+        connection.execute(
+            insert,
+            (
+                get_gpkg_geometry(geometry),
+                *(
+                    None if value is None else str(value)
+                    for value in properties.values()
+                ),
+            ),
+        )
+    connection.commit()
+    connection.close()
+
+
+# Writer and content type by export format
+EXPORT_WRITERS = {
+    "geojson": (write_geojson, "application/geo+json"),
+    "csv": (write_csv, "text/csv"),
+    "gpkg": (write_gpkg, "application/geopackage+sqlite3"),
+}
+EXPORT_FORMATS = tuple(EXPORT_WRITERS)
+
+
+def export_happening_surveys(queryset, export_format):
+    """
+    Response with the happening surveys, fetched through a server side cursor
+    and written to a temporary file row by row. The file is streamed rather
+    than the rows, as the response is iterated on the event loop under ASGI
+    where the database can't be queried.
+    """
+    writer, content_type = EXPORT_WRITERS[export_format]
+    filename = f"happening-surveys-{timezone.now():%Y%m%d%H%M%S}.{export_format}"
+    with tempfile.NamedTemporaryFile(suffix=f".{export_format}", delete=False) as file:
+        path = file.name
+    try:
+        writer(queryset, path)
+        response = FileResponse(
+            open(path, "rb"),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+        )
+    finally:
+        # The open file is still streamed after it's unlinked
+        os.remove(path)
+    return response
@@ -1,10 +1,52 @@
+import math
+
 import django_filters
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, Point, Polygon
+from django.contrib.gis.measure import D
+from django.db.models import Q
+from graphql import GraphQLError
 from reversion.models import Version
 
+from region.models import Region
 from survey.models import HappeningSurvey, Survey
+from survey.search import search_happening_surveys
+
+# Mean earth radius in meters, used to convert distances to degrees
+EARTH_RADIUS = 6371008.8
+
+
+def parse_numbers(value, count, name):
+    try:
+        numbers = [float(number) for number in value.split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise GraphQLError(f"{name} must be {count} comma separated numbers.")
+    return numbers
+
+
+def geometry_filter(lookup, value):
+    """Match surveys whose location or boundary satisfies the spatial lookup."""
+    return Q(**{f"location__{lookup}": value}) | Q(**{f"boundary__{lookup}": value})
 
 
 class HappeningSurveyFilter(django_filters.FilterSet):
+    bbox = django_filters.CharFilter(
+        method="get_bbox", label="min longitude,min latitude,max longitude,max latitude"
+    )
+    within_distance_of = django_filters.CharFilter(
+        method="get_within_distance_of", label="longitude,latitude,meters"
+    )
+    intersects_geometry = django_filters.CharFilter(
+        method="get_intersects_geometry", label="GeoJSON or WKT geometry"
+    )
+    in_region_subtree = django_filters.NumberFilter(
+        method="get_in_region_subtree", label="Region id"
+    )
+    search = django_filters.CharFilter(
+        method="get_search", label="Search text, results are ordered by relevance"
+    )
+
     class Meta:
         model = HappeningSurvey
         fields = {
@@ -18,6 +60,59 @@ class HappeningSurveyFilter(django_filters.FilterSet):
             ],
         }
 
+    # Spatial filters are answered by the spatial indexes of location and
+    # boundary, so only matching surveys are read from the database
+
+    def get_bbox(self, queryset, name, value):
+        polygon = Polygon.from_bbox(parse_numbers(value, 4, "bbox"))
+        polygon.srid = 4326
+        return queryset.filter(geometry_filter("intersects", polygon))
+
+    def get_within_distance_of(self, queryset, name, value):
+        longitude, latitude, meters = parse_numbers(value, 3, "withinDistanceOf")
+        point = Point(longitude, latitude, srid=4326)
+        # Bounding box of the circle narrows the search down using the index
+        # before the exact spheroid distance is computed
+        latitude_delta = math.degrees(meters / EARTH_RADIUS)
+        longitude_delta = latitude_delta / max(
+            math.cos(math.radians(min(abs(latitude) + latitude_delta, 90))), 1e-6
+        )
+        envelope = Polygon.from_bbox(
+            (
+                longitude - longitude_delta,
+                latitude - latitude_delta,
+                longitude + longitude_delta,
+                latitude + latitude_delta,
+            )
+        )
+        envelope.srid = 4326
+        return queryset.filter(geometry_filter("bboverlaps", envelope)).filter(
+            geometry_filter("distance_lte", (point, D(m=meters)))
+        )
+
+    def get_intersects_geometry(self, queryset, name, value):
+        try:
+            geometry = GEOSGeometry(value)
+        except (GEOSException, ValueError):
+            raise GraphQLError("intersectsGeometry must be a GeoJSON or WKT geometry.")
+        if not geometry.srid:
+            geometry.srid = 4326
+        return queryset.filter(geometry_filter("intersects", geometry))
+
+    def get_in_region_subtree(self, queryset, name, value):
+        region = Region.objects.filter(id=value).first()
+        if not region:
+            return queryset.none()
+        # Nested set bounds select the whole subtree without recursive joins
+        return queryset.filter(
+            region__tree_id=region.tree_id,
+            region__lft__gte=region.lft,
+            region__rght__lte=region.rght,
+        )
+
+    def get_search(self, queryset, name, value):
+        return search_happening_surveys(queryset, value)
+
 
 class HappeningSurveyHistoryFilter(django_filters.FilterSet):
     class Meta:
@@ -0,0 +1,98 @@
+import math
+
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.cache import cache
+
+from lukimgather.revisions import get_versions_data
+from survey.filters import EARTH_RADIUS
+from survey.models import HappeningSurvey
+
+# Fields maintained by the server which aren't part of a reviewed change
+IGNORED_DIFF_FIELDS = {"server_modified_at", "search_vector"}
+
+# World cylindrical equal area projection, to measure areas in square meters
+EQUAL_AREA_SRID = 6933
+
+
+def get_geometry(value):
+    if not value:
+        return None
+    geometry = GEOSGeometry(value)
+    if not geometry.srid:
+        geometry.srid = 4326
+    return geometry
+
+
+def get_distance(old_geometry, new_geometry):
+    """Great circle distance between the centroids, in meters."""
+    old_centroid = old_geometry.centroid.transform(4326, clone=True)
+    new_centroid = new_geometry.centroid.transform(4326, clone=True)
+    old_latitude, new_latitude = math.radians(old_centroid.y), math.radians(
+        new_centroid.y
+    )
+    haversine = (
+        math.sin((new_latitude - old_latitude) / 2) ** 2
+        + math.cos(old_latitude)
+        * math.cos(new_latitude)
+        * math.sin(math.radians(new_centroid.x - old_centroid.x) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(haversine))
+
+
+def get_area(geometry):
+    if not geometry:
+        return 0
+    return geometry.transform(EQUAL_AREA_SRID, clone=True).area
+
+
+def get_geometry_change(field, old_value, new_value):
+    old_geometry, new_geometry = get_geometry(old_value), get_geometry(new_value)
+    return {
+        "field": field,
+        "added": old_geometry is None,
+        "removed": new_geometry is None,
+        "distance": get_distance(old_geometry, new_geometry)
+        if old_geometry and new_geometry
+        else None,
+        "area_delta": get_area(new_geometry) - get_area(old_geometry),
+    }
+
+
+def compute_version_diff(from_version, to_version):
+    versions_data = get_versions_data([from_version, to_version])
+    old_fields = versions_data[from_version.pk][0]["fields"]
+    new_fields = versions_data[to_version.pk][0]["fields"]
+    geometry_fields = {
+        field.name
+        for field in HappeningSurvey._meta.get_fields()
+        if isinstance(field, GeometryField)
+    }
+    changes = []
+    for field in sorted((old_fields.keys() | new_fields.keys()) - IGNORED_DIFF_FIELDS):
+        old_value, new_value = old_fields.get(field), new_fields.get(field)
+        if isinstance(old_value, list) and isinstance(new_value, list):
+            # Order of many to many values carries no meaning
+            old_value, new_value = sorted(old_value), sorted(new_value)
+        if old_value == new_value:
+            continue
+        if field in geometry_fields:
+            changes.append(get_geometry_change(field, old_value, new_value))
+        else:
+            changes.append(
+                {"field": field, "old_value": old_value, "new_value": new_value}
+            )
+    return changes
+
+
+def get_version_diff(from_version, to_version):
+    """
+    Fields changed between two versions of a happening survey. Versions never
+    change, so the diff is cached without expiry.
+    """
+    key = f"happening_survey_version_diff:{from_version.pk}:{to_version.pk}"
+    changes = cache.get(key)
+    if changes is None:
+        changes = compute_version_diff(from_version, to_version)
+        cache.set(key, changes, None)
+    return changes
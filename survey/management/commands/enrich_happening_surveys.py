@@ -0,0 +1,116 @@
+from django.contrib.gis.db.models import GeometryField
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from region.models import ProtectedArea, Region
+from survey.models import HappeningSurvey
+from survey.search import update_search_vectors
+from survey.statistics import track_statistics
+
+
+def deepest_containing(model):
+    geometry = Coalesce(
+        OuterRef("location"),
+        OuterRef("boundary"),
+        output_field=GeometryField(srid=4326),
+    )
+    return Subquery(
+        model.objects.filter(boundary__contains=geometry)
+        .order_by("-level", "-id")
+        .values("id")[:1]
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute region and protected area of happening surveys"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the changes without saving them",
+        )
+        parser.add_argument(
+            "--region",
+            type=int,
+            help="Only process surveys in the subtree of this region",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def get_queryset(self, region_id):
+        queryset = HappeningSurvey.objects.annotate(
+            geometry=Coalesce(
+                "location", "boundary", output_field=GeometryField(srid=4326)
+            )
+        ).exclude(geometry=None)
+        if region_id is None:
+            return queryset
+        root = Region.objects.filter(id=region_id).first()
+        if not root:
+            raise CommandError(f"Region {region_id} doesn't exist")
+        subtree = root.get_descendants(include_self=True)
+        subtree_filter = Q(region__in=subtree)
+        if root.boundary:
+            subtree_filter |= Q(geometry__intersects=root.boundary)
+        return queryset.filter(subtree_filter)
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        chunk_size = options["chunk_size"]
+        queryset = self.get_queryset(options["region"])
+        total = queryset.count()
+        processed = changed = 0
+        last_id = None
+        while True:
+            chunk = queryset.order_by("id")
+            if last_id is not None:
+                chunk = chunk.filter(id__gt=last_id)
+            rows = list(
+                chunk.annotate(
+                    new_region=deepest_containing(Region),
+                    new_protected_area=deepest_containing(ProtectedArea),
+                ).values_list(
+                    "id",
+                    "region_id",
+                    "new_region",
+                    "protected_area_id",
+                    "new_protected_area",
+                )[
+                    :chunk_size
+                ]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            processed += len(rows)
+            changed_ids = []
+            for id, region, new_region, protected_area, new_protected_area in rows:
+                if region == new_region and protected_area == new_protected_area:
+                    continue
+                changed_ids.append(id)
+                if dry_run:
+                    self.stdout.write(
+                        f"{id}: region {region} -> {new_region}, "
+                        f"protected area {protected_area} -> {new_protected_area}"
+                    )
+            if changed_ids and not dry_run:
+                # Queryset update doesn't fire signals or create revisions
+                changed_surveys = HappeningSurvey.objects.filter(id__in=changed_ids)
+                with track_statistics(changed_surveys):
+                    changed_surveys.update(
+                        region=deepest_containing(Region),
+                        protected_area=deepest_containing(ProtectedArea),
+                        server_modified_at=Now(),
+                    )
+                update_search_vectors(changed_surveys)
+            changed += len(changed_ids)
+            self.stdout.write(
+                f"Processed {processed}/{total} surveys, {changed} changed"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would update' if dry_run else 'Updated'} {changed} of "
+                f"{processed} surveys"
+            )
+        )
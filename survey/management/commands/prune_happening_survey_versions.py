@@ -0,0 +1,59 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from reversion.models import Version
+
+from lukimgather.revisions import prune_versions
+from survey.models import HappeningSurvey
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete happening survey versions except the first one, the last ones "
+        "and the latest one of each day before them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-last",
+            type=int,
+            default=10,
+            help="Number of latest versions of each survey which are all kept",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the versions to delete without deleting them",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        keep_last = options["keep_last"]
+        dry_run = options["dry_run"]
+        chunk_size = options["chunk_size"]
+        versions = Version.objects.get_for_model(HappeningSurvey)
+        object_ids = sorted(
+            set(versions.values_list("object_id", flat=True).order_by())
+        )
+        deleted = 0
+        for start in range(0, len(object_ids), chunk_size):
+            chunk = (
+                versions.filter(object_id__in=object_ids[start : start + chunk_size])
+                .select_related("revision")
+                .order_by("object_id", "pk")
+            )
+            for object_id, object_versions in groupby(
+                chunk, key=lambda version: version.object_id
+            ):
+                deleted += len(
+                    prune_versions(list(object_versions), keep_last, dry_run=dry_run)
+                )
+            self.stdout.write(
+                f"Processed {min(start + chunk_size, len(object_ids))}/"
+                f"{len(object_ids)} surveys"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would delete' if dry_run else 'Deleted'} {deleted} versions"
+            )
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from survey.statistics import get_rollup_counts, rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuild happening survey statistics from the surveys"
+
+    def handle(self, *args, **options):
+        rebuild_statistics()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(get_rollup_counts())} happening survey statistics"
+            )
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.23 on 2026-10-18 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_modified_at(apps, schema_editor):
+    HappeningSurvey = apps.get_model("survey", "HappeningSurvey")
+    HappeningSurvey.objects.update(server_modified_at=models.F("modified_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('survey', '0020_survey_answer_sorted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='happeningsurvey',
+            name='server_modified_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Server modified at'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_modified_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='HappeningSurveyTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('happening_survey_id', models.UUIDField(db_index=True, verbose_name='Happening survey id')),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('private', 'Made private')], max_length=7, verbose_name='Reason')),
+                ('owner', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Happening survey tombstone',
+                'verbose_name_plural': 'Happening survey tombstones',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='happeningsurveytombstone',
+            index=models.Index(fields=['created_at'], name='survey_tombstone_created_idx'),
+        ),
+    ]
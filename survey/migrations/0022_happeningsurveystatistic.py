@@ -0,0 +1,33 @@
+# Generated by Django 3.2.23 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('region', '0004_simplified_boundaries'),
+        ('survey', '0021_happeningsurvey_server_modified_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HappeningSurveyStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Key')),
+                ('status', models.CharField(choices=[('approved', 'Approved'), ('rejected', 'Rejected'), ('pending', 'Pending')], max_length=11, verbose_name='Status')),
+                ('improvement', models.CharField(blank=True, choices=[('increasing', 'Increasing'), ('same', 'Same'), ('decreasing', 'Decreasing')], max_length=11, null=True, verbose_name='Improvement')),
+                ('month', models.DateField(db_index=True, verbose_name='Month')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('category', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='survey.protectedareacategory')),
+                ('protected_area', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='region.protectedarea')),
+                ('region', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='region.region')),
+            ],
+            options={
+                'verbose_name': 'Happening survey statistic',
+                'verbose_name_plural': 'Happening survey statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.23 on 2026-10-18 12:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+import lukimgather.db
+
+
+def populate_search_vectors(apps, schema_editor):
+    # Same vector as survey.search builds at the time of this migration
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    HappeningSurvey = apps.get_model('survey', 'HappeningSurvey')
+    ProtectedAreaCategory = apps.get_model('survey', 'ProtectedAreaCategory')
+    Region = apps.get_model('region', 'Region')
+    category_title = Subquery(
+        ProtectedAreaCategory.objects.filter(pk=OuterRef('category_id')).values('title')[:1]
+    )
+    region_name = Subquery(Region.objects.filter(pk=OuterRef('region_id')).values('name')[:1])
+    vectors = [
+        SearchVector(*expressions, config=config, weight=weight)
+        for config in ('english', 'simple')
+        for weight, expressions in (
+            ('A', ('title',)),
+            ('B', (category_title, region_name)),
+            ('C', ('description',)),
+            ('D', ('sentiment',)),
+        )
+    ]
+    search_vector = vectors[0]
+    for vector in vectors[1:]:
+        search_vector = search_vector + vector
+    HappeningSurvey.objects.using(schema_editor.connection.alias).update(search_vector=search_vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0022_happeningsurveystatistic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='happeningsurvey',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='happeningsurvey',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='survey_search_vector_gin'),
+            ),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
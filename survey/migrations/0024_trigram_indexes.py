@@ -0,0 +1,30 @@
+# Generated by Django 3.2.23 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import lukimgather.db
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0023_happeningsurvey_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='protectedareacategory',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='survey_category_title_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='happeningsurvey',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='survey_title_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.23 on 2026-10-18 14:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+
+def set_revision_numbers(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    HappeningSurvey = apps.get_model('survey', 'HappeningSurvey')
+    Version = apps.get_model('reversion', 'Version')
+    content_type = ContentType.objects.filter(app_label='survey', model='happeningsurvey').first()
+    if content_type is None:
+        return
+    # Revisions after the initial version, as counted by the update mutation
+    version_count = (
+        Version.objects.filter(
+            content_type=content_type,
+            object_id=Cast(OuterRef('id'), models.CharField()),
+        )
+        .order_by()
+        .values('object_id')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    HappeningSurvey.objects.update(
+        revision_number=Greatest(Coalesce(Subquery(version_count), Value(0)) - 1, Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('reversion', '0001_squashed_0004_auto_20160611_1202'),
+        ('survey', '0024_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='happeningsurvey',
+            name='revision_number',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Revision number'),
+        ),
+        migrations.RunPython(set_revision_numbers, migrations.RunPython.noop),
+    ]
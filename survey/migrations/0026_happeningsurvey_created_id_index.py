@@ -0,0 +1,17 @@
+# Generated by Django 3.2.23 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0025_happeningsurvey_revision_number'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='happeningsurvey',
+            index=models.Index(fields=['created_at', 'id'], name='survey_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.23 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('survey', '0026_happeningsurvey_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='happeningsurveytombstone',
+            name='is_public',
+            field=models.BooleanField(default=False, verbose_name='Is public'),
+        ),
+    ]
@@ -2,14 +2,24 @@ import uuid
 
 import reversion
 from ckeditor_uploader.fields import RichTextUploadingField
+from django.conf import settings
 from django.contrib.gis.db.models import MultiPolygonField, PointField
-from django.core.exceptions import ObjectDoesNotExist
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
 from ordered_model.models import OrderedModel
 
-from lukimgather.models import CodeModel, TimeStampedModel, UserStampedModel
+from lukimgather.models import (
+    CodeModel,
+    DirtyFieldsMixin,
+    TimeStampedModel,
+    UserStampedModel,
+)
+from lukimgather.revisions import register_compact_fields
+from survey.enrichment import set_region_and_protected_area
 
 
 class Form(CodeModel, UserStampedModel, TimeStampedModel, OrderedModel):
@@ -59,6 +69,13 @@ class ProtectedAreaCategory(MPTTModel, TimeStampedModel, UserStampedModel, CodeM
         order_insertion_by = ["title"]
 
     class Meta:
+        indexes = [
+            GinIndex(
+                fields=["title"],
+                name="survey_category_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            )
+        ]
         verbose_name = _("Protected area category")
         verbose_name_plural = _("Protected area categories")
 
@@ -75,8 +92,17 @@ class Improvement(models.TextChoices):
     DECREASING = "decreasing", _("Decreasing")
 
 
+class HappeningSurveyQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        if user.is_staff:
+            return self.all()
+        if user.is_authenticated:
+            return self.exclude(~Q(created_by=user), is_public=False)
+        return self.filter(is_public=True)
+
+
 @reversion.register
-class HappeningSurvey(TimeStampedModel, UserStampedModel):
+class HappeningSurvey(DirtyFieldsMixin, TimeStampedModel, UserStampedModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     category = models.ForeignKey(
         "ProtectedAreaCategory",
@@ -139,32 +165,142 @@ class HappeningSurvey(TimeStampedModel, UserStampedModel):
     is_public = models.BooleanField(default=True)
     is_test = models.BooleanField(default=False)
     data_dump = models.JSONField(blank=True, default=dict)
+    # Unlike modified_at this is never supplied by offline clients, so it can be
+    # used as delta sync watermark
+    server_modified_at = models.DateTimeField(
+        _("Server modified at"), auto_now=True, db_index=True
+    )
+    # Maintained by survey.search, weighted title, category and region names,
+    # description and sentiment
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Concurrency counter checked by the update and edit mutations, incremented
+    # by every change made through them or the admin actions. Only updates
+    # record a version, so the `v<n>` comments of versions can skip numbers.
+    revision_number = models.PositiveIntegerField(
+        _("Revision number"), default=0, editable=False
+    )
+
+    objects = HappeningSurveyQuerySet.as_manager()
 
     def __str__(self):
         return str(self.title)
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            cls = self.__class__
-            try:
-                old = cls.objects.get(pk=self.pk)
-            except ObjectDoesNotExist:
-                old = None
-            changed_fields = []
-            for field in cls._meta.get_fields():
-                field_name = field.name
-                try:
-                    old_val = getattr(old, field_name)
-                    new_val = getattr(self, field_name)
-                    if old_val != new_val:
-                        changed_fields.append(field_name)
-                except Exception:
-                    pass
-            if changed_fields:
-                kwargs["update_fields"] = changed_fields
+        # Enrich before writing so a new or moved survey is stored once
+        update_fields = kwargs.get("update_fields")
+        if self._state.adding:
+            set_region_and_protected_area(self)
+        elif {"location", "boundary"} & set(
+            self.get_dirty_fields() if update_fields is None else update_fields
+        ):
+            set_region_and_protected_area(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "region", "protected_area"}
         super().save(*args, **kwargs)
 
+    def get_dirty_fields(self):
+        dirty_fields = super().get_dirty_fields()
+        if dirty_fields and "server_modified_at" not in dirty_fields:
+            dirty_fields.append("server_modified_at")
+        return dirty_fields
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Seeked by the keyset pagination of `happeningSurveysCursor`
+            models.Index(fields=["created_at", "id"], name="survey_created_id_idx"),
+            GinIndex(fields=["search_vector"], name="survey_search_vector_gin"),
+            GinIndex(
+                fields=["title"], name="survey_title_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ]
         verbose_name = _("Happening survey")
         verbose_name_plural = _("Happening surveys")
+
+
+register_compact_fields(HappeningSurvey, ("boundary", "data_dump"))
+
+
+class TombstoneReason(models.TextChoices):
+    DELETED = "deleted", _("Deleted")
+    PRIVATE = "private", _("Made private")
+
+
+class HappeningSurveyTombstone(TimeStampedModel):
+    happening_survey_id = models.UUIDField(_("Happening survey id"), db_index=True)
+    reason = models.CharField(
+        _("Reason"), max_length=7, choices=TombstoneReason.choices
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        default=None,
+    )
+    # Whether the survey was public when deleted, only then others are told
+    is_public = models.BooleanField(_("Is public"), default=False)
+
+    def __str__(self):
+        return f"{self.happening_survey_id} ({self.reason})"
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], name="survey_tombstone_created_idx")
+        ]
+        verbose_name = _("Happening survey tombstone")
+        verbose_name_plural = _("Happening survey tombstones")
+
+
+class HappeningSurveyStatistic(models.Model):
+    """
+    Number of happening surveys per combination of dimensions, maintained
+    incrementally as surveys are written. See `survey.statistics`.
+    """
+
+    # Dimensions joined in a single column, since nullable columns can't be
+    # used to look up a row with a unique constraint
+    key = models.CharField(_("Key"), max_length=255, unique=True)
+    category = models.ForeignKey(
+        "ProtectedAreaCategory",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    status = models.CharField(_("Status"), max_length=11, choices=Status.choices)
+    improvement = models.CharField(
+        _("Improvement"),
+        max_length=11,
+        null=True,
+        blank=True,
+        choices=Improvement.choices,
+    )
+    region = models.ForeignKey(
+        "region.Region",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    protected_area = models.ForeignKey(
+        "region.ProtectedArea",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    month = models.DateField(_("Month"), db_index=True)
+    count = models.IntegerField(_("Count"), default=0)
+
+    def __str__(self):
+        return f"{self.key} ({self.count})"
+
+    class Meta:
+        verbose_name = _("Happening survey statistic")
+        verbose_name_plural = _("Happening survey statistics")
@@ -1,25 +1,45 @@
 import os
+import uuid
+from collections import Counter
 from enum import Enum
 
 import graphene
 import graphql_geojson
 import reversion
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import DatabaseError, transaction
+from django.db.models import F
 from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from graphene.types.generic import GenericScalar
 from graphene_django.rest_framework.mutation import ErrorType, SerializerMutation
 from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
-from reversion.models import Version
 
+from gallery.blobs import attached_blobs
+from gallery.images import schedule_image_processing
 from gallery.models import Gallery
+from gallery.uploads import delete_uploads_on_commit, open_upload
+from lukimgather.revisions import bulk_create_revision
 from lukimgather.scalars import UploadAudio, UploadImage
 from lukimgather.utils import is_valid_uuid
+from project.models import Project
 from survey.decorators import can_edit_happening_survey, can_edit_survey
-from survey.models import HappeningSurvey, Survey
+from survey.enrichment import set_region_and_protected_area
+from survey.models import HappeningSurvey, ProtectedAreaCategory, Survey
+from survey.search import update_search_vectors
 from survey.serializers import SurveySerializer
-from survey.types import HappeningSurveyType, SurveyType
+from survey.signals import (
+    invalidate_happening_survey_tiles,
+    send_category_activity_email,
+)
+from survey.statistics import (
+    apply_statistic_deltas,
+    get_dimensions,
+    get_survey_values,
+    record_survey_change,
+)
+from survey.types import HappeningSurveyBatchResultType, HappeningSurveyType, SurveyType
 
 
 class WritableSurveyMutation(SerializerMutation):
@@ -81,6 +101,15 @@ class HappeningSurveyInput(graphene.InputObjectType):
     sentiment = graphene.String(description="Sentiment", required=False)
     attachment = graphene.List(UploadImage, required=False)
     audio_file = UploadAudio(required=False)
+    audio_file_upload = graphene.UUID(
+        description="Token of a completed resumable upload used as audio file.",
+        required=False,
+    )
+    attachment_upload = graphene.List(
+        graphene.UUID,
+        description="Tokens of completed resumable uploads added as attachments.",
+        required=False,
+    )
     location = graphql_geojson.Geometry(required=False)
     boundary = graphql_geojson.Geometry(required=False)
     improvement = Improvement(required=False)
@@ -90,6 +119,29 @@ class HappeningSurveyInput(graphene.InputObjectType):
     created_at = graphene.DateTime(required=False)
 
 
+def _resolve_uploads(data, user):
+    """
+    Replace tokens of resumable uploads in the input with their files, which are
+    then stored like files sent inline. Return the opened upload files.
+    """
+    audio_file_upload = data.pop("audio_file_upload", None)
+    attachment_upload = data.pop("attachment_upload", None) or []
+    files = []
+    if audio_file_upload:
+        data["audio_file"] = UploadAudio.validate_audio(
+            open_upload(audio_file_upload, user)
+        )
+        files.append(data["audio_file"])
+    attachments = [
+        UploadImage.validate_image(open_upload(token, user))
+        for token in attachment_upload
+    ]
+    if attachments:
+        data["attachment"] = [*(data.get("attachment") or []), *attachments]
+        files += attachments
+    return files
+
+
 class CreateHappeningSurvey(graphene.Mutation):
     class Arguments:
         anonymous = graphene.Boolean(default_value=False, required=True)
@@ -104,59 +156,252 @@ class CreateHappeningSurvey(graphene.Mutation):
 
     @login_required
     def mutate(self, info, anonymous, data):
+        upload_files = _resolve_uploads(data, info.context.user)
         try:
             with transaction.atomic(), reversion.create_revision():
-                id = data.get("id", None)
-                if id:
-                    survey_obj = HappeningSurvey.objects.create(
-                        id=id,
-                        category_id=data.get("category_id"),
-                        project_id=data.get("project_id"),
-                    )
-                else:
-                    survey_obj = HappeningSurvey.objects.create(
-                        category_id=data.get("category_id"),
-                        project_id=data.get("project_id"),
-                    )
-                survey_obj.title = data.get("title")
-                survey_obj.description = data.get("description")
-                survey_obj.sentiment = data.get("sentiment")
-                survey_obj.improvement = (
-                    None if not data.get("improvement") else data.improvement.value
+                # Built in full so the survey is inserted once, enriched on save
+                survey_obj = _build_happening_survey(
+                    data,
+                    data.get("id") or uuid.uuid4(),
+                    None if anonymous else info.context.user,
                 )
-                survey_obj.location = data.get("location")
-                survey_obj.boundary = data.get("boundary")
-                survey_obj.is_public = data.get("is_public", True)
-                survey_obj.is_test = data.get("is_test", False)
-                survey_obj.audio_file = data.get("audio_file", None)
-                survey_obj.created_by = None if anonymous else info.context.user
-                if "created_at" in data:
-                    survey_obj.created_at = data.get("created_at")
-                if data.get("attachment"):
-                    for file in data.attachment:
-                        name, _extension = os.path.splitext(file.name)
-                        if is_valid_uuid(name):
-                            gallery = Gallery(
-                                id=name,
-                                media=file,
-                                title=file.name,
-                                type="image",
-                            )
-                        else:
-                            gallery = Gallery(
-                                media=file,
-                                title=file.name,
-                                type="image",
-                            )
+                survey_obj.save()
+                if data.get("created_at"):
+                    _set_client_created_at(survey_obj, data.get("created_at"))
+                galleries = _build_galleries(data.get("attachment"))
+                with attached_blobs(galleries):
+                    for gallery in galleries:
                         gallery.save()
                         survey_obj.attachment.add(gallery)
-                survey_obj.save()
                 reversion.set_comment("Initial version.")
+                delete_uploads_on_commit(upload_files)
         except Exception:
             raise GraphQLError("Failed to create happening survey")
         return CreateHappeningSurvey(result=survey_obj, ok=True, errors=None)
 
 
+def _build_happening_survey(data, survey_id, user):
+    survey_obj = HappeningSurvey(
+        id=survey_id,
+        category_id=data.get("category_id"),
+        project_id=data.get("project_id"),
+        title=data.get("title"),
+        description=data.get("description"),
+        sentiment=data.get("sentiment"),
+        improvement=None if not data.get("improvement") else data.improvement.value,
+        location=data.get("location"),
+        boundary=data.get("boundary"),
+        is_public=data.get("is_public", True),
+        is_test=data.get("is_test", False),
+        audio_file=data.get("audio_file", None),
+        created_by=user,
+    )
+    return survey_obj
+
+
+def _set_client_created_at(survey_obj, created_at):
+    """
+    Store the creation time supplied by an offline device, which `auto_now_add`
+    overrides on insert, without sending the save signals again.
+    """
+    previous_values = get_survey_values(survey_obj)
+    survey_obj.created_at = created_at
+    HappeningSurvey.objects.filter(pk=survey_obj.pk).update(created_at=created_at)
+    survey_obj._snapshot_fields(["created_at"])
+    record_survey_change(previous_values, get_survey_values(survey_obj))
+    # The version serialized on save still holds the insert time
+    reversion.add_to_revision(survey_obj)
+
+
+def _build_galleries(files):
+    galleries = []
+    for file in files or []:
+        name, _extension = os.path.splitext(file.name)
+        gallery = Gallery(media=file, title=file.name, type="image")
+        if is_valid_uuid(name):
+            gallery.id = uuid.UUID(name)
+        galleries.append(gallery)
+    return galleries
+
+
+def _bulk_insert_happening_surveys(entries):
+    """
+    Insert surveys, their galleries, attachment links and initial revision with
+    one query per table instead of one save per object.
+    """
+    surveys = [entry["survey"] for entry in entries]
+    HappeningSurvey.objects.bulk_create(surveys)
+    # `auto_now_add` overrides the value supplied by the device on insert
+    client_created = [entry for entry in entries if entry["created_at"]]
+    for entry in client_created:
+        entry["survey"].created_at = entry["created_at"]
+    HappeningSurvey.objects.bulk_update(
+        [entry["survey"] for entry in client_created], ["created_at"]
+    )
+    stored_gallery_ids = set(
+        Gallery.objects.filter(
+            id__in=[gallery.id for entry in entries for gallery in entry["galleries"]]
+        ).values_list("id", flat=True)
+    )
+    new_galleries = {}
+    for entry in entries:
+        for gallery in entry["galleries"]:
+            if gallery.id not in stored_gallery_ids:
+                new_galleries.setdefault(gallery.id, gallery)
+    # Stored in the transaction, so a failed insert deletes the new files
+    with attached_blobs(new_galleries.values()):
+        Gallery.objects.bulk_create(new_galleries.values())
+        schedule_image_processing(new_galleries.values())
+        through_model = HappeningSurvey.attachment.through
+        through_model.objects.bulk_create(
+            [
+                through_model(
+                    happeningsurvey_id=entry["survey"].id, gallery_id=gallery_id
+                )
+                for entry in entries
+                for gallery_id in dict.fromkeys(
+                    gallery.id for gallery in entry["galleries"]
+                )
+            ]
+        )
+        bulk_create_revision(surveys, comment="Initial version.")
+        update_search_vectors(
+            HappeningSurvey.objects.filter(id__in=[survey.id for survey in surveys])
+        )
+        apply_statistic_deltas(
+            Counter(get_dimensions(get_survey_values(survey)) for survey in surveys)
+        )
+
+
+class CreateHappeningSurveysBatch(graphene.Mutation):
+    class Arguments:
+        anonymous = graphene.Boolean(default_value=False, required=True)
+        data = graphene.List(
+            graphene.NonNull(HappeningSurveyInput),
+            description="Happening surveys queued on the device.",
+            required=True,
+        )
+
+    results = graphene.List(HappeningSurveyBatchResultType)
+    ok = graphene.Boolean()
+
+    @login_required
+    def mutate(self, info, anonymous, data):
+        user = info.context.user
+        survey_ids = [item.get("id") or uuid.uuid4() for item in data]
+        stored_ids = set(
+            HappeningSurvey.objects.filter(id__in=survey_ids).values_list(
+                "id", flat=True
+            )
+        )
+        visible_surveys = HappeningSurvey.objects.visible_to(user).in_bulk(stored_ids)
+        category_ids = set(
+            ProtectedAreaCategory.objects.filter(
+                id__in=[item.get("category_id") for item in data]
+            ).values_list("id", flat=True)
+        )
+        project_ids = set(
+            Project.objects.filter(
+                id__in=[
+                    item.get("project_id") for item in data if item.get("project_id")
+                ]
+            ).values_list("id", flat=True)
+        )
+
+        results = []
+        entries = []
+        # Result of the first item by id, shared by its repeats in the batch
+        first_results = {}
+        duplicates = []
+        for item, survey_id in zip(data, survey_ids):
+            result = HappeningSurveyBatchResultType(id=survey_id, created=False)
+            results.append(result)
+            if survey_id in stored_ids:
+                result.ok = True
+                result.result = visible_surveys.get(survey_id)
+                continue
+            if survey_id in first_results:
+                duplicates.append((result, first_results[survey_id]))
+                continue
+            first_results[survey_id] = result
+            errors = {}
+            try:
+                upload_files = _resolve_uploads(item, user)
+            except GraphQLError as e:
+                errors["__all__"] = [e.message]
+                upload_files = []
+            survey_obj = _build_happening_survey(
+                item, survey_id, None if anonymous else user
+            )
+            if item.get("category_id") not in category_ids:
+                errors["category_id"] = ["Category doesn't exist."]
+            if item.get("project_id") and item.get("project_id") not in project_ids:
+                errors["project_id"] = ["Project doesn't exist."]
+            try:
+                survey_obj.full_clean(
+                    exclude=["id", "category", "project"], validate_unique=False
+                )
+            except ValidationError as e:
+                errors.update(e.message_dict)
+            if errors:
+                result.ok = False
+                result.errors = errors
+                continue
+            set_region_and_protected_area(survey_obj)
+            entries.append(
+                {
+                    "result": result,
+                    "survey": survey_obj,
+                    "galleries": _build_galleries(item.get("attachment")),
+                    "created_at": item.get("created_at"),
+                    "upload_files": upload_files,
+                }
+            )
+
+        created_entries = []
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    _bulk_insert_happening_surveys(entries)
+                created_entries = entries
+            except DatabaseError:
+                # Retry one by one so a single bad item doesn't fail the batch
+                for entry in entries:
+                    try:
+                        with transaction.atomic():
+                            _bulk_insert_happening_surveys([entry])
+                        created_entries.append(entry)
+                    except DatabaseError as e:
+                        entry["result"].ok = False
+                        entry["result"].errors = {"__all__": [str(e)]}
+            created_surveys = [entry["survey"] for entry in created_entries]
+            delete_uploads_on_commit(
+                [file for entry in created_entries for file in entry["upload_files"]]
+            )
+            transaction.on_commit(
+                lambda: [send_category_activity_email(obj) for obj in created_surveys]
+            )
+            invalidate_happening_survey_tiles(
+                geometry
+                for obj in created_surveys
+                for geometry in (obj.location, obj.boundary)
+            )
+        for entry in created_entries:
+            entry["result"].ok = True
+            entry["result"].created = True
+            entry["result"].result = entry["survey"]
+        for result, first_result in duplicates:
+            result.ok = first_result.ok
+            result.errors = first_result.errors
+            result.result = first_result.result
+        HappeningSurveyType.prime_loaders(
+            info, [result.result for result in results if result.result]
+        )
+        return CreateHappeningSurveysBatch(
+            results=results, ok=all(result.ok for result in results)
+        )
+
+
 class DeleteHappeningSurvey(graphene.Mutation):
     ok = graphene.Boolean()
     errors = GenericScalar()
@@ -184,6 +429,15 @@ class UpdateHappeningSurveyInput(graphene.InputObjectType):
     attachment = graphene.List(UploadImage, required=False)
     attachment_link = graphene.List(graphene.UUID, required=False)
     audio_file = UploadAudio(required=False)
+    audio_file_upload = graphene.UUID(
+        description="Token of a completed resumable upload used as audio file.",
+        required=False,
+    )
+    attachment_upload = graphene.List(
+        graphene.UUID,
+        description="Tokens of completed resumable uploads added as attachments.",
+        required=False,
+    )
     location = graphql_geojson.Geometry(required=False)
     boundary = graphql_geojson.Geometry(required=False)
     status = Status()
@@ -192,6 +446,31 @@ class UpdateHappeningSurveyInput(graphene.InputObjectType):
     is_test = graphene.Boolean(default=False, required=False)
     is_offline = graphene.Boolean(default=False, required=False)
     modified_at = graphene.DateTime(required=False)
+    revision_number = graphene.Int(
+        description="Revision number the changes are based on. The changes are "
+        "rejected when the survey has been revised since.",
+        required=False,
+    )
+
+
+def _check_revision_number(happening_survey_obj, revision_number):
+    if revision_number is None:
+        return
+    current_revision_number = (
+        HappeningSurvey.objects.select_for_update()
+        .filter(pk=happening_survey_obj.pk)
+        .values_list("revision_number", flat=True)
+        .first()
+    )
+    if current_revision_number != revision_number:
+        raise ValidationError(
+            {
+                "revision_number": _(
+                    "Happening survey has been revised since revision %(number)s."
+                )
+                % {"number": revision_number}
+            }
+        )
 
 
 class UpdateHappeningSurvey(graphene.Mutation):
@@ -212,8 +491,10 @@ class UpdateHappeningSurvey(graphene.Mutation):
         if not happening_survey_obj:
             raise GraphQLError("Happening survey doesn't exist")
 
+        upload_files = _resolve_uploads(data, info.context.user)
         attachment_links = data.pop("attachment_link", None)
         attachments = data.pop("attachment", [])
+        revision_number = data.pop("revision_number", None)
         for key, value in data.items():
             if isinstance(value, Enum):
                 value = value.value
@@ -221,6 +502,7 @@ class UpdateHappeningSurvey(graphene.Mutation):
 
         try:
             with transaction.atomic(), reversion.create_revision():
+                _check_revision_number(happening_survey_obj, revision_number)
                 happening_survey_obj.full_clean()
                 happening_survey_obj.updated_by = info.context.user
                 happening_survey_obj.modified_at = data.get(
@@ -238,11 +520,12 @@ class UpdateHappeningSurvey(graphene.Mutation):
                             id=name if is_valid_uuid(name) else None,
                         )
                         happening_survey_obj.attachment.add(new_attachment)
+                # Incremented by the database so concurrent updates can't share it
+                happening_survey_obj.revision_number = F("revision_number") + 1
                 happening_survey_obj.save()
-                version_no = Version.objects.get_for_object(
-                    happening_survey_obj
-                ).count()
-                reversion.set_comment(f"v{version_no}")
+                happening_survey_obj.refresh_from_db(fields=["revision_number"])
+                reversion.set_comment(f"v{happening_survey_obj.revision_number}")
+                delete_uploads_on_commit(upload_files)
         except ValidationError as e:
             return UpdateHappeningSurvey(result=None, errors=e, ok=False)
         except Exception:
@@ -265,8 +548,10 @@ class EditHappeningSurvey(graphene.Mutation):
     @can_edit_happening_survey
     def mutate(self, info, id, data=None):
         happening_survey_obj = HappeningSurvey.objects.filter(id=id).first()
+        upload_files = _resolve_uploads(data, info.context.user)
         attachment_links = data.pop("attachment_link", None)
         attachments = data.pop("attachment", [])
+        revision_number = data.pop("revision_number", None)
 
         for key, value in data.items():
             if isinstance(value, Enum):
@@ -275,6 +560,7 @@ class EditHappeningSurvey(graphene.Mutation):
 
         try:
             with transaction.atomic():
+                _check_revision_number(happening_survey_obj, revision_number)
                 happening_survey_obj.full_clean()
                 if attachment_links is not None:
                     happening_survey_obj.attachment.set(attachment_links)
@@ -283,7 +569,10 @@ class EditHappeningSurvey(graphene.Mutation):
                     happening_survey_obj.modified_at = data.get(
                         "modified_at", timezone.now()
                     )
+                # Incremented by the database so concurrent edits can't share it
+                happening_survey_obj.revision_number = F("revision_number") + 1
                 happening_survey_obj.save()
+                happening_survey_obj.refresh_from_db(fields=["revision_number"])
                 if attachments:
                     for attachment in attachments:
                         name, _extension = os.path.splitext(attachment.name)
@@ -294,6 +583,7 @@ class EditHappeningSurvey(graphene.Mutation):
                             id=name if is_valid_uuid(name) else None,
                         )
                         happening_survey_obj.attachment.add(new_attachment)
+                delete_uploads_on_commit(upload_files)
         except ValidationError as e:
             return EditHappeningSurvey(result=None, errors=e, ok=False)
         except Exception:
@@ -1,15 +1,32 @@
 import graphene
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import DateField, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth, TruncYear
+from django.utils import timezone
+from graphene_django.filter.utils import get_filtering_args_from_filterset
 from graphene_django_extras import DjangoFilterPaginateListField
+from graphql import GraphQLError
+from graphql_jwt.decorators import staff_member_required
+from reversion.models import Version
 
+from lukimgather.dataloaders import DataLoaderFilterPaginateListField
+from lukimgather.paginations import DjangoFilterKeysetListField, KeysetGraphqlPagination
+from survey.clusters import cluster_happening_surveys
 from survey.filters import (
     HappeningSurveyFilter,
     HappeningSurveyHistoryFilter,
     SurveyFilter,
 )
-from survey.models import HappeningSurvey
+from survey.history import get_version_diff
+from survey.models import (
+    HappeningSurvey,
+    HappeningSurveyStatistic,
+    HappeningSurveyTombstone,
+    TombstoneReason,
+)
 from survey.mutations import (
     CreateHappeningSurvey,
+    CreateHappeningSurveysBatch,
     DeleteHappeningSurvey,
     EditHappeningSurvey,
     UpdateHappeningSurvey,
@@ -18,24 +35,65 @@ from survey.mutations import (
 )
 from survey.types import (
     FormType,
+    HappeningSurveyClusterType,
+    HappeningSurveyDeltaType,
+    HappeningSurveyFieldChangeType,
     HappeningSurveyHistoryType,
     HappeningSurveyType,
     ProtectedAreaCategoryType,
+    SurveyStatisticDimension,
+    SurveyStatisticFilterInput,
+    SurveyStatisticPeriod,
+    SurveyStatisticType,
     SurveyType,
 )
 
+DELTA_SYNC_PAGINATION = KeysetGraphqlPagination(ordering=("server_modified_at", "id"))
+
 
 class SurveyQueries(graphene.ObjectType):
-    happening_surveys = DjangoFilterPaginateListField(
+    happening_surveys = DataLoaderFilterPaginateListField(
         HappeningSurveyType,
         description="Return the happening survey",
         filterset_class=HappeningSurveyFilter,
     )
-    happening_surveys_history = DjangoFilterPaginateListField(
+    happening_surveys_cursor = DjangoFilterKeysetListField(
+        HappeningSurveyType,
+        description="Return the happening survey paginated by cursor",
+        filterset_class=HappeningSurveyFilter,
+    )
+    happening_surveys_changed_since = graphene.Field(
+        HappeningSurveyDeltaType,
+        description="Return the happening surveys changed since the watermark",
+        since=graphene.DateTime(description="Watermark of the previous sync"),
+        cursor=graphene.String(description="nextCursor of the previous page"),
+        limit=graphene.Int(default_value=DELTA_SYNC_PAGINATION.default_limit),
+    )
+    happening_survey_clusters = graphene.List(
+        HappeningSurveyClusterType,
+        description="Return the happening surveys aggregated in grid cells",
+        zoom=graphene.Int(required=True),
+        **get_filtering_args_from_filterset(HappeningSurveyFilter, HappeningSurveyType),
+    )
+    survey_statistics = graphene.List(
+        SurveyStatisticType,
+        description="Return the number of happening surveys grouped by dimensions, for staff",
+        group_by=graphene.List(graphene.NonNull(SurveyStatisticDimension)),
+        filters=SurveyStatisticFilterInput(),
+        period=SurveyStatisticPeriod(default_value=SurveyStatisticPeriod.MONTH.value),
+    )
+    happening_surveys_history = DataLoaderFilterPaginateListField(
         HappeningSurveyHistoryType,
         description="Return the happening survey history",
         filterset_class=HappeningSurveyHistoryFilter,
     )
+    happening_survey_version_diff = graphene.List(
+        graphene.NonNull(HappeningSurveyFieldChangeType),
+        description="Return the fields changed between two versions of a happening survey",
+        object_id=graphene.ID(required=True),
+        from_version=graphene.ID(required=True),
+        to_version=graphene.ID(required=True),
+    )
     protected_area_categories = DjangoFilterPaginateListField(
         ProtectedAreaCategoryType, description="Return all protected area category"
     )
@@ -50,17 +108,126 @@ class SurveyQueries(graphene.ObjectType):
 
     @staticmethod
     def resolve_happening_surveys(root, info, **kwargs):
-        if info.context.user.is_staff:
-            return HappeningSurvey.objects.all()
-        if info.context.user.is_authenticated:
-            return HappeningSurvey.objects.exclude(
-                ~Q(created_by=info.context.user), is_public=False
+        return HappeningSurvey.objects.visible_to(info.context.user)
+
+    resolve_happening_surveys_cursor = resolve_happening_surveys
+
+    @staticmethod
+    def resolve_happening_survey_clusters(root, info, zoom, **kwargs):
+        queryset = HappeningSurveyFilter(
+            data=kwargs,
+            queryset=HappeningSurvey.objects.visible_to(info.context.user),
+            request=info.context,
+        ).qs
+        return [
+            HappeningSurveyClusterType(**cluster)
+            for cluster in cluster_happening_surveys(queryset, max(0, min(zoom, 22)))
+        ]
+
+    @staticmethod
+    @staff_member_required
+    def resolve_survey_statistics(root, info, group_by=None, filters=None, period=None):
+        is_yearly = getattr(period, "value", period) == SurveyStatisticPeriod.YEAR.value
+        queryset = HappeningSurveyStatistic.objects.annotate(
+            period=(TruncYear if is_yearly else TruncMonth)(
+                "month", output_field=DateField()
             )
-        return HappeningSurvey.objects.filter(is_public=True)
+        )
+        filters = filters or {}
+        for name in (
+            "category_id",
+            "status",
+            "improvement",
+            "region_id",
+            "protected_area_id",
+        ):
+            if filters.get(name) is not None:
+                queryset = queryset.filter(**{name: filters[name]})
+        if filters.get("period_from"):
+            queryset = queryset.filter(month__gte=filters["period_from"])
+        if filters.get("period_to"):
+            period_to = filters["period_to"]
+            if is_yearly:
+                period_to = period_to.replace(month=12, day=31)
+            queryset = queryset.filter(month__lte=period_to)
+        group_by = [
+            getattr(dimension, "value", dimension) for dimension in group_by or []
+        ]
+        if not group_by:
+            return [queryset.aggregate(count=Coalesce(Sum("count"), 0))]
+        return (
+            queryset.values(*group_by)
+            .annotate(count=Sum("count"))
+            .filter(count__gt=0)
+            .order_by(*group_by)
+        )
+
+    @staticmethod
+    def resolve_happening_survey_version_diff(
+        root, info, object_id, from_version, to_version
+    ):
+        user = info.context.user
+        # Staff may also compare versions of deleted surveys
+        if (
+            not user.is_staff
+            and not HappeningSurvey.objects.visible_to(user)
+            .filter(pk=object_id)
+            .exists()
+        ):
+            raise GraphQLError("Version not found for the happening survey.")
+        versions = Version.objects.get_for_model(HappeningSurvey).filter(
+            object_id=object_id
+        )
+        versions = {
+            str(version.id): version
+            for version in versions.filter(id__in=[from_version, to_version])
+        }
+        if str(from_version) not in versions or str(to_version) not in versions:
+            raise GraphQLError("Version not found for the happening survey.")
+        return get_version_diff(versions[str(from_version)], versions[str(to_version)])
+
+    @staticmethod
+    def resolve_happening_surveys_changed_since(
+        root, info, since=None, cursor=None, limit=None
+    ):
+        user = info.context.user
+        watermark = timezone.now() - settings.HAPPENING_SURVEY_SYNC_LAG
+        queryset = HappeningSurvey.objects.visible_to(user)
+        if since:
+            queryset = queryset.filter(server_modified_at__gt=since)
+        results, next_cursor = DELTA_SYNC_PAGINATION.paginate_queryset(
+            queryset, limit=limit, after=cursor
+        )
+        HappeningSurveyType.prime_loaders(info, results)
+        tombstones = []
+        if since and not next_cursor:
+            tombstones = HappeningSurveyTombstone.objects.filter(created_at__gt=since)
+            # Only surveys the user could see before are reported. Private
+            # surveys stay visible to staff and to their owner.
+            if user.is_staff:
+                tombstones = tombstones.filter(reason=TombstoneReason.DELETED)
+            elif user.is_authenticated:
+                tombstones = tombstones.filter(
+                    (Q(reason=TombstoneReason.PRIVATE) & ~Q(owner=user))
+                    | Q(reason=TombstoneReason.DELETED, is_public=True)
+                    | Q(reason=TombstoneReason.DELETED, owner=user)
+                )
+            else:
+                tombstones = tombstones.filter(
+                    Q(reason=TombstoneReason.PRIVATE)
+                    | Q(reason=TombstoneReason.DELETED, is_public=True)
+                )
+        return HappeningSurveyDeltaType(
+            results=results,
+            tombstones=tombstones,
+            next_cursor=next_cursor,
+            watermark=watermark,
+        )
 
 
 class SurveyMutations(graphene.ObjectType):
     create_happening_survey = CreateHappeningSurvey.Field()
+    create_happening_surveys_batch = CreateHappeningSurveysBatch.Field()
     delete_happening_survey = DeleteHappeningSurvey.Field()
     edit_happening_survey = EditHappeningSurvey.Field()
     update_happening_survey = UpdateHappeningSurvey.Field()
@@ -0,0 +1,70 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import OuterRef, Q, Subquery
+
+from lukimgather.db import is_postgresql
+from region.models import Region
+from survey.models import ProtectedAreaCategory
+
+# English content is stemmed. Tok Pisin and Hiri Motu have no PostgreSQL
+# dictionary, so their words are also indexed unstemmed with simple config.
+SEARCH_CONFIGS = ("english", "simple")
+
+# Survey fields whose change needs the search vector to be rebuilt
+SEARCH_FIELDS = {"title", "description", "sentiment", "category", "region"}
+
+
+def get_search_vector():
+    category_title = Subquery(
+        ProtectedAreaCategory.objects.filter(pk=OuterRef("category_id")).values(
+            "title"
+        )[:1]
+    )
+    region_name = Subquery(
+        Region.objects.filter(pk=OuterRef("region_id")).values("name")[:1]
+    )
+    vectors = [
+        SearchVector(*expressions, config=config, weight=weight)
+        for config in SEARCH_CONFIGS
+        for weight, expressions in (
+            ("A", ("title",)),
+            ("B", (category_title, region_name)),
+            ("C", ("description",)),
+            ("D", ("sentiment",)),
+        )
+    ]
+    search_vector = vectors[0]
+    for vector in vectors[1:]:
+        search_vector = search_vector + vector
+    return search_vector
+
+
+def update_search_vectors(queryset):
+    """Rebuild the stored search vector of the surveys with a single update."""
+    if is_postgresql(queryset.db):
+        queryset.update(search_vector=get_search_vector())
+
+
+def get_search_query(value):
+    search_query = None
+    for config in SEARCH_CONFIGS:
+        query = SearchQuery(value, config=config, search_type="websearch")
+        search_query = query if search_query is None else search_query | query
+    return search_query
+
+
+def search_happening_surveys(queryset, value):
+    """Filter surveys matching the search text, most relevant first."""
+    if not is_postgresql(queryset.db):
+        return queryset.filter(
+            Q(title__icontains=value)
+            | Q(description__icontains=value)
+            | Q(sentiment__icontains=value)
+            | Q(category__title__icontains=value)
+            | Q(region__name__icontains=value)
+        )
+    search_query = get_search_query(value)
+    return (
+        queryset.filter(search_vector=search_query)
+        .annotate(search_rank=SearchRank("search_vector", search_query))
+        .order_by("-search_rank", "-created_at")
+    )
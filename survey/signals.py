@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch.dispatcher import receiver
 
 from notification.models import CategoryActivityTrigger, ContactEmail
@@ -7,7 +8,32 @@ from region.models import ProtectedArea, Region
 from support.models import EmailTemplate
 from user.tasks import send_email_address_mail
 
-from .models import HappeningSurvey
+from .models import (
+    HappeningSurvey,
+    HappeningSurveyTombstone,
+    ProtectedAreaCategory,
+    TombstoneReason,
+)
+from .search import SEARCH_FIELDS, update_search_vectors
+from .statistics import DIMENSIONS as STATISTIC_DIMENSIONS
+from .statistics import (
+    clear_statistic_dimension,
+    get_survey_values,
+    record_survey_change,
+)
+
+# Fields rendered into the happening survey vector tiles
+TILE_FIELDS = {
+    "location",
+    "boundary",
+    "category",
+    "title",
+    "description",
+    "sentiment",
+    "status",
+    "improvement",
+    "is_public",
+}
 
 
 @receiver(post_save, sender=HappeningSurvey)
@@ -41,52 +67,190 @@ def send_survey_approval_notification(sender, instance, created, **kwargs):
                 message=f'Admin has {instance.status} the project "{instance.title}".'
             )
             return
-    if created or (
-        update_fields
-        and any(field in update_fields for field in ["boundary", "location"])
-    ):
-        region_geo = instance.location if instance.location else instance.boundary
-        survey_region = (
-            Region.objects.filter(boundary__bbcontains=region_geo).first()
-            if region_geo
-            else None
-        )
-        protected_area = (
-            ProtectedArea.objects.filter(boundary__bbcontains=region_geo).first()
-            if region_geo
-            else None
-        )
-        instance.region = survey_region
-        instance.protected_area = protected_area
-        instance.save()
+
+
+def send_category_activity_email(instance):
+    if not instance.category:
+        return
+    trigger = CategoryActivityTrigger.objects.filter(category=instance.category).first()
+    if not trigger:
+        return
+    contact_list = ContactEmail.objects.filter(category_activity_trigger=trigger)
+    if not contact_list:
+        return
+    (subject, html_message, text_message,) = EmailTemplate.objects.get(
+        identifier="category_email_trigger"
+    ).get_email_contents(
+        {
+            "category_trigger_object": f"https://{'' if settings.SERVER_ENVIRONMENT == 'production' else 'staging.'}lukimgather.org/surveys/{instance.id}"
+        }
+    )
+    for contact in contact_list:
+        if settings.ENABLE_CELERY:
+            send_email_address_mail.delay(
+                contact.email,
+                f"{subject} in {instance.category}: {instance.title}",
+                text_message,
+                from_email=settings.SERVER_EMAIL,
+                html_message=html_message,
+            )
 
 
 @receiver(post_save, sender=HappeningSurvey)
 def trigger_happening_survey_activity(sender, instance, created, **kwargs):
     if created:
-        if not instance.category:
-            return
-        trigger = CategoryActivityTrigger.objects.filter(
-            category=instance.category
-        ).first()
-        if not trigger:
-            return
-        contact_list = ContactEmail.objects.filter(category_activity_trigger=trigger)
-        if not contact_list:
-            return
-        (subject, html_message, text_message,) = EmailTemplate.objects.get(
-            identifier="category_email_trigger"
-        ).get_email_contents(
-            {
-                "category_trigger_object": f"https://{'' if settings.SERVER_ENVIRONMENT == 'production' else 'staging.'}lukimgather.org/surveys/{instance.id}"
-            }
+        send_category_activity_email(instance)
+
+
+@receiver(post_save, sender=HappeningSurvey)
+def record_happening_survey_visibility_tombstone(sender, instance, created, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if created or not update_fields or "is_public" not in update_fields:
+        return
+    if instance.is_public:
+        HappeningSurveyTombstone.objects.filter(
+            happening_survey_id=instance.id, reason=TombstoneReason.PRIVATE
+        ).delete()
+    else:
+        HappeningSurveyTombstone.objects.create(
+            happening_survey_id=instance.id,
+            reason=TombstoneReason.PRIVATE,
+            owner_id=instance.created_by_id,
         )
-        for contact in contact_list:
-            if settings.ENABLE_CELERY:
-                send_email_address_mail.delay(
-                    contact.email,
-                    f"{subject} in {instance.category}: {instance.title}",
-                    text_message,
-                    from_email=settings.SERVER_EMAIL,
-                    html_message=html_message,
-                )
+
+
+@receiver(post_delete, sender=HappeningSurvey)
+def record_happening_survey_delete_tombstone(sender, instance, **kwargs):
+    HappeningSurveyTombstone.objects.create(
+        happening_survey_id=instance.id,
+        reason=TombstoneReason.DELETED,
+        owner_id=instance.created_by_id,
+        is_public=instance.is_public,
+    )
+
+
+def invalidate_happening_survey_tiles(geometries):
+    """Drop cached tiles covering the geometries once the transaction commits."""
+    from .tasks import (
+        invalidate_happening_survey_tile_cache,
+        invalidate_happening_survey_tiles_task,
+    )
+
+    geometries = [geometry for geometry in geometries if geometry]
+    if not geometries:
+        return
+
+    def invalidate():
+        if settings.ENABLE_CELERY:
+            invalidate_happening_survey_tiles_task.delay(
+                [geometry.hexewkb.decode() for geometry in geometries]
+            )
+        else:
+            invalidate_happening_survey_tile_cache(geometries)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(pre_save, sender=HappeningSurvey)
+def remember_happening_survey_tile_geometries(sender, instance, **kwargs):
+    # Tiles covering the previous geometry need to be dropped as well
+    loaded_values = getattr(instance, "_loaded_values", {})
+    instance._previous_tile_geometries = [
+        loaded_values.get("location"),
+        loaded_values.get("boundary"),
+    ]
+
+
+@receiver(post_save, sender=HappeningSurvey)
+def invalidate_happening_survey_tiles_on_save(sender, instance, created, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if not created and update_fields is not None and not TILE_FIELDS & update_fields:
+        return
+    invalidate_happening_survey_tiles(
+        [
+            instance.location,
+            instance.boundary,
+            *getattr(instance, "_previous_tile_geometries", []),
+        ]
+    )
+
+
+@receiver(post_delete, sender=HappeningSurvey)
+def invalidate_happening_survey_tiles_on_delete(sender, instance, **kwargs):
+    invalidate_happening_survey_tiles([instance.location, instance.boundary])
+
+
+@receiver(pre_save, sender=HappeningSurvey)
+def remember_happening_survey_statistic_values(sender, instance, **kwargs):
+    instance._previous_statistic_values = None
+    if instance._state.adding:
+        return
+    loaded_values = getattr(instance, "_loaded_values", {})
+    attnames = (*STATISTIC_DIMENSIONS, "created_at", "is_test")
+    if all(attname in loaded_values for attname in attnames):
+        # Copied, the snapshot is refreshed before post_save is sent
+        instance._previous_statistic_values = dict(loaded_values)
+    else:
+        instance._previous_statistic_values = (
+            HappeningSurvey.objects.filter(pk=instance.pk).values(*attnames).first()
+        )
+
+
+@receiver(post_save, sender=HappeningSurvey)
+def update_happening_survey_statistics_on_save(sender, instance, created, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {
+        "category",
+        "status",
+        "improvement",
+        "region",
+        "protected_area",
+        "created_at",
+        "is_test",
+    } & set(update_fields):
+        return
+    record_survey_change(
+        None if created else instance._previous_statistic_values,
+        get_survey_values(instance),
+    )
+
+
+@receiver(post_delete, sender=HappeningSurvey)
+def update_happening_survey_statistics_on_delete(sender, instance, **kwargs):
+    record_survey_change(get_survey_values(instance), None)
+
+
+@receiver(pre_delete, sender=ProtectedAreaCategory)
+@receiver(pre_delete, sender=Region)
+@receiver(pre_delete, sender=ProtectedArea)
+def clear_happening_survey_statistic_dimension(sender, instance, **kwargs):
+    dimension = {
+        ProtectedAreaCategory: "category_id",
+        Region: "region_id",
+        ProtectedArea: "protected_area_id",
+    }[sender]
+    clear_statistic_dimension(dimension, instance.pk)
+
+
+@receiver(post_save, sender=HappeningSurvey)
+def update_happening_survey_search_vector(sender, instance, created, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    update_search_vectors(HappeningSurvey.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=ProtectedAreaCategory)
+def update_category_happening_survey_search_vectors(
+    sender, instance, created, **kwargs
+):
+    if not created:
+        update_search_vectors(HappeningSurvey.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Region)
+def update_region_happening_survey_search_vectors(sender, instance, created, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if created or (update_fields is not None and "name" not in update_fields):
+        return
+    update_search_vectors(HappeningSurvey.objects.filter(region=instance))
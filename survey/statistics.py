@@ -0,0 +1,155 @@
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from survey.models import HappeningSurvey, HappeningSurveyStatistic
+
+# Survey attributes the statistics are grouped by, in key order
+DIMENSIONS = ("category_id", "status", "improvement", "region_id", "protected_area_id")
+
+
+def get_month(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def get_dimensions(values):
+    """Dimensions of a survey from a dict of its field values by attname."""
+    return (
+        *(values.get(dimension) for dimension in DIMENSIONS),
+        get_month(values["created_at"]),
+    )
+
+
+def get_survey_values(survey):
+    return {
+        attname: getattr(survey, attname)
+        for attname in (*DIMENSIONS, "created_at", "is_test")
+    }
+
+
+def get_key(dimensions):
+    return ":".join("" if value is None else str(value) for value in dimensions)
+
+
+def get_statistic_counts(queryset):
+    """Live aggregate of the surveys, as counts by dimensions."""
+    rows = (
+        queryset.filter(is_test=False)
+        .order_by()
+        .annotate(statistic_month=TruncMonth("created_at", output_field=DateField()))
+        .values(*DIMENSIONS, "statistic_month")
+        .annotate(count=Count("id"))
+    )
+    return Counter(
+        {
+            (
+                *(row[dimension] for dimension in DIMENSIONS),
+                row["statistic_month"],
+            ): row["count"]
+            for row in rows
+        }
+    )
+
+
+def get_rollup_counts():
+    """Counts stored in the statistics table, comparable to `get_statistic_counts`."""
+    return Counter(
+        {
+            (
+                *(getattr(statistic, dimension) for dimension in DIMENSIONS),
+                statistic.month,
+            ): statistic.count
+            for statistic in HappeningSurveyStatistic.objects.filter(count__gt=0)
+        }
+    )
+
+
+def apply_statistic_deltas(deltas):
+    for dimensions, delta in deltas.items():
+        if not delta:
+            continue
+        key = get_key(dimensions)
+        statistics = HappeningSurveyStatistic.objects.filter(key=key)
+        if statistics.update(count=F("count") + delta) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                HappeningSurveyStatistic.objects.create(
+                    key=key,
+                    count=delta,
+                    month=dimensions[-1],
+                    **{
+                        dimension: value
+                        for dimension, value in zip(DIMENSIONS, dimensions)
+                    },
+                )
+        except IntegrityError:
+            # Created concurrently by another transaction
+            statistics.update(count=F("count") + delta)
+
+
+def record_survey_change(old_values, new_values):
+    # Test surveys aren't counted
+    deltas = Counter()
+    if old_values is not None and not old_values.get("is_test"):
+        deltas[get_dimensions(old_values)] -= 1
+    if new_values is not None and not new_values.get("is_test"):
+        deltas[get_dimensions(new_values)] += 1
+    apply_statistic_deltas(deltas)
+
+
+def clear_statistic_dimension(dimension, value):
+    """
+    Move the counts of surveys referencing a category, region or protected
+    area about to be deleted to an empty dimension, as the database sets the
+    reference to null without saving the surveys.
+    """
+    index = DIMENSIONS.index(dimension)
+    deltas = Counter()
+    for dimensions, count in get_statistic_counts(
+        HappeningSurvey.objects.filter(**{dimension: value})
+    ).items():
+        deltas[dimensions] -= count
+        deltas[(*dimensions[:index], None, *dimensions[index + 1 :])] += count
+    apply_statistic_deltas(deltas)
+
+
+@contextmanager
+def track_statistics(queryset):
+    """
+    Update the statistics for writes which bypass signals, such as queryset
+    updates, by comparing the aggregate of the surveys before and after.
+    """
+    queryset = HappeningSurvey.objects.filter(
+        id__in=list(queryset.values_list("id", flat=True))
+    )
+    with transaction.atomic():
+        deltas = Counter()
+        deltas.subtract(get_statistic_counts(queryset))
+        yield
+        deltas.update(get_statistic_counts(queryset))
+        apply_statistic_deltas(deltas)
+
+
+def rebuild_statistics():
+    with transaction.atomic():
+        HappeningSurveyStatistic.objects.all().delete()
+        HappeningSurveyStatistic.objects.bulk_create(
+            HappeningSurveyStatistic(
+                key=get_key(dimensions),
+                count=count,
+                month=dimensions[-1],
+                **{
+                    dimension: value for dimension, value in zip(DIMENSIONS, dimensions)
+                },
+            )
+            for dimensions, count in get_statistic_counts(
+                HappeningSurvey.objects.all()
+            ).items()
+        )
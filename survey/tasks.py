@@ -0,0 +1,27 @@
+from celery import shared_task
+from django.contrib.gis.geos import GEOSGeometry
+
+from lukimgather.celery import no_simultaneous_execution
+from lukimgather.tiles import invalidate_tiles
+from survey.views import ClusterTileView, TileView
+
+
+def invalidate_happening_survey_tile_cache(geometries):
+    for layer_name in (
+        TileView.vector_tile_layer_name,
+        ClusterTileView.vector_tile_layer_name,
+    ):
+        invalidate_tiles(layer_name, geometries)
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_kwargs={"max_retries": 3},
+)
+@no_simultaneous_execution
+def invalidate_happening_survey_tiles_task(self, geometries):
+    invalidate_happening_survey_tile_cache(
+        [GEOSGeometry(geometry) for geometry in geometries]
+    )
@@ -1,15 +1,48 @@
 import io
 import json
+import os
+import shutil
+import tempfile
 from uuid import uuid4
 
+import mercantile
+import reversion
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.gis import geos
+from django.core.management import call_command
+from django.db import connection
+from django.http import FileResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from graphql_jwt.shortcuts import get_token
 from PIL import Image
+from reversion.models import Version
 
+from gallery.models import Gallery, MediaBlob, Upload
+from gallery.uploads import get_upload_dir, get_upload_path
 from lukimgather.tests import TestBase
+from lukimgather.tiles import (
+    CacheTileStorage,
+    FileSystemTileStorage,
+    get_layer_generation,
+    get_layer_tile_key,
+)
+from region.models import Region
+from region.spatial import region_index
+from region.tiles import (
+    get_generation,
+    get_pyramid_tile_key,
+    render_protected_area_tiles,
+)
+from survey.models import HappeningSurvey
+from survey.statistics import (
+    get_rollup_counts,
+    get_statistic_counts,
+    rebuild_statistics,
+    track_statistics,
+)
 
 
 class APITest(TestBase):
@@ -60,6 +93,99 @@ class APITest(TestBase):
         )
         self.assertResponseNoErrors(response)
 
+    def test_survey_get_with_relations(self):
+        self.baker.make(
+            "survey.HappeningSurvey",
+            category=self.category,
+            project=self.project,
+            created_by=self.activated_user,
+            _quantity=3,
+        )
+        response = self.query(
+            """
+            query {
+              happeningSurveys {
+                id
+                category {
+                  id
+                  title
+                }
+                project {
+                  id
+                  title
+                }
+                region {
+                  id
+                }
+                protectedArea {
+                  id
+                }
+                createdBy {
+                  id
+                }
+                updatedBy {
+                  id
+                }
+                attachment {
+                  id
+                }
+              }
+            }
+            """,
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)
+        for survey in content["data"]["happeningSurveys"]:
+            if survey["project"]:
+                self.assertEqual(survey["project"]["id"], str(self.project.id))
+
+    def test_survey_get_with_relations_queries_do_not_grow(self):
+        query = """
+            query {
+              happeningSurveys {
+                id
+                category {
+                  id
+                }
+                project {
+                  id
+                }
+                region {
+                  id
+                }
+                protectedArea {
+                  id
+                }
+                createdBy {
+                  id
+                }
+                attachment {
+                  id
+                }
+              }
+            }
+        """
+
+        def create_surveys(count):
+            for survey in self.baker.make(
+                "survey.HappeningSurvey",
+                category=self.category,
+                project=self.project,
+                created_by=self.activated_user,
+                _quantity=count,
+            ):
+                survey.attachment.add(self.baker.make("gallery.Gallery"))
+
+        create_surveys(2)
+        with CaptureQueriesContext(connection) as few_surveys:
+            self.assertResponseNoErrors(self.query(query, headers=self.headers))
+        create_surveys(5)
+        with CaptureQueriesContext(connection) as more_surveys:
+            response = self.query(query, headers=self.headers)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(len(more_surveys), len(few_surveys))
+
     def test_create_survey(self):
         response = self.query(
             """
@@ -212,6 +338,623 @@ class APITest(TestBase):
         self.assertResponseNoErrors(response_with_id)
         self.assertResponseNoErrors(response_without_id)
 
+    def test_create_happening_survey_is_written_once(self):
+        created_at = timezone.now() - timezone.timedelta(days=40)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(
+                """
+                mutation CreateHappeningSurvey($data: HappeningSurveyInput!) {
+                    createHappeningSurvey(data: $data) {
+                        result {
+                            id
+                        }
+                    }
+                }
+                """,
+                variables={
+                    "data": {
+                        "title": "written once",
+                        "categoryId": self.category.id,
+                        "location": str(geos.Point(1, 0)),
+                        "createdAt": created_at.isoformat(),
+                    }
+                },
+                headers=self.headers,
+            )
+        self.assertResponseNoErrors(response)
+        statements = [query["sql"] for query in queries.captured_queries]
+        self.assertEqual(
+            len(
+                [
+                    sql
+                    for sql in statements
+                    if sql.startswith('INSERT INTO "survey_happeningsurvey"')
+                ]
+            ),
+            1,
+        )
+        self.assertFalse(
+            [
+                sql
+                for sql in statements
+                if sql.startswith('UPDATE "survey_happeningsurvey"')
+                and '"title" =' in sql
+            ]
+        )
+        survey = HappeningSurvey.objects.get(title="written once")
+        self.assertEqual(survey.created_at, created_at)
+        self.assertEqual(
+            Version.objects.get_for_object(survey).get().field_dict["created_at"],
+            created_at,
+        )
+
+    def test_create_happening_survey_idempotency_key(self):
+        mutation = """
+            mutation CreateHappeningSurvey($data: HappeningSurveyInput!) {
+                createHappeningSurvey(data: $data) {
+                    result {
+                        id
+                    }
+                }
+            }
+        """
+        variables = {"data": {"title": "idempotent", "categoryId": self.category.id}}
+        headers = {**self.headers, "HTTP_IDEMPOTENCY_KEY": str(uuid4())}
+        response = self.query(mutation, variables=variables, headers=headers)
+        self.assertResponseNoErrors(response)
+        replayed_response = self.query(mutation, variables=variables, headers=headers)
+        self.assertEqual(replayed_response["Idempotent-Replayed"], "true")
+        self.assertEqual(replayed_response.content, response.content)
+        self.assertEqual(HappeningSurvey.objects.filter(title="idempotent").count(), 1)
+        conflicting_response = self.query(
+            mutation,
+            variables={"data": {**variables["data"], "title": "other"}},
+            headers=headers,
+        )
+        self.assertEqual(conflicting_response.status_code, 422)
+
+    def test_idempotency_key_error_is_not_replayed(self):
+        mutation = """
+            mutation UpdateHappeningSurvey($data: UpdateHappeningSurveyInput!, $id: UUID!) {
+                updateHappeningSurvey(data: $data, id: $id) {
+                    ok
+                }
+            }
+        """
+        variables = {"id": str(uuid4()), "data": {"title": "idempotent"}}
+        headers = {**self.headers, "HTTP_IDEMPOTENCY_KEY": str(uuid4())}
+        response = self.query(mutation, variables=variables, headers=headers)
+        self.assertResponseHasErrors(response)
+        retried_response = self.query(mutation, variables=variables, headers=headers)
+        self.assertResponseHasErrors(retried_response)
+        self.assertFalse(retried_response.has_header("Idempotent-Replayed"))
+
+    def test_create_happening_surveys_batch(self):
+        mutation = """
+            mutation CreateHappeningSurveysBatch($data: [HappeningSurveyInput!]!) {
+                createHappeningSurveysBatch(data: $data) {
+                    ok
+                    results {
+                        id
+                        ok
+                        created
+                        errors
+                    }
+                }
+            }
+        """
+        new_survey = {
+            "id": str(uuid4()),
+            "title": "test title",
+            "improvement": "INCREASING",
+            "location": str(geos.Point(1, 0)),
+            "categoryId": self.category.id,
+            "createdAt": timezone.now().isoformat(),
+        }
+        stored_survey = {
+            "id": str(self.happening_survey.id),
+            "title": "test title",
+            "categoryId": self.category.id,
+        }
+        invalid_survey = {
+            "id": str(uuid4()),
+            "title": "test title",
+            "categoryId": 0,
+        }
+        response = self.query(
+            mutation,
+            variables={
+                "data": [
+                    new_survey,
+                    stored_survey,
+                    invalid_survey,
+                    {**invalid_survey, "categoryId": self.category.id},
+                    new_survey,
+                ]
+            },
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)["data"]["createHappeningSurveysBatch"]
+        self.assertFalse(content["ok"])
+        (
+            new_result,
+            stored_result,
+            invalid_result,
+            repeated_invalid_result,
+            repeated_new_result,
+        ) = content["results"]
+        self.assertTrue(new_result["ok"])
+        self.assertTrue(new_result["created"])
+        self.assertTrue(stored_result["ok"])
+        self.assertFalse(stored_result["created"])
+        self.assertFalse(invalid_result["ok"])
+        self.assertIn("category_id", invalid_result["errors"])
+        # Repeats of an id share the outcome of its first item
+        self.assertFalse(repeated_invalid_result["ok"])
+        self.assertEqual(repeated_invalid_result["errors"], invalid_result["errors"])
+        self.assertFalse(
+            HappeningSurvey.objects.filter(id=invalid_survey["id"]).exists()
+        )
+        self.assertTrue(repeated_new_result["ok"])
+        self.assertFalse(repeated_new_result["created"])
+
+    def make_upload(self, filename, content):
+        upload = self.baker.make(
+            "gallery.Upload",
+            filename=filename,
+            length=len(content),
+            offset=len(content),
+            created_by=self.activated_user,
+        )
+        os.makedirs(get_upload_dir(upload))
+        with open(get_upload_path(upload), "wb") as data:
+            data.write(content)
+        return str(upload.token)
+
+    def test_create_happening_survey_with_resumable_uploads(self):
+        content = self.generate_photo_file().read()
+        with tempfile.TemporaryDirectory() as upload_dir, self.settings(
+            UPLOAD_DIR=upload_dir
+        ):
+            attachment_token = self.make_upload("test.png", content)
+            audio_token = self.make_upload("test.mp3", b"audio")
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.query(
+                    """
+                    mutation CreateHappeningSurvey($data: HappeningSurveyInput!) {
+                        createHappeningSurvey(data: $data) {
+                            ok
+                            result {
+                                id
+                            }
+                        }
+                    }
+                    """,
+                    variables={
+                        "data": {
+                            "title": "test title",
+                            "categoryId": self.category.id,
+                            "attachmentUpload": [attachment_token],
+                            "audioFileUpload": audio_token,
+                        }
+                    },
+                    headers=self.headers,
+                )
+        self.assertResponseNoErrors(response)
+        survey = HappeningSurvey.objects.get(
+            id=response.json()["data"]["createHappeningSurvey"]["result"]["id"]
+        )
+        self.assertEqual(survey.attachment.get().media.read(), content)
+        self.assertEqual(survey.audio_file.read(), b"audio")
+        self.assertFalse(
+            Upload.objects.filter(token__in=[attachment_token, audio_token]).exists()
+        )
+
+    def test_update_happening_survey_with_resumable_upload(self):
+        with tempfile.TemporaryDirectory() as upload_dir, self.settings(
+            UPLOAD_DIR=upload_dir
+        ):
+            audio_token = self.make_upload("test.mp3", b"audio")
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.query(
+                    """
+                    mutation UpdateHappeningSurvey(
+                        $id: UUID!, $data: UpdateHappeningSurveyInput!
+                    ) {
+                        updateHappeningSurvey(id: $id, data: $data) {
+                            ok
+                            errors
+                        }
+                    }
+                    """,
+                    variables={
+                        "id": str(self.happening_survey.id),
+                        "data": {"audioFileUpload": audio_token},
+                    },
+                    headers=self.headers,
+                )
+        self.assertResponseNoErrors(response)
+        self.assertTrue(response.json()["data"]["updateHappeningSurvey"]["ok"])
+        self.happening_survey.refresh_from_db()
+        self.assertEqual(self.happening_survey.audio_file.read(), b"audio")
+        self.assertFalse(Upload.objects.filter(token=audio_token).exists())
+
+    def test_happening_survey_attachment_processing(self):
+        mutation = """
+            mutation CreateHappeningSurvey($data: HappeningSurveyInput!) {
+                createHappeningSurvey(data: $data) {
+                    result {
+                        attachment {
+                            mediaAsset {
+                                og
+                                sm
+                                lg
+                            }
+                        }
+                    }
+                }
+            }
+        """
+        with self.settings(
+            ENABLE_CELERY=False, IMAGE_MAX_EDGE=50
+        ), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.GRAPHQL_URL,
+                data={
+                    "operations": json.dumps(
+                        {
+                            "query": mutation,
+                            "variables": {
+                                "data": {
+                                    "title": "test title",
+                                    "categoryId": self.category.id,
+                                    "attachment": [None],
+                                }
+                            },
+                        }
+                    ),
+                    "0": self.generate_photo_file(),
+                    "map": json.dumps({"0": ["variables.data.attachment.0"]}),
+                },
+                **self.headers,
+            )
+        self.assertResponseNoErrors(response)
+        # Renditions aren't generated on the request, the original is served
+        media_asset = response.json()["data"]["createHappeningSurvey"]["result"][
+            "attachment"
+        ][0]["mediaAsset"]
+        self.assertEqual(media_asset["sm"], media_asset["og"])
+        gallery = Gallery.objects.get(title="test.png")
+        self.assertEqual(gallery.renditions.keys(), {"sm", "lg"})
+        with gallery.media.open("rb") as media:
+            self.assertEqual(Image.open(media).size, (50, 50))
+        self.assertEqual(gallery.blob.file.name, gallery.media.name)
+
+    def test_happening_survey_attachment_deduplication(self):
+        response = self.client.post(
+            self.GRAPHQL_URL,
+            data={
+                "operations": json.dumps(
+                    {
+                        "query": """
+                            mutation CreateHappeningSurvey(
+                                $data: HappeningSurveyInput!
+                            ) {
+                                createHappeningSurvey(data: $data) {
+                                    ok
+                                }
+                            }
+                        """,
+                        "variables": {
+                            "data": {
+                                "title": "test title",
+                                "categoryId": self.category.id,
+                                "attachment": [None, None],
+                            }
+                        },
+                    }
+                ),
+                "0": self.generate_photo_file(),
+                "1": self.generate_photo_file(),
+                "map": json.dumps(
+                    {
+                        "0": ["variables.data.attachment.0"],
+                        "1": ["variables.data.attachment.1"],
+                    }
+                ),
+            },
+            **self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        galleries = Gallery.objects.filter(title="test.png")
+        self.assertEqual(galleries.count(), 2)
+        self.assertEqual(len({gallery.media.name for gallery in galleries}), 1)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_happening_surveys_export(self):
+        url = reverse("happening-surveys-export")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(
+            url, {"format": "geojson", "title": "test"}, **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        # Rows are fetched before returning, never while the response streams
+        self.assertIsInstance(response, FileResponse)
+        collection = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            [feature["id"] for feature in collection["features"]],
+            [str(self.happening_survey.id)],
+        )
+        response = self.client.get(url, {"format": "csv"}, **self.headers)
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), HappeningSurvey.objects.count() + 1)
+        response = self.client.get(url, {"format": "gpkg"}, **self.headers)
+        self.assertEqual(
+            b"".join(response.streaming_content)[:16], b"SQLite format 3\x00"
+        )
+
+    def test_happening_survey_region_assignment(self):
+        parent = self.baker.make(
+            "region.Region",
+            boundary=geos.MultiPolygon(geos.Polygon.from_bbox((0, 0, 10, 10))),
+        )
+        child = self.baker.make(
+            "region.Region",
+            parent=parent,
+            boundary=geos.MultiPolygon(geos.Polygon.from_bbox((0, 0, 5, 5))),
+        )
+        survey = self.baker.make(
+            "survey.HappeningSurvey", location=geos.Point(1, 1, srid=4326)
+        )
+        self.assertEqual(survey.region_id, child.id)
+        survey.location = geos.Point(8, 8, srid=4326)
+        survey.save()
+        survey.refresh_from_db()
+        self.assertEqual(survey.region_id, parent.id)
+
+    def test_region_index_notices_changes_of_other_processes(self):
+        region = self.baker.make(
+            "region.Region",
+            boundary=geos.MultiPolygon(geos.Polygon.from_bbox((40, 40, 50, 50))),
+        )
+        point = geos.Point(45, 45, srid=4326)
+        self.assertEqual(region_index.find(point), region.id)
+        # Updated without signals, like a change made by another process
+        Region.objects.filter(pk=region.pk).update(
+            boundary=geos.MultiPolygon(geos.Polygon.from_bbox((60, 60, 70, 70))),
+            modified_at=timezone.now(),
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(region_index.find(point), region.id)
+        self.assertEqual(len(queries), 0)
+        with self.settings(BOUNDARY_INDEX_CHECK_INTERVAL=0):
+            self.assertIsNone(region_index.find(point))
+
+    def test_happening_survey_tile_invalidation(self):
+        storage = CacheTileStorage()
+        tile = mercantile.tile(1, 1, 10)
+        key = get_layer_tile_key(storage, "happening-surveys", tile.z, tile.x, tile.y)
+        storage.set(key, b"tile")
+        with self.settings(ENABLE_CELERY=False), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            self.baker.make(
+                "survey.HappeningSurvey", location=geos.Point(1, 1, srid=4326)
+            )
+        self.assertIsNone(storage.get(key))
+
+    def test_cached_tiles_expire(self):
+        storage = CacheTileStorage()
+        with self.settings(TILE_CACHE_TIMEOUT=0):
+            storage.set("happening-surveys/0/0/0", b"tile")
+            storage.set("happening-surveys/generation", b"0", expires=False)
+        self.assertIsNone(storage.get("happening-surveys/0/0/0"))
+        self.assertIsNotNone(storage.get("happening-surveys/generation"))
+        storage.delete_many(["happening-surveys/generation"])
+
+    def test_happening_survey_tile_generation(self):
+        storage = CacheTileStorage()
+        layer_name = "happening-surveys"
+        tile = mercantile.tile(100, 50, 10)
+        key = get_layer_tile_key(storage, layer_name, tile.z, tile.x, tile.y)
+        storage.set(key, b"tile")
+        # A change covering too many tiles to list moves the layer to a new
+        # generation, so tiles far away from it are dropped too
+        with self.settings(
+            ENABLE_CELERY=False, TILE_INVALIDATION_MAX_TILES=10
+        ), self.captureOnCommitCallbacks(execute=True):
+            self.baker.make(
+                "survey.HappeningSurvey",
+                boundary=geos.MultiPolygon(geos.Polygon.from_bbox((0, 0, 10, 10))),
+            )
+        self.assertIsNotNone(get_layer_generation(storage, layer_name))
+        self.assertNotEqual(
+            get_layer_tile_key(storage, layer_name, tile.z, tile.x, tile.y), key
+        )
+
+    def test_protected_area_tiles_expired_without_celery(self):
+        tile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tile_dir, ignore_errors=True)
+        with self.settings(
+            ENABLE_CELERY=False,
+            TILE_CACHE_STORAGE="lukimgather.tiles.FileSystemTileStorage",
+            TILE_CACHE_DIR=tile_dir,
+            PROTECTED_AREA_TILE_MIN_ZOOM=0,
+            PROTECTED_AREA_TILE_MAX_ZOOM=1,
+        ):
+            storage = FileSystemTileStorage()
+            render_protected_area_tiles()
+            generation = get_generation(storage)
+            self.assertIsNotNone(storage.get(get_pyramid_tile_key(generation, 0, 0, 0)))
+            # Saving only expires the pyramid, its tiles are then rendered live
+            with self.captureOnCommitCallbacks(execute=True):
+                self.baker.make(
+                    "region.ProtectedArea",
+                    boundary=geos.MultiPolygon(geos.Polygon.from_bbox((0, 0, 1, 1))),
+                    _quantity=2,
+                )
+            self.assertIsNone(get_generation(storage))
+            render_protected_area_tiles()
+            self.assertIsNotNone(
+                storage.get(get_pyramid_tile_key(get_generation(storage), 0, 0, 0))
+            )
+            # Tiles of the expired generation are deleted by the rebuild
+            self.assertIsNone(storage.get(get_pyramid_tile_key(generation, 0, 0, 0)))
+
+    def test_happening_surveys_spatial_filters(self):
+        region = self.baker.make(
+            "region.Region",
+            boundary=geos.MultiPolygon(geos.Polygon.from_bbox((20, 20, 30, 30))),
+        )
+        inside, outside = self.baker.make(
+            "survey.HappeningSurvey",
+            location=iter(
+                [geos.Point(25, 25, srid=4326), geos.Point(50, 50, srid=4326)]
+            ),
+            _quantity=2,
+        )
+        query = """
+            query HappeningSurveys(
+              $bbox: String
+              $withinDistanceOf: String
+              $inRegionSubtree: Float
+            ) {
+              happeningSurveys(
+                bbox: $bbox
+                withinDistanceOf: $withinDistanceOf
+                inRegionSubtree: $inRegionSubtree
+              ) {
+                id
+              }
+            }
+        """
+        for variables in (
+            {"bbox": "24,24,26,26"},
+            {"withinDistanceOf": "25.001,25,1000"},
+            {"inRegionSubtree": region.id},
+        ):
+            response = self.query(query, variables=variables, headers=self.headers)
+            self.assertResponseNoErrors(response)
+            ids = [
+                row["id"]
+                for row in json.loads(response.content)["data"]["happeningSurveys"]
+            ]
+            self.assertIn(str(inside.id), ids)
+            self.assertNotIn(str(outside.id), ids)
+
+    def test_happening_surveys_search(self):
+        mangrove, logging, _ = self.baker.make(
+            "survey.HappeningSurvey",
+            title=iter(["Mangroves cut near the river", "Bus", "Coral reef"]),
+            description=iter([None, "Ol man i katim diwai long bus", None]),
+            _quantity=3,
+        )
+        query = """
+            query HappeningSurveys($search: String) {
+              happeningSurveys(search: $search) {
+                id
+              }
+            }
+        """
+        for search, survey in (("mangrove", mangrove), ("diwai", logging)):
+            response = self.query(
+                query, variables={"search": search}, headers=self.headers
+            )
+            self.assertResponseNoErrors(response)
+            ids = [
+                row["id"]
+                for row in json.loads(response.content)["data"]["happeningSurveys"]
+            ]
+            self.assertEqual(ids, [str(survey.id)])
+
+    def test_happening_survey_clusters(self):
+        self.baker.make(
+            "survey.HappeningSurvey",
+            location=geos.Point(60, 60, srid=4326),
+            category=self.category,
+            _quantity=3,
+        )
+        response = self.query(
+            """
+            query {
+              happeningSurveyClusters(zoom: 3, bbox: "59,59,61,61") {
+                count
+                centroid {
+                  type
+                  coordinates
+                }
+                status {
+                  value
+                  count
+                }
+                category {
+                  value
+                  count
+                }
+              }
+            }
+            """,
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        clusters = json.loads(response.content)["data"]["happeningSurveyClusters"]
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]["count"], 3)
+        self.assertEqual(
+            clusters[0]["category"], [{"value": str(self.category.id), "count": 3}]
+        )
+
+    def test_survey_statistics_match_live_aggregate(self):
+        surveys = self.baker.make(
+            "survey.HappeningSurvey",
+            category=self.category,
+            improvement="same",
+            _quantity=3,
+        )
+        surveys[0].status = "approved"
+        surveys[0].category = None
+        surveys[0].save()
+        surveys[1].created_at = timezone.now() - timezone.timedelta(days=62)
+        surveys[1].save()
+        surveys[2].delete()
+        self.baker.make("survey.HappeningSurvey", category=self.category, is_test=True)
+        # References to a deleted category or region are set to null in SQL
+        category = self.baker.make("survey.ProtectedAreaCategory")
+        region = self.baker.make("region.Region")
+        self.baker.make("survey.HappeningSurvey", category=category, region=region)
+        category.delete()
+        region.delete()
+        with track_statistics(HappeningSurvey.objects.all()):
+            HappeningSurvey.objects.update(improvement="increasing")
+        self.assertEqual(
+            get_rollup_counts(), get_statistic_counts(HappeningSurvey.objects.all())
+        )
+        rebuild_statistics()
+        self.assertEqual(
+            get_rollup_counts(), get_statistic_counts(HappeningSurvey.objects.all())
+        )
+        response = self.query(
+            """
+            query {
+              surveyStatistics(groupBy: [STATUS, PERIOD], period: YEAR) {
+                status
+                period
+                count
+              }
+            }
+            """,
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        statistics = json.loads(response.content)["data"]["surveyStatistics"]
+        self.assertEqual(
+            sum(row["count"] for row in statistics),
+            HappeningSurvey.objects.filter(is_test=False).count(),
+        )
+        response = self.query("query { surveyStatistics { count } }")
+        self.assertResponseHasErrors(response)
+
     def test_survey_form_get(self):
         response = self.query(
             """
@@ -287,6 +1030,112 @@ class APITest(TestBase):
         )
         self.assertResponseNoErrors(response)
 
+    def test_update_happening_survey_revision_number(self):
+        survey = self.baker.make(
+            "survey.HappeningSurvey", created_by=self.activated_user
+        )
+        mutation = """
+            mutation UpdateHappeningSurvey($data: UpdateHappeningSurveyInput!, $id: UUID!) {
+              updateHappeningSurvey(data: $data, id: $id) {
+                ok
+                result {
+                  revisionNumber
+                }
+                errors
+              }
+            }
+        """
+        for revision_number in (0, 1):
+            response = self.query(
+                mutation,
+                variables={
+                    "id": str(survey.id),
+                    "data": {"title": "title", "revisionNumber": revision_number},
+                },
+                headers=self.headers,
+            )
+            self.assertResponseNoErrors(response)
+            result = json.loads(response.content)["data"]["updateHappeningSurvey"]
+            self.assertEqual(result["result"]["revisionNumber"], revision_number + 1)
+        self.assertEqual(
+            Version.objects.get_for_object(survey).first().revision.comment, "v2"
+        )
+        response = self.query(
+            mutation,
+            variables={"id": str(survey.id), "data": {"revisionNumber": 1}},
+            headers=self.headers,
+        )
+        self.assertFalse(
+            json.loads(response.content)["data"]["updateHappeningSurvey"]["ok"]
+        )
+
+    def test_edit_happening_survey_revision_number(self):
+        survey = self.baker.make(
+            "survey.HappeningSurvey", created_by=self.activated_user
+        )
+        response = self.query(
+            """
+            mutation EditHappeningSurvey($data: UpdateHappeningSurveyInput!, $id: UUID!) {
+              editHappeningSurvey(data: $data, id: $id) {
+                ok
+                result {
+                  revisionNumber
+                }
+              }
+            }
+            """,
+            variables={
+                "id": str(survey.id),
+                "data": {"title": "edited", "revisionNumber": 0},
+            },
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        result = json.loads(response.content)["data"]["editHappeningSurvey"]
+        self.assertEqual(result["result"]["revisionNumber"], 1)
+        # An update based on the revision before the edit is stale
+        response = self.query(
+            """
+            mutation UpdateHappeningSurvey($data: UpdateHappeningSurveyInput!, $id: UUID!) {
+              updateHappeningSurvey(data: $data, id: $id) {
+                ok
+                errors
+              }
+            }
+            """,
+            variables={
+                "id": str(survey.id),
+                "data": {"title": "stale", "revisionNumber": 0},
+            },
+            headers=self.headers,
+        )
+        result = json.loads(response.content)["data"]["updateHappeningSurvey"]
+        self.assertFalse(result["ok"])
+        survey.refresh_from_db()
+        self.assertEqual(survey.title, "edited")
+
+    def test_approve_happening_survey_revision_number(self):
+        survey = self.baker.make("survey.HappeningSurvey")
+        self.client.force_login(
+            self.baker.make(
+                settings.AUTH_USER_MODEL,
+                is_active=True,
+                is_staff=True,
+                is_superuser=True,
+            )
+        )
+        self.client.post(
+            reverse("admin:survey_happeningsurvey_changelist"),
+            {
+                "action": "approve_reject_happening_survey",
+                "_selected_action": [str(survey.pk)],
+                "_approved": "1",
+            },
+        )
+        survey.refresh_from_db()
+        self.assertEqual(survey.status, "approved")
+        self.assertEqual(survey.revision_number, 1)
+
     def test_edit_happening_survey(self):
         mutation = """
             mutation EditHappeningSurvey($data: UpdateHappeningSurveyInput!, $id: UUID!) {
@@ -345,6 +1194,125 @@ class APITest(TestBase):
         )
         self.assertResponseNoErrors(response)
 
+    def test_happening_surveys_cursor_with_equal_created_at(self):
+        surveys = self.baker.make("survey.HappeningSurvey", _quantity=3)
+        created_at = timezone.now() + timezone.timedelta(days=1)
+        HappeningSurvey.objects.filter(pk__in=[survey.pk for survey in surveys]).update(
+            created_at=created_at
+        )
+        query = """
+            query Cursor($after: String) {
+              happeningSurveysCursor(limit: 1, after: $after) {
+                results {
+                  id
+                }
+                nextCursor
+              }
+            }
+        """
+        ids = []
+        cursor = None
+        for _ in surveys:
+            response = self.query(
+                query, variables={"after": cursor}, headers=self.headers
+            )
+            self.assertResponseNoErrors(response)
+            page = json.loads(response.content)["data"]["happeningSurveysCursor"]
+            ids += [row["id"] for row in page["results"]]
+            cursor = page["nextCursor"]
+        # Ties on created_at are broken by id, without skipping or repeating rows
+        self.assertEqual(
+            ids, sorted((str(survey.id) for survey in surveys), reverse=True)
+        )
+
+    def test_happening_surveys_changed_since(self):
+        query = """
+            query ChangedSince($since: DateTime) {
+              happeningSurveysChangedSince(since: $since) {
+                results {
+                  id
+                }
+                tombstones {
+                  happeningSurveyId
+                  reason
+                }
+                nextCursor
+                watermark
+              }
+            }
+        """
+        since = timezone.now() - timezone.timedelta(minutes=1)
+        changed_survey, deleted_survey = self.baker.make(
+            "survey.HappeningSurvey", created_by=self.activated_user, _quantity=2
+        )
+        deleted_survey_id = str(deleted_survey.id)
+        deleted_survey.delete()
+        response = self.query(
+            query, variables={"since": since.isoformat()}, headers=self.headers
+        )
+        self.assertResponseNoErrors(response)
+        content = json.loads(response.content)["data"]["happeningSurveysChangedSince"]
+        self.assertIn(str(changed_survey.id), [row["id"] for row in content["results"]])
+        self.assertIn(
+            {"happeningSurveyId": deleted_survey_id, "reason": "DELETED"},
+            content["tombstones"],
+        )
+        self.assertIsNotNone(content["watermark"])
+
+    def test_happening_surveys_changed_since_tombstone_visibility(self):
+        query = """
+            query ChangedSince($since: DateTime) {
+              happeningSurveysChangedSince(since: $since) {
+                tombstones {
+                  happeningSurveyId
+                  reason
+                }
+              }
+            }
+        """
+        since = timezone.now() - timezone.timedelta(minutes=1)
+        owner = self.baker.make(settings.AUTH_USER_MODEL, is_active=True)
+        public_survey, private_survey = self.baker.make(
+            "survey.HappeningSurvey", created_by=owner, is_public=True, _quantity=2
+        )
+        private_survey.is_public = False
+        private_survey.save(update_fields=["is_public"])
+        deleted_private_survey = self.baker.make(
+            "survey.HappeningSurvey", created_by=owner, is_public=False
+        )
+        ids = {
+            "public": str(public_survey.id),
+            "private": str(private_survey.id),
+            "deleted_private": str(deleted_private_survey.id),
+        }
+        public_survey.delete()
+        deleted_private_survey.delete()
+        other_user = self.baker.make(settings.AUTH_USER_MODEL, is_active=True)
+        expected = {
+            None: [(ids["public"], "DELETED"), (ids["private"], "PRIVATE")],
+            other_user: [(ids["public"], "DELETED"), (ids["private"], "PRIVATE")],
+            owner: [(ids["public"], "DELETED"), (ids["deleted_private"], "DELETED")],
+        }
+        for user, tombstones in expected.items():
+            headers = (
+                {"HTTP_AUTHORIZATION": f"Bearer {get_token(user)}"} if user else {}
+            )
+            response = self.query(
+                query, variables={"since": since.isoformat()}, headers=headers
+            )
+            self.assertResponseNoErrors(response)
+            content = json.loads(response.content)["data"][
+                "happeningSurveysChangedSince"
+            ]
+            self.assertCountEqual(
+                [
+                    (row["happeningSurveyId"], row["reason"])
+                    for row in content["tombstones"]
+                    if row["happeningSurveyId"] in ids.values()
+                ],
+                tombstones,
+            )
+
     def test_happening_survey_history_get(self):
         response = self.query(
             """
@@ -412,3 +1380,155 @@ class APITest(TestBase):
             headers=self.headers,
         )
         self.assertResponseNoErrors(response)
+
+    def test_happening_survey_version_diff(self):
+        survey = self.baker.make("survey.HappeningSurvey", title="Initial title")
+        survey.title = "Old title"
+        survey.location = geos.Point(147.15, -9.47, srid=4326)
+        with reversion.create_revision():
+            survey.save()
+        survey.title = "New title"
+        survey.location = geos.Point(147.16, -9.47, srid=4326)
+        with reversion.create_revision():
+            survey.save()
+        from_version, to_version = Version.objects.get_for_object(survey).order_by("id")
+        response = self.query(
+            """
+            query Diff($objectId: ID!, $fromVersion: ID!, $toVersion: ID!) {
+              happeningSurveyVersionDiff(
+                objectId: $objectId
+                fromVersion: $fromVersion
+                toVersion: $toVersion
+              ) {
+                field
+                oldValue
+                newValue
+                distance
+              }
+            }
+            """,
+            variables={
+                "objectId": str(survey.id),
+                "fromVersion": from_version.id,
+                "toVersion": to_version.id,
+            },
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        changes = {
+            change["field"]: change
+            for change in json.loads(response.content)["data"][
+                "happeningSurveyVersionDiff"
+            ]
+        }
+        self.assertEqual(changes["title"]["newValue"], "New title")
+        self.assertIsNone(changes["location"]["newValue"])
+        self.assertAlmostEqual(changes["location"]["distance"], 1098, delta=5)
+
+    def test_happening_survey_version_diff_of_private_survey(self):
+        owner = self.baker.make(settings.AUTH_USER_MODEL, is_active=True)
+        survey = self.baker.make(
+            "survey.HappeningSurvey", title="Old title", created_by=owner
+        )
+        survey.is_public = False
+        with reversion.create_revision():
+            survey.save()
+        survey.title = "New title"
+        with reversion.create_revision():
+            survey.save()
+        from_version, to_version = Version.objects.get_for_object(survey).order_by("id")
+        query = """
+            query Diff($objectId: ID!, $fromVersion: ID!, $toVersion: ID!) {
+              happeningSurveyVersionDiff(
+                objectId: $objectId
+                fromVersion: $fromVersion
+                toVersion: $toVersion
+              ) {
+                field
+              }
+            }
+        """
+        variables = {
+            "objectId": str(survey.id),
+            "fromVersion": from_version.id,
+            "toVersion": to_version.id,
+        }
+        other_user = self.baker.make(settings.AUTH_USER_MODEL, is_active=True)
+        for headers in [
+            {},
+            {"HTTP_AUTHORIZATION": f"Bearer {get_token(other_user)}"},
+        ]:
+            response = self.query(query, variables=variables, headers=headers)
+            self.assertResponseHasErrors(response)
+        response = self.query(
+            query,
+            variables=variables,
+            headers={"HTTP_AUTHORIZATION": f"Bearer {get_token(owner)}"},
+        )
+        self.assertResponseNoErrors(response)
+
+    def test_prune_happening_survey_versions(self):
+        survey = self.baker.make("survey.HappeningSurvey")
+        for index in range(4):
+            survey.title = f"Title {index}"
+            with reversion.create_revision():
+                survey.save()
+        call_command(
+            "prune_happening_survey_versions", keep_last=1, stdout=io.StringIO()
+        )
+        titles = [
+            version.field_dict["title"]
+            for version in Version.objects.get_for_object(survey).order_by("pk")
+        ]
+        self.assertEqual(titles, ["Title 0", "Title 2", "Title 3"])
+
+    def test_happening_survey_history_queries_do_not_grow(self):
+        query = """
+            query {
+              happeningSurveysHistory {
+                revision {
+                  id
+                }
+                serializedData {
+                  fields {
+                    title
+                    category {
+                      id
+                    }
+                    attachment {
+                      id
+                    }
+                  }
+                }
+              }
+            }
+        """
+
+        def create_versions(count):
+            for _ in range(count):
+                survey = self.baker.make(
+                    "survey.HappeningSurvey", title="Initial title"
+                )
+                survey.title = "Changed title"
+                survey.category = self.category
+                with reversion.create_revision():
+                    survey.save()
+                    survey.attachment.add(self.baker.make("gallery.Gallery"))
+
+        create_versions(2)
+        with CaptureQueriesContext(connection) as few_versions:
+            response = self.query(query, headers=self.headers)
+        self.assertResponseNoErrors(response)
+        history = json.loads(response.content)["data"]["happeningSurveysHistory"]
+        self.assertEqual(len(history), 2)
+        create_versions(3)
+        with CaptureQueriesContext(connection) as more_versions:
+            response = self.query(query, headers=self.headers)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(len(more_versions), len(few_versions))
+        history = json.loads(response.content)["data"]["happeningSurveysHistory"]
+        self.assertEqual(len(history), 5)
+        for version in history:
+            fields = version["serializedData"]["fields"]
+            self.assertEqual(fields["category"]["id"], str(self.category.id))
+            self.assertEqual(len(fields["attachment"]), 1)
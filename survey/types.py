@@ -1,5 +1,6 @@
 import graphene
-from django.core import serializers
+import graphql_geojson
+from django.contrib.gis.geos import Point
 from django.core.exceptions import ObjectDoesNotExist
 from graphene.types.generic import GenericScalar
 from graphene_django.types import DjangoObjectType
@@ -7,8 +8,22 @@ from graphene_django_extras.paginations import LimitOffsetGraphqlPagination
 from reversion.models import Version
 
 from gallery.models import Gallery
+from lukimgather.dataloaders import (
+    get_model_loader,
+    load_deserialized_versions,
+    load_foreign_key,
+    load_many_to_many,
+    prime_foreign_keys,
+    prime_many_to_many,
+)
 from lukimgather.types import RevisionType
-from survey.models import Form, HappeningSurvey, ProtectedAreaCategory, Survey
+from survey.models import (
+    Form,
+    HappeningSurvey,
+    HappeningSurveyTombstone,
+    ProtectedAreaCategory,
+    Survey,
+)
 
 
 class ProtectedAreaCategoryType(DjangoObjectType):
@@ -26,6 +41,42 @@ class ProtectedAreaCategoryType(DjangoObjectType):
 class HappeningSurveyType(DjangoObjectType):
     is_offline = graphene.Boolean()
 
+    foreign_key_fields = (
+        "category",
+        "project",
+        "region",
+        "protected_area",
+        "created_by",
+        "updated_by",
+    )
+    many_to_many_fields = ("attachment",)
+
+    @classmethod
+    def prime_loaders(cls, info, objs):
+        prime_foreign_keys(info, objs, cls.foreign_key_fields)
+        prime_many_to_many(info, objs, cls.many_to_many_fields)
+
+    def resolve_category(self, info):
+        return load_foreign_key(info, self, "category")
+
+    def resolve_project(self, info):
+        return load_foreign_key(info, self, "project")
+
+    def resolve_region(self, info):
+        return load_foreign_key(info, self, "region")
+
+    def resolve_protected_area(self, info):
+        return load_foreign_key(info, self, "protected_area")
+
+    def resolve_created_by(self, info):
+        return load_foreign_key(info, self, "created_by")
+
+    def resolve_updated_by(self, info):
+        return load_foreign_key(info, self, "updated_by")
+
+    def resolve_attachment(self, info):
+        return load_many_to_many(info, self, "attachment")
+
     def resolve_is_offline(self, info):
         return False
 
@@ -42,24 +93,128 @@ class HappeningSurveyType(DjangoObjectType):
         pagination = LimitOffsetGraphqlPagination(default_limit=100, ordering="-title")
 
 
+class HappeningSurveyBatchResultType(graphene.ObjectType):
+    id = graphene.UUID()
+    ok = graphene.Boolean()
+    created = graphene.Boolean(
+        description="False when a survey with the same id was already stored."
+    )
+    result = graphene.Field(HappeningSurveyType)
+    errors = GenericScalar()
+
+    class Meta:
+        description = "Outcome of a single survey of a batch submission"
+
+
+class HappeningSurveyTombstoneType(DjangoObjectType):
+    class Meta:
+        model = HappeningSurveyTombstone
+        description = "Type definition for a deleted or hidden happening survey"
+        fields = ("happening_survey_id", "reason", "created_at")
+
+
+class HappeningSurveyDeltaType(graphene.ObjectType):
+    results = graphene.List(graphene.NonNull(HappeningSurveyType))
+    tombstones = graphene.List(
+        graphene.NonNull(HappeningSurveyTombstoneType),
+        description="Surveys deleted or hidden since the watermark. Sent with the last page.",
+    )
+    next_cursor = graphene.String()
+    watermark = graphene.DateTime(
+        description="Pass watermark of the last page as `since` of the next sync."
+    )
+
+    class Meta:
+        description = "Happening surveys changed since a watermark"
+
+
+class HappeningSurveyClusterBreakdownType(graphene.ObjectType):
+    value = graphene.String()
+    count = graphene.Int()
+
+
+class HappeningSurveyClusterType(graphene.ObjectType):
+    count = graphene.Int()
+    longitude = graphene.Float()
+    latitude = graphene.Float()
+    centroid = graphql_geojson.Geometry()
+    status = graphene.List(HappeningSurveyClusterBreakdownType)
+    improvement = graphene.List(HappeningSurveyClusterBreakdownType)
+    category = graphene.List(
+        HappeningSurveyClusterBreakdownType, description="Counts by category id"
+    )
+
+    class Meta:
+        description = "Happening surveys aggregated in a grid cell"
+
+    def resolve_centroid(self, info):
+        return Point(self.longitude, self.latitude, srid=4326)
+
+
+class SurveyStatisticDimension(graphene.Enum):
+    CATEGORY = "category_id"
+    STATUS = "status"
+    IMPROVEMENT = "improvement"
+    REGION = "region_id"
+    PROTECTED_AREA = "protected_area_id"
+    PERIOD = "period"
+
+
+class SurveyStatisticPeriod(graphene.Enum):
+    MONTH = "month"
+    YEAR = "year"
+
+
+class SurveyStatisticFilterInput(graphene.InputObjectType):
+    category_id = graphene.Int()
+    status = graphene.String()
+    improvement = graphene.String()
+    region_id = graphene.Int()
+    protected_area_id = graphene.Int()
+    period_from = graphene.Date(description="First day of the first period")
+    period_to = graphene.Date(description="Any day of the last period")
+
+
+class SurveyStatisticType(graphene.ObjectType):
+    category_id = graphene.ID()
+    status = graphene.String()
+    improvement = graphene.String()
+    region_id = graphene.ID()
+    protected_area_id = graphene.ID()
+    period = graphene.Date(description="First day of the period")
+    count = graphene.Int()
+
+    class Meta:
+        description = "Number of happening surveys in a group"
+
+
 class HappeningSurveyHistoryVersionType(graphene.ObjectType):
     fields = graphene.Field(HappeningSurveyType)
 
     def resolve_fields(self, info):
-        deserialized_object = list(serializers.deserialize("json", self))[0]
+        # Root is the version, the page was deserialized in bulk by prime_loaders
+        deserialized_object = load_deserialized_versions(info, [self])[self.pk]
+        happening_survey = deserialized_object.object
         happening_survey_dict = {}
         for field in HappeningSurveyType._meta.fields.keys():
-            try:
-                happening_survey_dict[field] = getattr(
-                    deserialized_object.object, field, None
+            if field in HappeningSurveyType.foreign_key_fields:
+                happening_survey_dict[field] = load_foreign_key(
+                    info, happening_survey, field
                 )
+                continue
+            try:
+                happening_survey_dict[field] = getattr(happening_survey, field, None)
             except ObjectDoesNotExist:
                 happening_survey_dict[field] = None
-        attachments = deserialized_object.m2m_data.get("attachment")
-        if attachments:
-            happening_survey_dict["attachment"] = Gallery.objects.filter(
-                id__in=attachments
+        gallery_loader = get_model_loader(info, Gallery)
+        happening_survey_dict["attachment"] = [
+            gallery
+            for gallery in map(
+                gallery_loader.load,
+                deserialized_object.m2m_data.get("attachment", ()),
             )
+            if gallery
+        ]
         return HappeningSurveyType(**happening_survey_dict)
 
 
@@ -67,12 +222,60 @@ class HappeningSurveyHistoryType(DjangoObjectType):
     revision = graphene.Field(RevisionType)
     serialized_data = graphene.Field(HappeningSurveyHistoryVersionType)
 
+    @classmethod
+    def prime_loaders(cls, info, versions):
+        prime_foreign_keys(info, versions, ("revision",))
+        deserialized_objects = [
+            deserialized_object
+            for deserialized_object in load_deserialized_versions(
+                info, versions
+            ).values()
+            if isinstance(deserialized_object.object, HappeningSurvey)
+        ]
+        prime_foreign_keys(
+            info,
+            [
+                deserialized_object.object
+                for deserialized_object in deserialized_objects
+            ],
+            HappeningSurveyType.foreign_key_fields,
+        )
+        get_model_loader(info, Gallery).prime(
+            attachment
+            for deserialized_object in deserialized_objects
+            for attachment in deserialized_object.m2m_data.get("attachment", ())
+        )
+
+    def resolve_revision(self, info):
+        return load_foreign_key(info, self, "revision")
+
+    def resolve_serialized_data(self, info):
+        return self
+
     class Meta:
         model = Version
         description = "Type definition for a version"
         fields = "__all__"
 
 
+class HappeningSurveyFieldChangeType(graphene.ObjectType):
+    field = graphene.String()
+    old_value = GenericScalar()
+    new_value = GenericScalar()
+    added = graphene.Boolean(description="Geometry was added")
+    removed = graphene.Boolean(description="Geometry was removed")
+    distance = graphene.Float(
+        description="Distance between centroids of the geometries in meters"
+    )
+    area_delta = graphene.Float(description="Change of the area in square meters")
+
+    class Meta:
+        description = (
+            "Change of a field between two versions. Geometry changes are "
+            "summarized instead of returning coordinates."
+        )
+
+
 class FormType(DjangoObjectType):
     xform = GenericScalar()
 
@@ -1,12 +1,24 @@
+from django.contrib.auth import authenticate
 from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+from django.db.models import Q
 from django.db.models.functions import Coalesce
+from django.views import View
 from django.views.generic import ListView
+from graphql import GraphQLError
+from graphql_jwt.exceptions import JSONWebTokenError
 from vectortiles.postgis.views import MVTView
 
+from lukimgather.tiles import CachedTileMixin
+from lukimgather.views import error_response
+from survey.clusters import get_breakdown_aggregates, get_cluster_queryset
+from survey.exports import EXPORT_FORMATS, export_happening_surveys
+from survey.filters import HappeningSurveyFilter
 from survey.models import HappeningSurvey
 
 
-class TileView(MVTView, ListView):
+class TileView(CachedTileMixin, MVTView, ListView):
     model = HappeningSurvey
     vector_tile_layer_name = "happening-surveys"
     vector_tile_fields = (
@@ -22,3 +34,89 @@ class TileView(MVTView, ListView):
     vector_tile_queryset = HappeningSurvey.objects.filter(is_public=True).annotate(
         geom=Coalesce("location", "boundary", output_field=GeometryField(srid=4326))
     )
+
+
+class ClusterTileView(CachedTileMixin, MVTView, ListView):
+    model = HappeningSurvey
+    vector_tile_layer_name = "happening-survey-clusters"
+    vector_tile_queryset = HappeningSurvey.objects.filter(is_public=True)
+
+    def get_tile(self, x, y, z, extent=4096, buffer=256, clip_geom=True):
+        xmin, ymin, xmax, ymax = self.get_bounds(x, y, z)
+        envelope = Polygon.from_bbox((xmin, ymin, xmax, ymax))
+        envelope.srid = 3857
+        clusters = get_cluster_queryset(
+            self.get_vector_tile_queryset().filter(
+                Q(location__intersects=envelope) | Q(boundary__intersects=envelope)
+            ),
+            z,
+            bounds=(xmin, ymin, xmax, ymax),
+        ).values(
+            "count",
+            "centroid_x",
+            "centroid_y",
+            *get_breakdown_aggregates(),
+        )
+        sql, params = clusters.query.sql_with_params()
+        properties = ", ".join(
+            connection.ops.quote_name(name)
+            for name in ("count", *get_breakdown_aggregates())
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT ST_AsMVT(tile.*, %s, %s, 'geom') FROM (
+                    SELECT {properties}, ST_AsMVTGeom(
+                        ST_SetSRID(ST_MakePoint(centroid_x, centroid_y), 3857),
+                        ST_MakeEnvelope(%s, %s, %s, %s, 3857), %s, %s, %s
+                    ) AS geom
+                    FROM ({sql}) AS clusters
+                ) AS tile
+                """,
+                [
+                    self.get_vector_tile_layer_name(),
+                    extent,
+                    xmin,
+                    ymin,
+                    xmax,
+                    ymax,
+                    extent,
+                    buffer,
+                    clip_geom,
+                    *params,
+                ],
+            )
+            row = cursor.fetchone()[0]
+            return row.tobytes() if row else None
+
+
+class HappeningSurveyExportView(View):
+    """
+    Export the happening surveys visible to the user, filtered with the
+    parameters of `HappeningSurveyFilter`, as GeoJSON, CSV or GeoPackage.
+    """
+
+    def get(self, request):
+        try:
+            user = authenticate(request=request) or request.user
+        except JSONWebTokenError:
+            user = None
+        if not user or not user.is_authenticated:
+            return error_response("Authentication is required.", 401)
+        export_format = request.GET.get("format", "geojson")
+        if export_format not in EXPORT_FORMATS:
+            return error_response(
+                f"format must be one of {', '.join(EXPORT_FORMATS)}.", 400
+            )
+        filterset = HappeningSurveyFilter(
+            data=request.GET,
+            queryset=HappeningSurvey.objects.visible_to(user),
+            request=request,
+        )
+        if not filterset.is_valid():
+            return error_response(filterset.errors.as_text(), 400)
+        try:
+            queryset = filterset.qs
+        except GraphQLError as e:
+            return error_response(e.message, 400)
+        return export_happening_surveys(queryset, export_format)
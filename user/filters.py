@@ -1,6 +1,8 @@
 import django_filters
 from django.db.models import Q
 
+from lukimgather.db import fuzzy_search
+
 from .models import Grant, User
 
 
@@ -35,6 +37,9 @@ class GrantFilter(django_filters.FilterSet):
 
 class UserFilter(django_filters.FilterSet):
     search = django_filters.CharFilter(method="get_search", label="User")
+    fuzzy_search = django_filters.CharFilter(
+        method="get_fuzzy_search", label="User, ordered by similarity"
+    )
 
     class Meta:
         model = User
@@ -49,12 +54,15 @@ class UserFilter(django_filters.FilterSet):
             | Q(username__icontains=value)
         )
 
+    def get_fuzzy_search(self, queryset, name, value):
+        return fuzzy_search(queryset, ("first_name", "last_name", "username"), value)
+
     @property
     def qs(self):
         parent = super(UserFilter, self).qs
         if self.request.user.is_anonymous:
             return parent.none()
-        search_params = self.data.get("search")
-        if search_params is not None and not len(search_params) > 2:
-            return parent.none()
+        for search_params in (self.data.get("search"), self.data.get("fuzzy_search")):
+            if search_params is not None and not len(search_params) > 2:
+                return parent.none()
         return parent
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.23 on 2026-10-18 13:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import lukimgather.db
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0009_alter_user_options'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='user',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['first_name'], name='user_first_name_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='user',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['last_name'], name='user_last_name_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+        lukimgather.db.PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='user',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['username'], name='user_username_trgm', opclasses=['gin_trgm_ops']),
+            ),
+        ),
+    ]
@@ -2,6 +2,7 @@ from ckeditor.fields import RichTextField
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.db import models
 from django.utils import timezone
@@ -13,12 +14,12 @@ from push_notifications.models import APNSDevice, GCMDevice
 from lukimgather.auth_validators import CustomASCIIUsernameValidator
 from lukimgather.fields import LowerCharField, LowerEmailField
 from lukimgather.managers import CustomUserManager
-from lukimgather.models import TimeStampedModel, UserStampedModel
+from lukimgather.models import DirtyFieldsMixin, TimeStampedModel, UserStampedModel
 
 from .tasks import send_user_mail, send_user_sms
 
 
-class User(AbstractUser):
+class User(DirtyFieldsMixin, AbstractUser):
     class Gender(models.TextChoices):
         MALE = "male", _("Male")
         FEMALE = "female", _("Female")
@@ -79,26 +80,6 @@ class User(AbstractUser):
 
     objects = CustomUserManager()
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            cls = self.__class__
-            old = cls.objects.get(pk=self.pk)
-            changed_fields = []
-            for field in cls._meta.get_fields():
-                field_name = field.name
-                try:
-                    old_val = getattr(old, field_name)
-                    new_val = getattr(self, field_name)
-                    if hasattr(field, "is_custom_lower_field"):
-                        if field.is_custom_lower_field():
-                            new_val = new_val.lower()
-                    if old_val != new_val:
-                        changed_fields.append(field_name)
-                except Exception:
-                    pass
-            kwargs["update_fields"] = changed_fields
-        super().save(*args, **kwargs)
-
     def delete(self):
         if self.projects:
             self.projects.clear()
@@ -178,6 +159,12 @@ class User(AbstractUser):
 
     class Meta:
         permissions = (("can_accept_reject_project", "Can accept/reject project"),)
+        indexes = [
+            GinIndex(
+                fields=[field], name=f"user_{field}_trgm", opclasses=["gin_trgm_ops"]
+            )
+            for field in ("first_name", "last_name", "username")
+        ]
 
 
 class PasswordResetPin(TimeStampedModel):
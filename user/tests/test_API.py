@@ -63,6 +63,25 @@ class APITest(TestBase):
         )
         self.assertResponseNoErrors(response)
 
+    def test_get_users_fuzzy_search(self):
+        user = self.baker.make(
+            settings.AUTH_USER_MODEL, first_name="Kila", last_name="Wari"
+        )
+        response = self.query(
+            """
+            query Users($fuzzySearch: String!) {
+              users(fuzzySearch: $fuzzySearch) {
+                id
+              }
+            }
+            """,
+            variables={"fuzzySearch": "Wari"},
+            headers=self.headers,
+        )
+        self.assertResponseNoErrors(response)
+        ids = [row["id"] for row in json.loads(response.content)["data"]["users"]]
+        self.assertEqual(ids[0], str(user.id))
+
     def test_user_update(self):
         avatar = self.generate_photo_file()
         query = """